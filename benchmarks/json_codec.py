@@ -0,0 +1,115 @@
+"""JSON codec benchmark: large get_session and list_sessions payloads.
+
+Builds a throwaway NANOBOT_ROOT with one long session and many short
+ones, then times the session endpoints' parse + encode path with the
+active codec backend (utils/codec.py) against plain stdlib json, the
+way the routes worked before.
+
+    python3 benchmarks/json_codec.py [--messages 20000] [--sessions 2000]
+
+Install orjson (or msgspec) and run again to compare backends.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure dashboard package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+WORDS = "the quick brown fox 微信读书 jumps over the lazy dog ✓ 🙂".split()
+
+
+def _message(i: int) -> dict:
+    text = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(60))
+    msg = {"role": "user" if i % 2 == 0 else "assistant", "content": text,
+           "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}"}
+    if i % 5 == 1:
+        msg["tool_calls"] = [{"id": f"call_{i}", "type": "function",
+                              "function": {"name": "read_file", "arguments": '{"path": "memory/MEMORY.md"}'}}]
+    return msg
+
+
+def _write_session(path: Path, key: str, messages: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"_type": "metadata", "key": key, "created_at": "2026-01-01T00:00:00",
+                            "updated_at": "2026-01-02T00:00:00"}) + "\n")
+        for i in range(messages):
+            f.write(json.dumps(_message(i), ensure_ascii=False) + "\n")
+
+
+def _stdlib_session(path: Path) -> bytes:
+    """The pre-codec get_session: json.loads per line, web.json_response's json.dumps."""
+    messages, metadata = [], None
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if data.get("_type") == "metadata":
+                metadata = data
+            else:
+                messages.append(data)
+    return json.dumps({"key": path.stem, "metadata": metadata, "messages": messages, "note": ""}).encode()
+
+
+def _time(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000, help="messages in the long session")
+    parser.add_argument("--sessions", type=int, default=2_000, help="number of short sessions")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.environ["NANOBOT_ROOT"] = root
+    from dashboard.config import SESSIONS_DIR
+    from dashboard.routes.sessions import _list_sessions, _read_session
+    from dashboard.utils import codec
+
+    SESSIONS_DIR.mkdir(parents=True)
+    big = SESSIONS_DIR / "cli_big.jsonl"
+    _write_session(big, "cli:big", args.messages)
+    for i in range(args.sessions):
+        _write_session(SESSIONS_DIR / f"telegram_{i}.jsonl", f"telegram:{i}", 4)
+    sessions = _list_sessions(None)
+
+    print(f"codec backend: {codec.BACKEND}")
+    print(f"long session: {args.messages} messages, {big.stat().st_size / 1e6:.1f} MB; "
+          f"session list: {len(sessions)} entries\n")
+    session = _read_session("cli_big", big)
+    rows = [
+        ("get_session parse+encode", lambda: _stdlib_session(big),
+         lambda: codec.dumps(_read_session("cli_big", big))),
+        ("get_session encode only", lambda: json.dumps(session).encode(),
+         lambda: codec.dumps(session)),
+        ("list_sessions encode", lambda: json.dumps({"sessions": sessions}).encode(),
+         lambda: codec.dumps({"sessions": sessions})),
+    ]
+
+    print(f"{'':28}{'stdlib ms':>12}{codec.BACKEND + ' ms':>14}{'speedup':>10}")
+    for name, baseline, fast in rows:
+        base_ms = _time(baseline, args.repeat)
+        fast_ms = _time(fast, args.repeat)
+        print(f"{name:28}{base_ms:12.1f}{fast_ms:14.1f}{base_ms / fast_ms:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Metrics overhead benchmark: what metrics_middleware adds to a request.
+
+Calls a trivial handler directly and through metrics_middleware on the
+same resolved request, and exits non-zero when the difference exceeds the
+budget. For scale it also times sequential keep-alive HTTP requests
+against two local apps, one with the middleware and one without; that
+comparison is informational, as socket noise is larger than the overhead.
+
+    python3 benchmarks/metrics_overhead.py [--calls 200000] [--budget-us 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure dashboard package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer, make_mocked_request
+
+from dashboard.utils.metrics import metrics_middleware
+
+
+async def _ok(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def _app(middlewares) -> web.Application:
+    app = web.Application(middlewares=middlewares)
+    app.router.add_get("/api/items/{id}", _ok)
+    return app
+
+
+async def _round(client: TestClient, n: int) -> float:
+    """Mean seconds per request over n sequential requests."""
+    started = time.perf_counter()
+    for i in range(n):
+        async with client.get(f"/api/items/{i}") as resp:
+            await resp.read()
+    return (time.perf_counter() - started) / n
+
+
+async def _direct_ns(n: int, wrapped: bool) -> float:
+    """Mean nanoseconds per in-process call of the handler, with or without the middleware."""
+    app = _app([])
+    request = make_mocked_request("GET", "/api/items/1", app=app)
+    request._match_info = await app.router.resolve(request)
+    started = time.perf_counter()
+    if wrapped:
+        for _ in range(n):
+            await metrics_middleware(request, _ok)
+    else:
+        for _ in range(n):
+            await _ok(request)
+    return (time.perf_counter() - started) / n * 1e9
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000, help="direct calls per round")
+    parser.add_argument("--requests", type=int, default=2_000, help="HTTP requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=5.0,
+                        help="allowed middleware overhead per request, microseconds")
+    args = parser.parse_args()
+
+    direct, wrapped = [], []
+    for _ in range(args.rounds):
+        direct.append(await _direct_ns(args.calls, False))
+        wrapped.append(await _direct_ns(args.calls, True))
+    overhead_ns = statistics.median(wrapped) - statistics.median(direct)
+
+    plain = TestClient(TestServer(_app([])))
+    timed = TestClient(TestServer(_app([metrics_middleware])))
+    await plain.start_server()
+    await timed.start_server()
+    try:
+        await _round(plain, 200)    # warm up connections
+        await _round(timed, 200)
+        base, with_metrics = [], []
+        for _ in range(args.rounds):
+            base.append(await _round(plain, args.requests))
+            with_metrics.append(await _round(timed, args.requests))
+    finally:
+        await plain.close()
+        await timed.close()
+
+    print(f"middleware overhead:    {overhead_ns / 1000:8.2f} us/request (budget {args.budget_us:g} us)")
+    print(f"HTTP without middleware:{statistics.median(base) * 1e6:8.1f} us/request")
+    print(f"HTTP with middleware:   {statistics.median(with_metrics) * 1e6:8.1f} us/request")
+    if overhead_ns / 1000 > args.budget_us:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
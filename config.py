@@ -1,6 +1,9 @@
 """Dashboard configuration."""
 
 import os
+import shlex
+import shutil
+import sys
 from pathlib import Path
 
 # Nanobot root directory
@@ -8,6 +11,7 @@ NANOBOT_ROOT = Path(os.environ.get("NANOBOT_ROOT", Path.home() / ".nanobot"))
 
 # Derived paths
 CONFIG_FILE = NANOBOT_ROOT / "config.json"
+STATE_FILE = NANOBOT_ROOT / ".state.json"
 CRON_JOBS_FILE = NANOBOT_ROOT / "cron" / "jobs.json"
 SESSIONS_DIR = NANOBOT_ROOT / "workspace" / "sessions"
 WORKSPACE_DIR = NANOBOT_ROOT / "workspace"
@@ -15,7 +19,102 @@ MEMORY_DIR = NANOBOT_ROOT / "workspace" / "memory"
 MEDIA_DIR = NANOBOT_ROOT / "media"
 GATEWAY_LOG = NANOBOT_ROOT / "gateway.log"
 
+# Dashboard-owned state (kept out of workspace/ so nanobot never sees it)
+DASHBOARD_DATA_DIR = Path(os.environ.get("NANOBOT_DASHBOARD_DATA", NANOBOT_ROOT / ".dashboard"))
+STATUS_HISTORY_FILE = DASHBOARD_DATA_DIR / "status_history.bin"
+
+# Version history of workspace files saved through the dashboard: the
+# object store is trimmed to this many MB, but every file keeps at least
+# HISTORY_MIN_VERSIONS versions
+HISTORY_BUDGET_MB = int(os.environ.get("NANOBOT_DASHBOARD_HISTORY_MB", "100"))
+HISTORY_MIN_VERSIONS = int(os.environ.get("NANOBOT_DASHBOARD_HISTORY_MIN_VERSIONS", "5"))
+
 # Server settings
 HOST = os.environ.get("NANOBOT_DASHBOARD_HOST", "127.0.0.1")
 PORT = int(os.environ.get("NANOBOT_DASHBOARD_PORT", "18791"))
 AUTH_TOKEN = os.environ.get("NANOBOT_DASHBOARD_TOKEN", "")
+# Server processes sharing the port (see utils/cluster.py); --workers overrides
+WORKERS = int(os.environ.get("NANOBOT_DASHBOARD_WORKERS", "1"))
+
+# Responses (JSON, text) at least this large are compressed when the
+# client accepts gzip/br/zstd (see utils/compress.py)
+COMPRESS_MIN_BYTES = int(os.environ.get("NANOBOT_DASHBOARD_COMPRESS_MIN_BYTES", "1024"))
+
+# Threads for blocking file work (see utils/executor.py): small reads and
+# writes, and CPU-heavy scans such as search, get separate pools
+IO_THREADS = int(os.environ.get("NANOBOT_DASHBOARD_IO_THREADS", "8"))
+SEARCH_THREADS = int(os.environ.get("NANOBOT_DASHBOARD_SEARCH_THREADS", "2"))
+
+# Cache warm-up after startup (see utils/warmup.py); its file reads are
+# capped at WARMUP_MB_PER_S so they don't compete with live requests
+WARMUP = os.environ.get("NANOBOT_DASHBOARD_WARMUP", "1") not in ("0", "false", "no")
+WARMUP_MB_PER_S = float(os.environ.get("NANOBOT_DASHBOARD_WARMUP_MB_S", "50"))
+
+
+# Admission control per route class (see utils/admission.py): requests
+# running at once, and seconds a request may wait for a slot before it is
+# refused with 503. NANOBOT_DASHBOARD_ADMISSION overrides any of them as
+# "class=limit/timeout", comma-separated, e.g. "heavy=2/5,light=32/1".
+def _admission_limits(spec: str) -> dict[str, tuple[int, float]]:
+    limits = {
+        "light": (64, 2.0),       # small reads: listings, single files, status
+        "heavy": (4, 5.0),        # full scans and big parses: search, session loads, media tree
+        "mutation": (8, 10.0),    # writes
+        "stream": (64, 0.0),      # chat SSE and WebSockets, held for the whole stream
+    }
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name not in limits:
+            continue
+        limit, _, timeout = value.partition("/")
+        limits[name] = (int(limit or limits[name][0]), float(timeout or limits[name][1]))
+    return limits
+
+
+ADMISSION = _admission_limits(os.environ.get("NANOBOT_DASHBOARD_ADMISSION", ""))
+
+# API requests slower than this keep their trace of spans (file scans,
+# parses, pool calls, subprocess waits) for GET /api/debug/slow
+SLOW_REQUEST_MS = int(os.environ.get("NANOBOT_DASHBOARD_SLOW_MS", "500"))
+
+# Manual cron runs: how many `nanobot cron run` processes may run at once,
+# and how many finished runs to remember
+CRON_RUN_CONCURRENCY = int(os.environ.get("NANOBOT_DASHBOARD_CRON_CONCURRENCY", "2"))
+CRON_RUN_HISTORY = 100
+
+
+def _nanobot_python() -> str:
+    """Interpreter nanobot is installed under (from its entry script's shebang).
+
+    nanobot is usually installed in its own virtualenv (pipx/uv), so the
+    dashboard's interpreter can't import it.
+    """
+    script = shutil.which("nanobot")
+    if script:
+        try:
+            with open(script, "rb") as f:
+                first = f.readline().decode("utf-8", errors="replace")
+            if first.startswith("#!"):
+                interpreter = first[2:].strip().split()[0]
+                if os.path.basename(interpreter).startswith("python") and os.path.exists(interpreter):
+                    return interpreter
+        except OSError:
+            pass
+    return sys.executable
+
+
+# Chat worker pool: long-lived agent processes instead of one per message.
+# NANOBOT_DASHBOARD_CHAT_WORKERS=0 falls back to `nanobot agent -m` per message.
+CHAT_WORKERS = int(os.environ.get("NANOBOT_DASHBOARD_CHAT_WORKERS", "2"))
+CHAT_WORKER_CMD = (
+    shlex.split(os.environ["NANOBOT_DASHBOARD_CHAT_WORKER_CMD"])
+    if os.environ.get("NANOBOT_DASHBOARD_CHAT_WORKER_CMD")
+    else [_nanobot_python(), str(Path(__file__).parent / "workers" / "agent_worker.py")]
+)
+CHAT_WORKER_MAX_REQUESTS = int(os.environ.get("NANOBOT_DASHBOARD_CHAT_WORKER_MAX_REQUESTS", "100"))
+CHAT_WORKER_MAX_RSS_MB = int(os.environ.get("NANOBOT_DASHBOARD_CHAT_WORKER_MAX_RSS_MB", "1024"))
+
+# Chat admission: agents running at once (one per session), and how many
+# more may wait in line before new chats are turned away with 429.
+CHAT_CONCURRENCY = int(os.environ.get("NANOBOT_DASHBOARD_CHAT_CONCURRENCY", "4"))
+CHAT_QUEUE = int(os.environ.get("NANOBOT_DASHBOARD_CHAT_QUEUE", "16"))
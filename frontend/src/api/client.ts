@@ -6,7 +6,7 @@ async function request(path: string, options: RequestInit = {}): Promise<any> {
     ...(options.headers as Record<string, string>),
   };
   if (token) headers["Authorization"] = `Bearer ${token}`;
-  if (options.body && typeof options.body === "string") {
+  if (options.body && typeof options.body === "string" && !headers["Content-Type"]) {
     headers["Content-Type"] = "application/json";
   }
 
@@ -18,9 +18,97 @@ async function request(path: string, options: RequestInit = {}): Promise<any> {
   return res.json();
 }
 
+/** Like request(), but also returns the response ETag (for If-Match writes). */
+async function requestWithEtag(path: string, options: RequestInit = {}): Promise<{ data: any; etag: string }> {
+  const token = localStorage.getItem("dashboard_token");
+  const headers: Record<string, string> = {
+    ...(options.headers as Record<string, string>),
+  };
+  if (token) headers["Authorization"] = `Bearer ${token}`;
+
+  const res = await fetch(`${BASE}${path}`, { ...options, headers });
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`${res.status}: ${text}`);
+  }
+  return { data: await res.json(), etag: res.headers.get("ETag") || "" };
+}
+
+/**
+ * Build an RFC 7396 merge patch turning `before` into `after`.
+ * Returns null when the change can't be expressed (e.g. a value set to null).
+ */
+export function mergePatchDiff(before: any, after: any): any {
+  const isObj = (v: any) => v !== null && typeof v === "object" && !Array.isArray(v);
+  if (!isObj(before) || !isObj(after)) return null;
+  const patch: Record<string, any> = {};
+  for (const key of Object.keys(before)) {
+    if (!(key in after)) patch[key] = null;
+  }
+  for (const [key, value] of Object.entries(after)) {
+    if (value === null) {
+      if (before[key] !== null) return null;
+      continue;
+    }
+    if (isObj(value) && isObj(before[key])) {
+      const sub = mergePatchDiff(before[key], value);
+      if (sub === null) return null;
+      if (Object.keys(sub).length) patch[key] = sub;
+    } else if (JSON.stringify(value) !== JSON.stringify(before[key])) {
+      patch[key] = value;
+    }
+  }
+  return patch;
+}
+
+export interface TextEdit {
+  offset: number;
+  delete: number;
+  insert: string;
+}
+
+const utf8Length = (s: string) => new TextEncoder().encode(s).length;
+
+/**
+ * The edit turning `before` into `after`, as one splice in UTF-8 byte
+ * offsets (the format of PATCH /api/memory/files/{path}). Empty if equal.
+ */
+export function textEdits(before: string, after: string): TextEdit[] {
+  if (before === after) return [];
+  const isHigh = (c: number) => c >= 0xd800 && c <= 0xdbff;
+  const isLow = (c: number) => c >= 0xdc00 && c <= 0xdfff;
+  let start = 0;
+  const max = Math.min(before.length, after.length);
+  while (start < max && before.charCodeAt(start) === after.charCodeAt(start)) start++;
+  // Don't split a surrogate pair
+  if (start > 0 && isHigh(before.charCodeAt(start - 1))) start--;
+  let end = 0;
+  while (
+    end < max - start &&
+    before.charCodeAt(before.length - 1 - end) === after.charCodeAt(after.length - 1 - end)
+  ) end++;
+  if (end > 0 && isLow(before.charCodeAt(before.length - end))) end--;
+  return [{
+    offset: utf8Length(before.slice(0, start)),
+    delete: utf8Length(before.slice(start, before.length - end)),
+    insert: after.slice(start, after.length - end),
+  }];
+}
+
+/** True for the 409 a save gets when the file changed since it was read. */
+export const isConflict = (e: any) => typeof e?.message === "string" && e.message.startsWith("409:");
+
 export const api = {
   // Status
   getStatus: () => request("/api/status"),
+  getStatusHistory: (params: { from?: number; to?: number; step?: number } = {}) => {
+    const qs = new URLSearchParams(
+      Object.entries(params)
+        .filter(([, v]) => v !== undefined)
+        .map(([k, v]) => [k, String(v)]),
+    ).toString();
+    return request(`/api/status/history${qs ? `?${qs}` : ""}`);
+  },
 
   // Sessions
   getSessions: (channel?: string) =>
@@ -41,6 +129,11 @@ export const api = {
       method: "POST",
       body: JSON.stringify(data),
     }),
+  bulkCronJobs: (operations: any[]) =>
+    request("/api/cron/jobs/bulk", {
+      method: "POST",
+      body: JSON.stringify({ operations }),
+    }),
   deleteCronJob: (id: string) =>
     request(`/api/cron/jobs/${id}`, { method: "DELETE" }),
   updateCronJob: (id: string, data: any) =>
@@ -50,36 +143,100 @@ export const api = {
     }),
   runCronJob: (id: string) =>
     request(`/api/cron/jobs/${id}/run`, { method: "POST" }),
+  getCronTimeline: (hours = 24, count = 10) =>
+    request(`/api/cron/timeline?hours=${hours}&count=${count}`),
+  getCronRuns: (jobId?: string) =>
+    request(`/api/cron/runs${jobId ? `?job=${encodeURIComponent(jobId)}` : ""}`),
+  getCronRun: (runId: string) => request(`/api/cron/runs/${runId}`),
+  cancelCronRun: (runId: string) =>
+    request(`/api/cron/runs/${runId}`, { method: "DELETE" }),
 
   // Memory
   getMemoryFiles: () => request("/api/memory/files"),
   getMemoryFile: (path: string) =>
     request(`/api/memory/files/${encodeURIComponent(path)}`),
-  updateMemoryFile: (path: string, content: string) =>
+  getMemoryFileRange: (path: string, offset: number, length: number) =>
+    request(`/api/memory/files/${encodeURIComponent(path)}?offset=${offset}&length=${length}`),
+  getMemoryRecords: (path: string, start: number, limit: number) =>
+    request(`/api/memory/records/${encodeURIComponent(path)}?start=${start}&limit=${limit}`),
+  updateMemoryFile: (path: string, content: string, base?: string) =>
     request(`/api/memory/files/${encodeURIComponent(path)}`, {
       method: "PUT",
-      body: JSON.stringify({ content }),
+      body: JSON.stringify({ content, base }),
+    }),
+  patchMemoryFile: (path: string, base: string, edits: TextEdit[]) =>
+    request(`/api/memory/files/${encodeURIComponent(path)}`, {
+      method: "PATCH",
+      body: JSON.stringify({ base, edits }),
     }),
   deleteMemoryFile: (path: string) =>
     request(`/api/memory/files/${encodeURIComponent(path)}`, { method: "DELETE" }),
 
+  // Version history
+  getFileHistory: (path: string) =>
+    request(`/api/history/files/${encodeURIComponent(path)}`),
+  getVersion: (id: string) => request(`/api/history/versions/${id}`),
+  getVersionDiff: (path: string, from: string, to?: string) =>
+    request(`/api/history/diff?${new URLSearchParams({ path, from, ...(to ? { to } : {}) })}`),
+  restoreVersion: (path: string, id: string, base?: string) =>
+    request(`/api/history/restore/${encodeURIComponent(path)}`, {
+      method: "POST",
+      body: JSON.stringify({ id, base }),
+    }),
+
   // Skills
   getSkills: () => request("/api/skills"),
   getSkillFile: (id: string, filename: string) =>
     request(`/api/skills/${encodeURIComponent(id)}/${encodeURIComponent(filename)}`),
-  updateSkillFile: (id: string, filename: string, content: string) =>
+  updateSkillFile: (id: string, filename: string, content: string, base?: string) =>
     request(`/api/skills/${encodeURIComponent(id)}/${encodeURIComponent(filename)}`, {
       method: "PUT",
-      body: JSON.stringify({ content }),
+      body: JSON.stringify({ content, base }),
+    }),
+  patchSkillFile: (id: string, filename: string, base: string, edits: TextEdit[]) =>
+    request(`/api/skills/${encodeURIComponent(id)}/${encodeURIComponent(filename)}`, {
+      method: "PATCH",
+      body: JSON.stringify({ base, edits }),
     }),
   deleteSkill: (id: string) =>
     request(`/api/skills/${encodeURIComponent(id)}`, { method: "DELETE" }),
+  exportSkills: async (ids: string[] = []): Promise<Blob> => {
+    const token = localStorage.getItem("dashboard_token");
+    const qs = ids.length ? `?ids=${encodeURIComponent(ids.join(","))}` : "";
+    const res = await fetch(`${BASE}/api/skills/export${qs}`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!res.ok) throw new Error(`${res.status}: ${await res.text()}`);
+    return res.blob();
+  },
+  importSkills: (archive: Blob, overwrite = false) =>
+    request(`/api/skills/import${overwrite ? "?overwrite=1" : ""}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/zip" },
+      body: archive,
+    }),
 
   // Config
   getConfig: () => request("/api/config"),
   getConfigRaw: () => request("/api/config/raw"),
-  updateConfig: (content: string) =>
-    request("/api/config", { method: "PUT", body: JSON.stringify({ content }) }),
+  getConfigRawVersioned: () => requestWithEtag("/api/config/raw"),
+  updateConfig: (content: string, etag?: string) =>
+    request("/api/config", {
+      method: "PUT",
+      body: JSON.stringify({ content }),
+      headers: etag ? { "If-Match": etag } : {},
+    }),
+  patchConfig: (patch: any, etag: string) =>
+    request("/api/config", {
+      method: "PATCH",
+      body: JSON.stringify(patch),
+      headers: {
+        "If-Match": etag,
+        "Content-Type": Array.isArray(patch)
+          ? "application/json-patch+json"
+          : "application/merge-patch+json",
+      },
+    }),
 
   // Logs
   getLogFiles: () => request("/api/logs"),
@@ -0,0 +1,71 @@
+/**
+ * Filesystem change feed (server side: routes/events.py).
+ *
+ * One EventSource per tab, opened by the first subscriber and closed with
+ * the last. changes.subscribe(["sessions"], (events) => ...) calls the
+ * handler with each batch's events of those kinds; after a reconnect that
+ * the server couldn't replay (`resync`) it is called with an empty list,
+ * meaning "reload everything". EventSource reconnects by itself and sends
+ * Last-Event-ID, so batches missed meanwhile are replayed.
+ */
+
+export type ChangeKind = "sessions" | "workspace" | "media" | "cron" | "config" | "logs";
+
+export interface ChangeEvent {
+  kind: ChangeKind;
+  type: "created" | "modified" | "deleted" | "rescan";
+  path: string;
+}
+
+export type ChangeHandler = (events: ChangeEvent[]) => void;
+
+interface Subscriber {
+  kinds: Set<ChangeKind>;
+  handler: ChangeHandler;
+}
+
+class ChangeFeed {
+  private source: EventSource | null = null;
+  private subscribers = new Set<Subscriber>();
+
+  private url(): string {
+    const token = localStorage.getItem("dashboard_token");
+    return token ? `/api/events?token=${encodeURIComponent(token)}` : "/api/events";
+  }
+
+  private open() {
+    const source = new EventSource(this.url());
+    source.addEventListener("changes", (e) => {
+      let batch: { events: ChangeEvent[] };
+      try {
+        batch = JSON.parse((e as MessageEvent).data);
+      } catch {
+        return;
+      }
+      for (const sub of this.subscribers) {
+        const mine = batch.events.filter((ev) => sub.kinds.has(ev.kind));
+        if (mine.length) sub.handler(mine);
+      }
+    });
+    source.addEventListener("resync", () => {
+      for (const sub of this.subscribers) sub.handler([]);
+    });
+    this.source = source;
+  }
+
+  /** Call `handler` with changes of `kinds`; returns the unsubscribe function. */
+  subscribe(kinds: ChangeKind[], handler: ChangeHandler): () => void {
+    const sub: Subscriber = { kinds: new Set(kinds), handler };
+    this.subscribers.add(sub);
+    if (!this.source) this.open();
+    return () => {
+      this.subscribers.delete(sub);
+      if (!this.subscribers.size && this.source) {
+        this.source.close();
+        this.source = null;
+      }
+    };
+  }
+}
+
+export const changes = new ChangeFeed();
@@ -0,0 +1,134 @@
+/**
+ * One multiplexed WebSocket per tab (server side: routes/ws.py).
+ *
+ * socket.open("logs", { name }, (event, data) => ...) opens a channel and
+ * returns a handle to close it. Credit is granted back in batches as
+ * events are handled, so a busy tab slows the server down instead of
+ * buffering without bound. Live channels (logs, status) are reopened
+ * after a reconnect; chat channels end with a `closed` event instead.
+ */
+
+export type ChannelHandler = (event: string, data: any) => void;
+
+export interface ChannelHandle {
+  close(): void;
+}
+
+interface Channel {
+  id: number;
+  closed: boolean;
+  type: string;
+  params: Record<string, any>;
+  handler: ChannelHandler;
+  consumed: number;
+}
+
+const CREDIT = 64;
+const REOPEN_TYPES = new Set(["logs", "status"]);
+const RETRY_DELAYS = [1000, 2000, 5000, 10000, 30000];
+
+class DashboardSocket {
+  private ws: WebSocket | null = null;
+  private connecting: Promise<WebSocket> | null = null;
+  private channels = new Map<number, Channel>();
+  private nextId = 1;
+  private retries = 0;
+
+  private url(): string {
+    const proto = location.protocol === "https:" ? "wss:" : "ws:";
+    const token = localStorage.getItem("dashboard_token");
+    const query = token ? `?token=${encodeURIComponent(token)}` : "";
+    return `${proto}//${location.host}/api/ws${query}`;
+  }
+
+  private connect(): Promise<WebSocket> {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) return Promise.resolve(this.ws);
+    if (this.connecting) return this.connecting;
+    this.connecting = new Promise((resolve, reject) => {
+      const ws = new WebSocket(this.url());
+      ws.onopen = () => {
+        this.ws = ws;
+        this.connecting = null;
+        this.retries = 0;
+        resolve(ws);
+      };
+      ws.onerror = () => {
+        if (this.connecting) {
+          this.connecting = null;
+          reject(new Error("WebSocket connection failed"));
+        }
+      };
+      ws.onmessage = (e) => this.onMessage(e.data);
+      ws.onclose = () => this.onClose(ws);
+    });
+    return this.connecting;
+  }
+
+  private onMessage(raw: string) {
+    let msg: any;
+    try {
+      msg = JSON.parse(raw);
+    } catch {
+      return;
+    }
+    const channel = this.channels.get(msg.ch);
+    if (!channel) return;
+    if (msg.event === "closed") {
+      this.channels.delete(msg.ch);
+    } else if (++channel.consumed >= CREDIT / 2) {
+      this.send({ op: "credit", ch: msg.ch, n: channel.consumed });
+      channel.consumed = 0;
+    }
+    channel.handler(msg.event, msg.data);
+  }
+
+  private onClose(ws: WebSocket) {
+    if (this.ws !== ws) return;
+    this.ws = null;
+    const reopen: Channel[] = [];
+    for (const [id, channel] of this.channels) {
+      this.channels.delete(id);
+      if (REOPEN_TYPES.has(channel.type)) {
+        reopen.push(channel);
+      } else {
+        channel.handler("closed", { reason: "error", message: "连接已断开" });
+      }
+    }
+    if (!reopen.length) return;
+    const delay = RETRY_DELAYS[Math.min(this.retries++, RETRY_DELAYS.length - 1)];
+    setTimeout(() => {
+      for (const channel of reopen) {
+        if (channel.closed) continue;
+        this.attach(channel).catch(() => {
+          channel.handler("closed", { reason: "error", message: "连接已断开" });
+        });
+      }
+    }, delay);
+  }
+
+  private send(msg: Record<string, any>) {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) this.ws.send(JSON.stringify(msg));
+  }
+
+  private async attach(channel: Channel) {
+    await this.connect();
+    channel.id = this.nextId++;
+    channel.consumed = 0;
+    this.channels.set(channel.id, channel);
+    this.send({ op: "open", ch: channel.id, type: channel.type, credit: CREDIT, ...channel.params });
+  }
+
+  /** Open a channel; rejects if the socket can't be connected. */
+  async open(type: string, params: Record<string, any>, handler: ChannelHandler): Promise<ChannelHandle> {
+    const channel: Channel = { id: 0, closed: false, type, params, handler, consumed: 0 };
+    await this.attach(channel);
+    return {
+      close: () => {
+        channel.closed = true;
+        if (this.channels.delete(channel.id)) this.send({ op: "close", ch: channel.id });
+      },
+    };
+  }
+}
+
+export const socket = new DashboardSocket();
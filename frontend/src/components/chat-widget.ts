@@ -2,6 +2,7 @@ import { LitElement, html, css, unsafeCSS } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { unsafeHTML } from "lit/directives/unsafe-html.js";
 import { renderMarkdown } from "../utils/markdown.js";
+import { socket } from "../api/socket.js";
 import hljsStyles from "highlight.js/styles/github-dark.css?inline";
 
 interface ChatMessage {
@@ -20,6 +21,8 @@ export class ChatWidget extends LitElement {
   @state() private progressText = "";
   @state() private historyLoaded = false;
   @state() private contextFile = "";
+  // Index of the assistant message being streamed, -1 until the first delta
+  private streamIndex = -1;
 
   static styles = css`
     ${unsafeCSS(hljsStyles)}
@@ -319,12 +322,59 @@ export class ChatWidget extends LitElement {
     this.input = "";
     this.sending = true;
     this.progressText = "";
+    this.streamIndex = -1;
     const textarea = this.shadowRoot?.querySelector<HTMLTextAreaElement>(".chat-input");
     if (textarea) { textarea.style.height = '36px'; textarea.style.overflowY = 'hidden'; }
     this.messages = [...this.messages, { role: "user", content: msg }];
     await this.updateComplete;
     this.scrollToBottom();
 
+    const body = {
+      message: msg,
+      session_id: this.sessionId || undefined,
+      ...(this.contextFile ? {
+        context: {
+          page: location.hash.replace("#", "") || "status",
+          file: this.contextFile,
+        },
+      } : {}),
+    };
+
+    try {
+      await this.sendViaSocket(body);
+    } catch {
+      // No WebSocket (e.g. blocked by a proxy): use the SSE endpoint
+      await this.sendViaSse(body);
+    }
+
+    this.sending = false;
+    this.progressText = "";
+    await this.updateComplete;
+    this.scrollToBottom();
+  }
+
+  /** Run the chat on a channel of the shared socket; rejects only if the socket can't connect. */
+  private async sendViaSocket(body: Record<string, any>) {
+    let finish!: () => void;
+    const finished = new Promise<void>(resolve => { finish = resolve; });
+    await socket.open("chat", body, (event, data) => {
+      if (event === "closed") {
+        if (data.reason === "cancelled") {
+          this.handleChatEvent("error", { cancelled: true });
+        } else if (data.reason === "busy") {
+          this.messages = [...this.messages, { role: "assistant", content: "当前对话过多，请稍后再试" }];
+        } else if (data.reason === "error") {
+          this.handleChatEvent("error", data);
+        }
+        finish();
+      } else {
+        this.handleChatEvent(event, data);
+      }
+    });
+    await finished;
+  }
+
+  private async sendViaSse(body: Record<string, any>) {
     const token = localStorage.getItem("dashboard_token");
     const headers: Record<string, string> = { "Content-Type": "application/json" };
     if (token) headers["Authorization"] = `Bearer ${token}`;
@@ -333,30 +383,21 @@ export class ChatWidget extends LitElement {
       const res = await fetch("/api/chat", {
         method: "POST",
         headers,
-        body: JSON.stringify({
-          message: msg,
-          session_id: this.sessionId || undefined,
-          ...(this.contextFile ? {
-            context: {
-              page: location.hash.replace("#", "") || "status",
-              file: this.contextFile,
-            },
-          } : {}),
-        }),
+        body: JSON.stringify(body),
       });
 
       if (!res.ok || !res.body) {
-        this.messages = [...this.messages, {
-          role: "assistant",
-          content: `错误: ${res.status} ${res.statusText}`,
-        }];
-        this.sending = false;
+        const content = res.status === 429
+          ? "当前对话过多，请稍后再试"
+          : `错误: ${res.status} ${res.statusText}`;
+        this.messages = [...this.messages, { role: "assistant", content }];
         return;
       }
 
       const reader = res.body.getReader();
       const decoder = new TextDecoder();
       let buffer = "";
+      let eventType = "";
 
       while (true) {
         const { done, value } = await reader.read();
@@ -367,36 +408,13 @@ export class ChatWidget extends LitElement {
         const lines = buffer.split("\n");
         buffer = lines.pop() || ""; // Keep incomplete line in buffer
 
-        let eventType = "";
         for (const line of lines) {
           if (line.startsWith("event: ")) {
             eventType = line.slice(7).trim();
           } else if (line.startsWith("data: ")) {
             const dataStr = line.slice(6);
             try {
-              const data = JSON.parse(dataStr);
-              if (eventType === "progress") {
-                this.progressText = data.text || "";
-                await this.updateComplete;
-                this.scrollToBottom();
-              } else if (eventType === "done") {
-                // Save session ID if first message
-                if (data.session_id && data.session_id !== this.sessionId) {
-                  this.sessionId = data.session_id;
-                  localStorage.setItem("chat_session_id", this.sessionId);
-                }
-                this.messages = [...this.messages, {
-                  role: "assistant",
-                  content: data.response || "",
-                }];
-                this.progressText = "";
-              } else if (eventType === "error") {
-                this.messages = [...this.messages, {
-                  role: "assistant",
-                  content: `错误: ${data.message}`,
-                }];
-                this.progressText = "";
-              }
+              this.handleChatEvent(eventType, JSON.parse(dataStr));
             } catch {
               // skip malformed JSON
             }
@@ -410,11 +428,70 @@ export class ChatWidget extends LitElement {
         content: `网络错误: ${e.message}`,
       }];
     }
+  }
 
-    this.sending = false;
-    this.progressText = "";
-    await this.updateComplete;
-    this.scrollToBottom();
+  private setStreamed(content: string) {
+    const messages = [...this.messages];
+    messages[this.streamIndex] = { ...messages[this.streamIndex], content };
+    this.messages = messages;
+  }
+
+  /** Apply one chat event (same names over SSE and the socket). */
+  private handleChatEvent(eventType: string, data: any) {
+    if (eventType === "session") {
+      if (data.session_id && data.session_id !== this.sessionId) {
+        this.sessionId = data.session_id;
+        localStorage.setItem("chat_session_id", this.sessionId);
+      }
+    } else if (eventType === "queued") {
+      this.progressText = `排队中（第 ${data.position} 位）`;
+    } else if (eventType === "progress") {
+      this.progressText = data.text || "";
+    } else if (eventType === "delta") {
+      if (this.streamIndex < 0) {
+        this.messages = [...this.messages, { role: "assistant", content: "" }];
+        this.streamIndex = this.messages.length - 1;
+      }
+      this.setStreamed(this.messages[this.streamIndex].content + (data.text || ""));
+      this.progressText = "";
+    } else if (eventType === "done") {
+      // Save session ID if first message
+      if (data.session_id && data.session_id !== this.sessionId) {
+        this.sessionId = data.session_id;
+        localStorage.setItem("chat_session_id", this.sessionId);
+      }
+      if (this.streamIndex >= 0) {
+        this.setStreamed(this.messages[this.streamIndex].content.trim());
+      } else {
+        // Servers without delta events send the whole reply here
+        this.messages = [...this.messages, {
+          role: "assistant",
+          content: data.response || "",
+        }];
+      }
+      this.progressText = "";
+    } else if (eventType === "error") {
+      this.messages = [...this.messages, {
+        role: "assistant",
+        content: data.cancelled ? "（已停止）" : `错误: ${data.message}`,
+      }];
+      this.progressText = "";
+    } else {
+      return;
+    }
+    this.updateComplete.then(() => this.scrollToBottom());
+  }
+
+  private async stopMessage() {
+    if (!this.sessionId) return;
+    const token = localStorage.getItem("dashboard_token");
+    const headers: Record<string, string> = {};
+    if (token) headers["Authorization"] = `Bearer ${token}`;
+    try {
+      await fetch(`/api/chat/${this.sessionId}/active`, { method: "DELETE", headers });
+    } catch {
+      // ignore; the stream ends on its own
+    }
   }
 
   private handleKeyDown(e: KeyboardEvent) {
@@ -489,11 +566,19 @@ export class ChatWidget extends LitElement {
               ?disabled=${this.sending}
               rows="1"
             ></textarea>
-            <button class="send-btn" @click=${this.sendMessage} ?disabled=${this.sending || !this.input.trim()} title="发送">
-              <svg viewBox="0 0 24 24" fill="currentColor">
-                <path d="M2.01 21L23 12 2.01 3 2 10l15 2-15 2z"/>
-              </svg>
-            </button>
+            ${this.sending && this.sessionId ? html`
+              <button class="send-btn" @click=${this.stopMessage} title="停止">
+                <svg viewBox="0 0 24 24" fill="currentColor">
+                  <rect x="6" y="6" width="12" height="12" rx="2"/>
+                </svg>
+              </button>
+            ` : html`
+              <button class="send-btn" @click=${this.sendMessage} ?disabled=${this.sending || !this.input.trim()} title="发送">
+                <svg viewBox="0 0 24 24" fill="currentColor">
+                  <path d="M2.01 21L23 12 2.01 3 2 10l15 2-15 2z"/>
+                </svg>
+              </button>
+            `}
           </div>
         </div>
       ` : ""}
@@ -5,10 +5,16 @@
 import { LitElement, html, css, unsafeCSS } from "lit";
 import { state } from "lit/decorators.js";
 import { unsafeHTML } from "lit/directives/unsafe-html.js";
-import { api } from "../api/client.js";
+import { api, isConflict, textEdits } from "../api/client.js";
+import { changes } from "../api/events.js";
 import { renderMarkdown, highlightFile } from "../utils/markdown.js";
 import hljsStyles from "highlight.js/styles/github-dark.css?inline";
 
+// .jsonl files larger than this open as a paged record list
+const RECORDS_MIN_BYTES = 256 * 1024;
+const RECORDS_PAGE = 100;
+const CHUNK_BYTES = 256 * 1024;
+
 export abstract class FileViewer extends LitElement {
   abstract readonly pageTitle: string;
   abstract groups: string[];
@@ -24,6 +30,19 @@ export abstract class FileViewer extends LitElement {
   @state() protected refreshing = false;
   @state() private collapsedDirs: Set<string> = new Set();
   @state() private showDeleteConfirm = false;
+  /** Only part of the file is loaded (large file); editing is disabled. */
+  @state() protected truncated = false;
+  @state() protected sizeBytes = 0;
+  @state() protected records: any[] | null = null;
+  @state() protected recordsTotal = 0;
+  @state() protected loadingMore = false;
+  private nextOffset = 0;
+  /** Version the loaded content was read at; saves are made against it. */
+  private etag = "";
+  @state() protected showHistory = false;
+  @state() protected versions: any[] = [];
+  @state() protected diffText = "";
+  @state() protected diffVersion = "";
 
   static styles = css`
     ${unsafeCSS(hljsStyles)}
@@ -199,6 +218,36 @@ export abstract class FileViewer extends LitElement {
     .btn-cancel { background: transparent; color: var(--text-muted); }
     .btn-cancel:hover { color: var(--text-secondary); }
     .actions { display: flex; gap: 8px; }
+
+    /* Version history */
+    .version {
+      display: flex; align-items: center; gap: 12px; padding: 8px 0;
+      border-bottom: 1px solid var(--border-subtle); font-size: 12.5px;
+    }
+    .version.active { color: var(--text-primary); }
+    .version .when { font-family: var(--font-mono); min-width: 150px; }
+    .version .op { min-width: 64px; color: var(--text-muted); }
+    .version .vsize { flex: 1; color: var(--text-muted); font-family: var(--font-mono); }
+    .version .btn { padding: 3px 10px; font-size: 11.5px; }
+
+    /* Partially loaded files */
+    .partial-bar {
+      display: flex; align-items: center; justify-content: space-between; gap: 12px;
+      margin-top: 14px; padding: 10px 14px; font-size: 12px; color: var(--text-muted);
+      background: var(--bg-surface); border: 1px dashed var(--border-default);
+      border-radius: var(--r-sm);
+    }
+    .record {
+      display: flex; gap: 12px; padding: 6px 0;
+      border-bottom: 1px solid var(--border-subtle); font-size: 12px;
+    }
+    .record .index {
+      flex-shrink: 0; width: 56px; text-align: right; color: var(--text-muted);
+      font-family: var(--font-mono);
+    }
+    .record .body { flex: 1; min-width: 0; }
+    .record pre { margin: 0; white-space: pre-wrap; word-break: break-word; font-family: var(--font-mono); }
+    .record .bad { color: var(--red); }
     .empty { color: var(--text-muted); text-align: center; padding: 48px; font-size: 13px; }
     .error { color: var(--red); margin-bottom: 12px; font-size: 13px; }
 
@@ -250,14 +299,19 @@ export abstract class FileViewer extends LitElement {
     }
   `;
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.load();
+    this.unsubscribe = changes.subscribe(["workspace"], () => this.load());
     window.addEventListener("dashboard-file-navigate", this._onFileNavigate as EventListener);
   }
 
   disconnectedCallback() {
     super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
     window.removeEventListener("dashboard-file-navigate", this._onFileNavigate as EventListener);
     window.dispatchEvent(new CustomEvent("dashboard-file-select", { detail: { path: null } }));
   }
@@ -282,8 +336,7 @@ export abstract class FileViewer extends LitElement {
     await this.load();
     if (this.selectedPath) {
       try {
-        const res = await api.getMemoryFile(this.selectedPath);
-        this.content = res.content;
+        await this.loadFile(this.selectedPath);
       } catch { /* file may have been deleted */ }
     }
     this.refreshing = false;
@@ -302,16 +355,117 @@ export abstract class FileViewer extends LitElement {
   async selectFile(path: string) {
     this.selectedPath = path;
     this.editing = false;
+    this.showHistory = false;
     try {
-      const res = await api.getMemoryFile(path);
-      this.content = res.content;
+      await this.loadFile(path);
     } catch (e: any) {
       this.error = e.message;
     }
     window.dispatchEvent(new CustomEvent("dashboard-file-select", { detail: { path } }));
   }
 
+  /** Load a file's first page: whole, a leading chunk, or the first records. */
+  private async loadFile(path: string) {
+    const file = this.files.find((f: any) => f.path === path);
+    if (path.endsWith(".jsonl") && file && file.sizeBytes > RECORDS_MIN_BYTES) {
+      const res = await api.getMemoryRecords(path, 0, RECORDS_PAGE);
+      this.records = res.records;
+      this.recordsTotal = res.total;
+      this.sizeBytes = res.sizeBytes;
+      this.content = "";
+      this.truncated = !res.eof;
+      return;
+    }
+    const res = await api.getMemoryFile(path);
+    this.etag = res.etag || "";
+    this.records = null;
+    this.content = res.content;
+    this.sizeBytes = res.sizeBytes;
+    this.truncated = !!res.truncated;
+    this.nextOffset = res.nextOffset ?? 0;
+  }
+
+  private async loadMore() {
+    const path = this.selectedPath;
+    this.loadingMore = true;
+    try {
+      if (this.records) {
+        const res = await api.getMemoryRecords(path, this.records.length, RECORDS_PAGE);
+        if (path !== this.selectedPath) return;
+        this.records = [...this.records, ...res.records];
+        this.recordsTotal = res.total;
+        this.truncated = !res.eof;
+      } else {
+        const res = await api.getMemoryFileRange(path, this.nextOffset, CHUNK_BYTES);
+        if (path !== this.selectedPath) return;
+        this.content += res.content;
+        this.nextOffset = res.nextOffset;
+        this.truncated = !res.eof;
+      }
+    } catch (e: any) {
+      this.error = e.message;
+    } finally {
+      this.loadingMore = false;
+    }
+  }
+
+  private async toggleHistory() {
+    this.showHistory = !this.showHistory;
+    this.diffText = "";
+    this.diffVersion = "";
+    if (!this.showHistory) return;
+    try {
+      const res = await api.getFileHistory(this.selectedPath);
+      this.versions = res.versions;
+    } catch (e: any) {
+      this.error = e.message;
+    }
+  }
+
+  private async showDiff(id: string) {
+    try {
+      const res = await api.getVersionDiff(this.selectedPath, id);
+      this.diffVersion = id;
+      this.diffText = res.diff || "（与当前文件相同）";
+    } catch (e: any) {
+      this.error = e.message;
+    }
+  }
+
+  private async restore(id: string) {
+    try {
+      await api.restoreVersion(this.selectedPath, id, this.etag || undefined);
+      this.showHistory = false;
+      await this.loadFile(this.selectedPath);
+      await this.load();
+    } catch (e: any) {
+      this.error = isConflict(e) ? "文件已被其他程序修改，请刷新后重试" : e.message;
+    }
+  }
+
+  private renderHistory() {
+    if (!this.versions.length) return html`<div class="empty">暂无历史版本</div>`;
+    const opLabels: Record<string, string> = {
+      save: "保存", external: "外部修改", restore: "恢复", delete: "删除",
+    };
+    return html`
+      ${this.versions.map((v: any) => html`
+        <div class="version ${v.id === this.diffVersion ? "active" : ""}">
+          <span class="when">${new Date(v.t * 1000).toLocaleString()}</span>
+          <span class="op">${opLabels[v.op] || v.op}</span>
+          <span class="vsize">${this.formatSize(v.size)}</span>
+          <button class="btn btn-edit" @click=${() => this.showDiff(v.id)}>对比</button>
+          <button class="btn btn-save" @click=${() => this.restore(v.id)}>恢复</button>
+        </div>
+      `)}
+      ${this.diffText
+        ? html`<div class="code-preview" style="margin-top:14px">${unsafeHTML(highlightFile(this.diffText, "diff"))}</div>`
+        : ""}
+    `;
+  }
+
   startEdit() {
+    this.showHistory = false;
     this.editContent = this.content;
     this.editing = true;
   }
@@ -345,11 +499,15 @@ export abstract class FileViewer extends LitElement {
   async saveEdit() {
     this.saving = true;
     try {
-      await api.updateMemoryFile(this.selectedPath, this.editContent);
+      const res = this.etag
+        ? await api.patchMemoryFile(this.selectedPath, this.etag, textEdits(this.content, this.editContent))
+        : await api.updateMemoryFile(this.selectedPath, this.editContent);
+      this.etag = res.etag;
       this.content = this.editContent;
       this.editing = false;
+      this.error = "";
     } catch (e: any) {
-      this.error = e.message;
+      this.error = isConflict(e) ? "文件已被其他程序修改，请复制你的修改后刷新重试" : e.message;
     }
     this.saving = false;
   }
@@ -414,7 +572,8 @@ export abstract class FileViewer extends LitElement {
 
   protected formatSize(bytes: number) {
     if (bytes < 1024) return `${bytes}B`;
-    return `${(bytes / 1024).toFixed(1)}K`;
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)}K`;
+    return `${(bytes / 1024 / 1024).toFixed(1)}M`;
   }
 
   private getExt(path: string): string {
@@ -422,7 +581,36 @@ export abstract class FileViewer extends LitElement {
     return dot >= 0 ? path.substring(dot + 1) : "";
   }
 
+  private renderRecords() {
+    return html`${(this.records || []).map((r: any) => html`
+      <div class="record">
+        <span class="index">${r.index + 1}</span>
+        <div class="body">
+          ${r.error
+            ? html`<pre class="bad" title=${r.error}>${r.raw}</pre>`
+            : html`<div class="code-preview">${unsafeHTML(highlightFile(JSON.stringify(r.data, null, 2), "json"))}</div>`}
+        </div>
+      </div>
+    `)}`;
+  }
+
+  private renderPartialBar() {
+    if (!this.truncated) return "";
+    const loaded = this.records
+      ? `已加载 ${this.records.length} / ${this.recordsTotal} 条记录`
+      : `已加载 ${this.formatSize(this.nextOffset)} / ${this.formatSize(this.sizeBytes)}`;
+    return html`
+      <div class="partial-bar">
+        <span>${loaded}（文件较大，仅可查看）</span>
+        <button class="btn btn-edit" @click=${this.loadMore} ?disabled=${this.loadingMore}>
+          ${this.loadingMore ? "加载中..." : "加载更多"}
+        </button>
+      </div>
+    `;
+  }
+
   protected renderContent() {
+    if (this.records) return this.renderRecords();
     const ext = this.getExt(this.selectedPath);
     if (ext === "md") {
       return html`<div class="md-preview">${unsafeHTML(renderMarkdown(this.content))}</div>`;
@@ -503,7 +691,12 @@ export abstract class FileViewer extends LitElement {
                         `
                       : html`
                           <button class="btn btn-delete" @click=${this.confirmDeleteFile}>删除</button>
-                          <button class="btn btn-edit" @click=${this.startEdit}>编辑</button>
+                          <button class="btn btn-cancel" @click=${this.toggleHistory}>
+                            ${this.showHistory ? "返回" : "历史"}
+                          </button>
+                          ${this.truncated || this.records
+                            ? ""
+                            : html`<button class="btn btn-edit" @click=${this.startEdit}>编辑</button>`}
                         `}
                   </div>
                 </div>
@@ -515,7 +708,9 @@ export abstract class FileViewer extends LitElement {
                         @input=${(e: any) => (this.editContent = e.target.value)}
                         @keydown=${this.handleTab}
                       ></textarea>`
-                    : this.renderContent()}
+                    : this.showHistory
+                    ? this.renderHistory()
+                    : html`${this.renderContent()}${this.renderPartialBar()}`}
                 </div>
               `}
         </div>
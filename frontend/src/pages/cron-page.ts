@@ -1,6 +1,7 @@
 import { LitElement, html, css } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { api } from "../api/client.js";
+import { changes } from "../api/events.js";
 
 interface FormData {
   name: string;
@@ -221,9 +222,18 @@ export class CronPage extends LitElement {
     }
   `;
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.load();
+    this.unsubscribe = changes.subscribe(["cron"], () => this.load());
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
   }
 
   async refresh() {
@@ -271,7 +281,7 @@ export class CronPage extends LitElement {
   async runJob(job: any) {
     try {
       const res = await api.runCronJob(job.id);
-      alert(res.note || "任务已触发");
+      alert(res.runId ? `任务已加入运行队列 (${res.runId})` : res.note || "任务已触发");
       await this.load();
     } catch (e: any) { this.error = e.message; }
   }
@@ -1,6 +1,10 @@
 import { LitElement, html, css } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { api } from "../api/client.js";
+import { socket, type ChannelHandle } from "../api/socket.js";
+import { changes } from "../api/events.js";
+
+const MAX_LINES = 5000;
 
 @customElement("logs-page")
 export class LogsPage extends LitElement {
@@ -11,6 +15,7 @@ export class LogsPage extends LitElement {
   @state() private loading = false;
   @state() private refreshing = false;
   @state() private error = "";
+  private follow: ChannelHandle | null = null;
 
   static styles = css`
     :host { display: block; }
@@ -95,9 +100,13 @@ export class LogsPage extends LitElement {
     }
   `;
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.loadFiles();
+    // Sizes and new log files; the open log itself is followed over the socket
+    this.unsubscribe = changes.subscribe(["logs"], () => this.loadFiles());
   }
 
   private async refresh() {
@@ -123,6 +132,37 @@ export class LogsPage extends LitElement {
   private async loadLog(name: string) {
     this.active = name;
     this.loading = true;
+    this.follow?.close();
+    this.follow = null;
+    try {
+      // Follow the log live over the shared socket; fall back to a one-off read
+      const follow = await socket.open("logs", { name, lines: 500 }, (event, data) => {
+        if (event !== "lines" || name !== this.active) return;
+        const lines = data.reset ? data.lines : [...this.lines, ...data.lines];
+        this.lines = lines.length > MAX_LINES ? lines.slice(-MAX_LINES) : lines;
+        this.totalSize = data.totalSize || 0;
+        if (this.loading) {
+          this.loading = false;
+          this.scrollToEnd(true);
+        } else {
+          this.scrollToEnd(false);
+        }
+      });
+      if (!this.isConnected || name !== this.active) {
+        follow.close();
+      } else {
+        this.follow?.close();
+        this.follow = follow;
+      }
+    } catch {
+      await this.fetchLog(name);
+    }
+    window.dispatchEvent(new CustomEvent("dashboard-file-select", {
+      detail: { path: `logs/${name}` },
+    }));
+  }
+
+  private async fetchLog(name: string) {
     try {
       const res = await api.getLogFile(name);
       this.lines = res.lines || [];
@@ -132,18 +172,24 @@ export class LogsPage extends LitElement {
       this.lines = [];
     } finally {
       this.loading = false;
-      await this.updateComplete;
-      // Auto-scroll to bottom
-      const el = this.shadowRoot?.querySelector(".log-content");
-      if (el) el.scrollTop = el.scrollHeight;
-      window.dispatchEvent(new CustomEvent("dashboard-file-select", {
-        detail: { path: `logs/${name}` },
-      }));
+      this.scrollToEnd(true);
     }
   }
 
+  /** Keep the view pinned to the bottom (always on first load, else only if already there). */
+  private async scrollToEnd(force: boolean) {
+    const el = this.shadowRoot?.querySelector(".log-content");
+    const atEnd = !el || el.scrollHeight - el.scrollTop - el.clientHeight < 40;
+    await this.updateComplete;
+    if (el && (force || atEnd)) el.scrollTop = el.scrollHeight;
+  }
+
   disconnectedCallback() {
     super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
+    this.follow?.close();
+    this.follow = null;
     window.dispatchEvent(new CustomEvent("dashboard-file-select", {
       detail: { path: null },
     }));
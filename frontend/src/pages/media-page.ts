@@ -1,6 +1,7 @@
 import { LitElement, html, css } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { api } from "../api/client.js";
+import { changes } from "../api/events.js";
 
 @customElement("media-page")
 export class MediaPage extends LitElement {
@@ -197,9 +198,18 @@ export class MediaPage extends LitElement {
   @state() private showDeleteConfirm = false;
   @state() private collapsedDirs = new Set<string>();
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.load();
+    this.unsubscribe = changes.subscribe(["media"], () => this.load());
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
   }
 
   async refresh() {
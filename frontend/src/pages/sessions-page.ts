@@ -2,6 +2,7 @@ import { LitElement, html, css, unsafeCSS } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { unsafeHTML } from "lit/directives/unsafe-html.js";
 import { api } from "../api/client.js";
+import { changes } from "../api/events.js";
 import { renderMarkdown } from "../utils/markdown.js";
 import hljsStyles from "highlight.js/styles/github-dark.css?inline";
 
@@ -315,9 +316,18 @@ export class SessionsPage extends LitElement {
     }
   `;
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.loadSessions();
+    this.unsubscribe = changes.subscribe(["sessions"], () => this.loadSessions());
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
   }
 
   async refresh() {
@@ -1,7 +1,8 @@
 import { LitElement, html, css, unsafeCSS } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { unsafeHTML } from "lit/directives/unsafe-html.js";
-import { api } from "../api/client.js";
+import { api, isConflict, textEdits } from "../api/client.js";
+import { changes } from "../api/events.js";
 import { renderMarkdown } from "../utils/markdown.js";
 import hljsStyles from "highlight.js/styles/github-dark.css?inline";
 
@@ -11,6 +12,7 @@ export class SkillsPage extends LitElement {
   @state() private selected: any = null;
   @state() private fileContent = "";
   @state() private activeFile = "";
+  private fileEtag = "";
   @state() private editing = false;
   @state() private editContent = "";
   @state() private error = "";
@@ -18,6 +20,7 @@ export class SkillsPage extends LitElement {
   @state() private saving = false;
   @state() private mobileShowDetail = false;
   @state() private showDeleteConfirm = false;
+  @state() private transferring = false;
 
   static styles = css`
     ${unsafeCSS(hljsStyles)}
@@ -40,6 +43,14 @@ export class SkillsPage extends LitElement {
     }
     .refresh-btn:hover { color: var(--green); border-color: var(--green); background: var(--green-glow); }
     .refresh-btn.spinning { animation: spin 0.8s linear infinite; }
+    .header-actions { margin-left: auto; display: flex; gap: 8px; }
+    .header-actions button {
+      padding: 7px 14px; border-radius: var(--r-sm); font-size: 12.5px;
+      background: var(--bg-card); border: 1px solid var(--border-default);
+      color: var(--text-secondary); cursor: pointer; font-family: var(--font-sans);
+    }
+    .header-actions button:hover { color: var(--green); border-color: var(--green); }
+    .header-actions button:disabled { opacity: 0.5; cursor: default; }
     @keyframes spin { to { transform: rotate(360deg); } }
 
     .layout { display: flex; gap: 18px; height: calc(100vh - 110px); }
@@ -231,9 +242,15 @@ export class SkillsPage extends LitElement {
     }
   `;
 
+  private unsubscribe: (() => void) | null = null;
+
   connectedCallback() {
     super.connectedCallback();
     this.load();
+    this.unsubscribe = changes.subscribe(["workspace"], (events) => {
+      // Empty: the feed lost track (resync); otherwise only skills/ matters here
+      if (!events.length || events.some((e) => e.type === "rescan" || e.path.startsWith("skills/"))) this.load();
+    });
   }
 
   async refresh() {
@@ -251,6 +268,46 @@ export class SkillsPage extends LitElement {
     }
   }
 
+  private async exportSkills() {
+    this.transferring = true;
+    try {
+      const blob = await api.exportSkills();
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = "skills.zip";
+      a.click();
+      URL.revokeObjectURL(url);
+    } catch (e: any) {
+      this.error = e.message;
+    }
+    this.transferring = false;
+  }
+
+  private async importSkills(e: Event) {
+    const input = e.target as HTMLInputElement;
+    const file = input.files?.[0];
+    input.value = "";
+    if (!file) return;
+    this.transferring = true;
+    try {
+      try {
+        await api.importSkills(file);
+      } catch (err: any) {
+        if (!err.message.startsWith("409:")) throw err;
+        const names = JSON.parse(err.message.slice(5)).error;
+        if (!confirm(`${names}，是否覆盖？`)) return;
+        await api.importSkills(file, true);
+      }
+      this.error = "";
+      await this.load();
+    } catch (err: any) {
+      this.error = err.message;
+    } finally {
+      this.transferring = false;
+    }
+  }
+
   private goBackToList() {
     this.mobileShowDetail = false;
   }
@@ -274,6 +331,7 @@ export class SkillsPage extends LitElement {
     try {
       const res = await api.getSkillFile(skillId, filename);
       this.fileContent = res.content;
+      this.fileEtag = res.etag || "";
       window.dispatchEvent(new CustomEvent("dashboard-file-select", {
         detail: { path: `skills/${skillId}/${filename}` },
       }));
@@ -284,6 +342,8 @@ export class SkillsPage extends LitElement {
 
   disconnectedCallback() {
     super.disconnectedCallback();
+    this.unsubscribe?.();
+    this.unsubscribe = null;
     window.dispatchEvent(new CustomEvent("dashboard-file-select", {
       detail: { path: null },
     }));
@@ -300,11 +360,16 @@ export class SkillsPage extends LitElement {
     if (!this.selected || !this.activeFile) return;
     this.saving = true;
     try {
-      await api.updateSkillFile(this.selected.id, this.activeFile, this.editContent);
+      const { id } = this.selected;
+      const res = this.fileEtag
+        ? await api.patchSkillFile(id, this.activeFile, this.fileEtag, textEdits(this.fileContent, this.editContent))
+        : await api.updateSkillFile(id, this.activeFile, this.editContent);
+      this.fileEtag = res.etag;
       this.fileContent = this.editContent;
       this.editing = false;
+      this.error = "";
     } catch (e: any) {
-      this.error = e.message;
+      this.error = isConflict(e) ? "文件已被其他程序修改，请复制你的修改后刷新重试" : e.message;
     }
     this.saving = false;
   }
@@ -345,6 +410,12 @@ export class SkillsPage extends LitElement {
       <div class="page-header">
         <h1>技能</h1>
         <button class="refresh-btn ${this.refreshing ? "spinning" : ""}" @click=${this.refresh} title="刷新">&#x21bb;</button>
+        <div class="header-actions">
+          <input id="skill-import" type="file" accept=".zip,application/zip" hidden @change=${this.importSkills} />
+          <button ?disabled=${this.transferring}
+            @click=${() => (this.renderRoot.querySelector("#skill-import") as HTMLInputElement).click()}>导入</button>
+          <button ?disabled=${this.transferring} @click=${this.exportSkills}>导出</button>
+        </div>
       </div>
       ${this.error ? html`<div class="error">${this.error}</div>` : ""}
       <div class="layout">
@@ -1,18 +1,22 @@
 import { LitElement, html, css, unsafeCSS } from "lit";
 import { customElement, state } from "lit/decorators.js";
 import { unsafeHTML } from "lit/directives/unsafe-html.js";
-import { api } from "../api/client.js";
+import { api, mergePatchDiff } from "../api/client.js";
+import { socket, type ChannelHandle } from "../api/socket.js";
 import { highlightFile } from "../utils/markdown.js";
 import hljsStyles from "highlight.js/styles/github-dark.css?inline";
 
 @customElement("status-page")
 export class StatusPage extends LitElement {
   @state() private data: any = null;
+  private live: ChannelHandle | null = null;
   @state() private config: any = null;
   @state() private error = "";
   @state() private refreshing = false;
   @state() private showConfigModal = false;
   @state() private configRaw = "";
+  private configOriginal: any = null;
+  private configEtag = "";
   @state() private configSaving = false;
   @state() private configError = "";
 
@@ -251,7 +255,29 @@ export class StatusPage extends LitElement {
 
   connectedCallback() {
     super.connectedCallback();
-    this.load();
+    this.load().then(() => this.subscribe());
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this.live?.close();
+    this.live = null;
+  }
+
+  /** Receive gateway/model/channel/cron changes pushed over the shared socket. */
+  private async subscribe() {
+    if (this.live || !this.isConnected) return;
+    try {
+      this.live = await socket.open("status", { interval: 5 }, (event, data) => {
+        if (event === "status" && this.data) this.data = { ...this.data, ...data };
+      });
+      if (!this.isConnected) {
+        this.live.close();
+        this.live = null;
+      }
+    } catch {
+      // no socket: the refresh button still works
+    }
   }
 
   async refresh() {
@@ -284,7 +310,9 @@ export class StatusPage extends LitElement {
 
   private async openConfigEditor() {
     try {
-      const raw = await api.getConfigRaw();
+      const { data: raw, etag } = await api.getConfigRawVersioned();
+      this.configOriginal = raw;
+      this.configEtag = etag;
       this.configRaw = JSON.stringify(raw, null, 2);
       this.configError = "";
       this.showConfigModal = true;
@@ -297,7 +325,18 @@ export class StatusPage extends LitElement {
     this.configSaving = true;
     this.configError = "";
     try {
-      await api.updateConfig(this.configRaw);
+      // Send only what changed; the ETag makes the server reject stale edits (412)
+      let patch: any = null;
+      try {
+        patch = mergePatchDiff(this.configOriginal, JSON.parse(this.configRaw));
+      } catch {
+        // invalid JSON: let the server report it via the full PUT
+      }
+      if (patch && this.configEtag) {
+        if (Object.keys(patch).length) await api.patchConfig(patch, this.configEtag);
+      } else {
+        await api.updateConfig(this.configRaw, this.configEtag || undefined);
+      }
       this.showConfigModal = false;
       // Reload sanitized config for display
       this.config = await api.getConfig();
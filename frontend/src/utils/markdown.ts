@@ -10,6 +10,7 @@ import typescript from "highlight.js/lib/languages/typescript";
 import yaml from "highlight.js/lib/languages/yaml";
 import xml from "highlight.js/lib/languages/xml";
 import css from "highlight.js/lib/languages/css";
+import diff from "highlight.js/lib/languages/diff";
 
 hljs.registerLanguage("json", json);
 hljs.registerLanguage("markdown", markdown);
@@ -27,6 +28,7 @@ hljs.registerLanguage("yml", yaml);
 hljs.registerLanguage("xml", xml);
 hljs.registerLanguage("html", xml);
 hljs.registerLanguage("css", css);
+hljs.registerLanguage("diff", diff);
 
 const marked = new Marked({
   renderer: {
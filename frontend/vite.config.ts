@@ -1,10 +1,51 @@
-import { defineConfig } from "vite";
+import { readdirSync, readFileSync, statSync, writeFileSync } from "node:fs";
+import { join, resolve } from "node:path";
+import { brotliCompressSync, constants, gzipSync } from "node:zlib";
+import { defineConfig, type Plugin } from "vite";
+
+const PRECOMPRESS = /\.(js|mjs|css|html|svg|json|txt|map)$/;
+const PRECOMPRESS_MIN_BYTES = 1024;
+
+/** Write .br and .gz next to each text asset; the server sends whichever the browser accepts. */
+function precompress(): Plugin {
+  let outDir = "";
+  const walk = (dir: string): string[] =>
+    readdirSync(dir, { withFileTypes: true }).flatMap((e) =>
+      e.isDirectory() ? walk(join(dir, e.name)) : [join(dir, e.name)],
+    );
+  return {
+    name: "precompress",
+    apply: "build",
+    configResolved(config) {
+      outDir = resolve(config.root, config.build.outDir);
+    },
+    closeBundle() {
+      for (const file of walk(outDir)) {
+        if (!PRECOMPRESS.test(file) || statSync(file).size < PRECOMPRESS_MIN_BYTES) continue;
+        const data = readFileSync(file);
+        const variants: [string, Buffer][] = [
+          [".br", brotliCompressSync(data, {
+            params: {
+              [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+              [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+            },
+          })],
+          [".gz", gzipSync(data, { level: 9 })],
+        ];
+        for (const [ext, packed] of variants) {
+          if (packed.length < data.length) writeFileSync(file + ext, packed);
+        }
+      }
+    },
+  };
+}
 
 export default defineConfig({
   build: {
     outDir: "../static",
     emptyOutDir: true,
   },
+  plugins: [precompress()],
   server: {
     proxy: {
       "/api": "http://127.0.0.1:18791",
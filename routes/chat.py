@@ -1,27 +1,38 @@
 """Chat endpoint — streams nanobot agent responses via SSE."""
 
 import asyncio
-import json
+import codecs
 import os
 import re
 import secrets
+import signal
+from collections import deque
+from functools import partial
 
 from aiohttp import web
 
-from dashboard.config import NANOBOT_ROOT, SESSIONS_DIR, WORKSPACE_DIR
+from dashboard.config import (
+    CHAT_CONCURRENCY, CHAT_QUEUE, CHAT_WORKER_CMD, CHAT_WORKER_MAX_REQUESTS,
+    CHAT_WORKER_MAX_RSS_MB, CHAT_WORKERS,
+    NANOBOT_ROOT, SESSIONS_DIR, WORKSPACE_DIR,
+)
+from dashboard.utils import cluster
+from dashboard.utils.agent_pool import AgentPool, PoolUnavailable
+from dashboard.utils.chat_limiter import ChatBusy, ChatLimiter, ChatTicket
+from dashboard.utils.chat_stream import StdoutDemux, relay
+from dashboard.utils.codec import iter_jsonl, json_response
+from dashboard.utils.executor import SEARCH, run_blocking
+from dashboard.utils.sse import prepare_sse, send_event
 
+REPLY_TIMEOUT = 180  # seconds without output before a chat is abandoned
+DISCONNECT_POLL = 0.5
 
-async def chat_send(request: web.Request) -> web.StreamResponse:
-    """POST /api/chat — send a message, stream response via SSE."""
-    body = await request.json()
-    message = body.get("message", "").strip()
-    if not message:
-        raise web.HTTPBadRequest(text="message is required")
+pool_key = web.AppKey("chat_pool", AgentPool)
+limiter_key = web.AppKey("chat_limiter", ChatLimiter)
 
-    session_id = body.get("session_id") or f"dashboard_chat_{secrets.token_hex(4)}"
 
-    # Inject dashboard context if provided
-    context = body.get("context")
+def with_context(message: str, context) -> str:
+    """Inject dashboard context (current page/file) if provided."""
     if context and isinstance(context, dict):
         page = context.get("page", "")
         file_path = context.get("file", "")
@@ -36,23 +47,102 @@ async def chat_send(request: web.Request) -> web.StreamResponse:
                 f"当前文件: {abs_path}\n\n"
                 f"{message}"
             )
+    return message
+
+
+async def chat_send(request: web.Request) -> web.StreamResponse:
+    """POST /api/chat — send a message, stream response via SSE."""
+    body = await request.json()
+    message = body.get("message", "").strip()
+    if not message:
+        raise web.HTTPBadRequest(text="message is required")
+
+    session_id = body.get("session_id") or f"dashboard_chat_{secrets.token_hex(4)}"
+
+    message = with_context(message, body.get("context"))
+
+    limiter = request.app[limiter_key]
+    try:
+        ticket = limiter.enqueue(session_id)
+    except ChatBusy as e:
+        return json_response({"error": str(e)}, status=429, headers={"Retry-After": "5"})
+
+    # Until run_admitted starts, the ticket is ours to give back (release is idempotent)
+    try:
+        resp = await prepare_sse(request)
+    except BaseException:
+        limiter.release(ticket)
+        raise
+    emit = partial(send_event, resp)
+    chat = asyncio.create_task(run_admitted(request.app, ticket, message, emit))
+    disconnect = asyncio.create_task(_wait_disconnect(request))
+    try:
+        await asyncio.wait({chat, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not chat.done():
+            # The browser went away: stop the agent now rather than at the timeout
+            chat.cancel()
+            await asyncio.gather(chat, return_exceptions=True)
+        limiter.release(ticket)     # also covers a task cancelled before it ever ran
+
+    try:
+        if chat.cancelled():
+            await emit("error", {"message": "对话已取消", "cancelled": True})
+        elif chat.exception() is not None:
+            await emit("error", {"message": str(chat.exception())})
+        await resp.write_eof()
+    except Exception:
+        pass
+    return resp
+
+
+async def _wait_disconnect(request: web.Request):
+    """Return once the client has disconnected (aiohttp doesn't cancel the handler)."""
+    while request.transport is not None and not request.transport.is_closing():
+        await asyncio.sleep(DISCONNECT_POLL)
+
+
+async def run_admitted(app: web.Application, ticket: ChatTicket, message: str, emit):
+    """Wait for the ticket to be admitted (emitting `queued` positions), then run the turn."""
+    limiter = app[limiter_key]
+    ticket.task = asyncio.current_task()
+    try:
+        if ticket.state == "queued":
+            await limiter.wait(ticket, lambda position: emit("queued", {"position": position}))
+        await run_chat(app, message, ticket.session_id, emit)
+    finally:
+        limiter.release(ticket)
 
-    resp = web.StreamResponse(
-        status=200,
-        reason="OK",
-        headers={
-            "Content-Type": "text/event-stream",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
-    await resp.prepare(request)
-
-    async def send_event(event: str, data: dict):
-        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
-        await resp.write(payload.encode("utf-8"))
 
+async def run_chat(app: web.Application, message: str, session_id: str, emit):
+    """Run one chat turn, streaming progress/delta/done/error through `emit(event, data)`.
+
+    Uses the worker pool when it is up, else a one-off `nanobot agent` process.
+    """
+    pool = app.get(pool_key)
+    if pool is not None and pool.available:
+        try:
+            await relay(_pool_events(pool, message, session_id), emit, session_id, REPLY_TIMEOUT)
+            return
+        except PoolUnavailable:
+            pass  # fall back to a one-off CLI process below
+    await relay(_cli_events(message, session_id), emit, session_id, REPLY_TIMEOUT)
+
+
+async def _pool_events(pool: AgentPool, message: str, session_id: str):
+    async for ev in pool.chat(message, session_id):
+        kind = ev.get("type")
+        if kind in ("progress", "delta"):
+            yield kind, ev.get("text", "")
+        elif kind == "done":
+            yield "done", ev.get("response")
+        elif kind == "error":
+            yield "error", ev.get("message", "worker error")
+
+
+async def _cli_events(message: str, session_id: str):
+    """Stream a `nanobot agent` process's stdout as it is written."""
     env = {**os.environ, "PYTHONUNBUFFERED": "1"}
     try:
         proc = await asyncio.create_subprocess_exec(
@@ -60,52 +150,78 @@ async def chat_send(request: web.Request) -> web.StreamResponse:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             env=env,
+            start_new_session=True,
         )
     except FileNotFoundError:
-        await send_event("error", {"message": "nanobot CLI not found"})
-        await resp.write_eof()
-        return resp
+        yield "error", "nanobot CLI not found"
+        return
+
+    stderr_tail: deque[str] = deque(maxlen=5)
+
+    async def drain_stderr():
+        async for line in proc.stderr:
+            stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
 
-    response_lines: list[str] = []
+    drain = asyncio.create_task(drain_stderr())
+    demux = StdoutDemux()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    replied = False
     try:
-        async def read_stream():
-            assert proc.stdout is not None
-            while True:
-                line = await asyncio.wait_for(proc.stdout.readline(), timeout=180)
-                if not line:
-                    break
-                text = line.decode("utf-8", errors="replace").rstrip("\n")
-                # Skip the nanobot banner line
-                if text.startswith("🐈"):
-                    continue
-                if text.startswith("↳"):
-                    await send_event("progress", {"text": text.lstrip("↳ ")})
-                else:
-                    response_lines.append(text)
-
-        await read_stream()
+        while True:
+            chunk = await proc.stdout.read(4096)
+            if not chunk:
+                break
+            for ev in demux.feed(decoder.decode(chunk)):
+                replied = replied or ev[0] == "delta"
+                yield ev
+        for ev in demux.feed(decoder.decode(b"", final=True)) + demux.close():
+            replied = replied or ev[0] == "delta"
+            yield ev
         await proc.wait()
+        await drain
+        if proc.returncode and not replied:
+            yield "error", stderr_tail[-1] if stderr_tail else f"nanobot exited with code {proc.returncode}"
+        else:
+            yield "done", None
+    finally:
+        if proc.returncode is None:
+            # Kill the whole group: the agent may have started tool subprocesses
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        drain.cancel()
 
-        full_response = "\n".join(response_lines).strip()
-        await send_event("done", {
-            "session_id": session_id,
-            "response": full_response,
-        })
-    except asyncio.TimeoutError:
-        proc.kill()
-        await send_event("error", {"message": "响应超时 (180s)"})
-    except Exception as e:
-        try:
-            proc.kill()
-        except ProcessLookupError:
-            pass
-        await send_event("error", {"message": str(e)})
 
+def _read_history(filepath) -> list[dict]:
+    messages = []
     try:
-        await resp.write_eof()
-    except Exception:
-        pass
-    return resp
+        data = filepath.read_bytes()
+    except FileNotFoundError:
+        return messages
+    for obj in iter_jsonl(data):
+        # Skip metadata line
+        if not isinstance(obj, dict) or obj.get("_type") == "metadata":
+            continue
+        role = obj.get("role")
+        if role not in ("user", "assistant"):
+            continue
+        content = obj.get("content")
+        if content is None:
+            continue
+        # Strip runtime context prefix from user messages
+        if role == "user" and isinstance(content, str):
+            content = re.sub(r"\[Current Time:[^\]]*\]\n?", "", content)
+            content = re.sub(r"\[Runtime Context\]\n(?:[^\n]*\n?)*", "", content)
+            content = re.sub(r"\[Dashboard Context\]\n(?:[^\n]*\n)*\n?", "", content)
+            content = content.strip()
+        messages.append({
+            "role": role,
+            "content": content,
+            "timestamp": obj.get("timestamp"),
+        })
+    return messages
 
 
 async def chat_history(request: web.Request) -> web.Response:
@@ -113,51 +229,59 @@ async def chat_history(request: web.Request) -> web.Response:
     session_id = request.match_info["session_id"]
     # Session files use underscore-separated names
     filename = session_id.replace(":", "_") + ".jsonl"
-    filepath = SESSIONS_DIR / filename
-    if not filepath.exists():
-        return web.json_response({"messages": []})
-
-    messages = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            # Skip metadata line
-            if obj.get("_type") == "metadata":
-                continue
-            role = obj.get("role")
-            if role not in ("user", "assistant"):
-                continue
-            content = obj.get("content")
-            if content is None:
-                continue
-            # Strip runtime context prefix from user messages
-            if role == "user" and isinstance(content, str):
-                content = re.sub(r"\[Current Time:[^\]]*\]\n?", "", content)
-                content = re.sub(r"\[Runtime Context\]\n(?:[^\n]*\n?)*", "", content)
-                content = re.sub(r"\[Dashboard Context\]\n(?:[^\n]*\n)*\n?", "", content)
-                content = content.strip()
-            messages.append({
-                "role": role,
-                "content": content,
-                "timestamp": obj.get("timestamp"),
-            })
-
-    return web.json_response({"messages": messages})
+    messages = await run_blocking(SEARCH, _read_history, SESSIONS_DIR / filename)
+    return json_response({"messages": messages})
 
 
 async def chat_new(request: web.Request) -> web.Response:
     """POST /api/chat/new — generate a new session ID."""
     session_id = f"dashboard_chat_{secrets.token_hex(4)}"
-    return web.json_response({"session_id": session_id})
+    return json_response({"session_id": session_id})
+
+
+async def chat_cancel(request: web.Request) -> web.Response:
+    """DELETE /api/chat/{session_id}/active — cancel the session's running and queued chats."""
+    session_id = request.match_info["session_id"]
+    cancelled = request.app[limiter_key].cancel_session(session_id)
+    if not cancelled:
+        raise web.HTTPNotFound(text="no active chat for this session")
+    return json_response({"cancelled": cancelled})
+
+
+async def chat_pool_stats(request: web.Request) -> web.Response:
+    """GET /api/chat/pool — worker pool and admission queue state."""
+    pool = request.app.get(pool_key)
+    stats = pool.stats() if pool is not None else {"size": 0, "available": False, "workers": []}
+    stats["admission"] = request.app[limiter_key].stats()
+    return json_response(stats)
+
+
+async def _start_pool(app: web.Application):
+    pool = app.get(pool_key)
+    # Other workers forward chat to the primary and never use their pool
+    if pool is not None and cluster.is_primary():
+        await pool.start()
+
+
+async def _stop_pool(app: web.Application):
+    pool = app.get(pool_key)
+    if pool is not None:
+        await pool.close()
 
 
 def setup(app: web.Application):
+    app[limiter_key] = ChatLimiter(CHAT_CONCURRENCY, CHAT_QUEUE)
+    if CHAT_WORKERS > 0:
+        app[pool_key] = AgentPool(
+            CHAT_WORKER_CMD, CHAT_WORKERS,
+            max_requests=CHAT_WORKER_MAX_REQUESTS,
+            max_rss_mb=CHAT_WORKER_MAX_RSS_MB,
+        )
+    app.on_startup.append(_start_pool)
+    app.on_cleanup.append(_stop_pool)
+
     app.router.add_post("/api/chat", chat_send)
+    app.router.add_get("/api/chat/pool", chat_pool_stats)
     app.router.add_get("/api/chat/{session_id}/history", chat_history)
+    app.router.add_delete("/api/chat/{session_id}/active", chat_cancel)
     app.router.add_post("/api/chat/new", chat_new)
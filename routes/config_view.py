@@ -1,43 +1,130 @@
-"""Configuration viewer endpoints."""
+"""Configuration viewer endpoints.
 
-import json
+Writes are guarded by an ETag derived from the cached config.json version
+(mtime_ns, size, inode): a client that read an older version gets 412
+instead of silently overwriting a gateway or second-tab change.
+"""
+
+import os
+import threading
 
 from aiohttp import web
 
-from dashboard.config import NANOBOT_ROOT
-from dashboard.utils.nanobot import read_config
+from dashboard.config import CONFIG_FILE
+from dashboard.utils.codec import json_response, loads
+from dashboard.utils.executor import FS, run_blocking
+from dashboard.utils.filecache import CachedFile, file_cache, thaw
+from dashboard.utils.jsonpatch import PatchError, apply_json_patch, apply_merge_patch
 from dashboard.utils.sanitize import sanitize_config
 
+JSON_PATCH_TYPE = "application/json-patch+json"
+MERGE_PATCH_TYPE = "application/merge-patch+json"
+
+_write_lock = threading.Lock()
+
+
+def _load() -> CachedFile:
+    return file_cache.get(CONFIG_FILE, {})
+
+
+def _etag_matches(header: str, entry: CachedFile) -> bool:
+    """Evaluate an If-Match header against the current config version."""
+    tags = [t.strip() for t in header.split(",")]
+    if "*" in tags:
+        return entry.exists
+    return any(t.removeprefix("W/") == entry.etag for t in tags)
+
+
+def _write_if_unchanged(entry: CachedFile, config: dict) -> CachedFile:
+    """Atomically replace config.json unless it changed since `entry` was read.
+
+    Blocking (run it in the FS pool). Writes are serialized, so within this
+    process the check-and-write cannot interleave with another request.
+    """
+    with _write_lock:
+        try:
+            st = os.stat(CONFIG_FILE)
+            current = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            current = None
+        if current != entry.version:
+            raise web.HTTPPreconditionFailed(text="config.json changed on disk; reload and retry")
+        return file_cache.write_json(CONFIG_FILE, config)
+
 
 async def get_config(request: web.Request) -> web.Response:
-    config = read_config()
-    return web.json_response(sanitize_config(config))
+    entry = await run_blocking(FS, _load)
+    return json_response(sanitize_config(entry.data), headers={"ETag": entry.etag})
 
 
 async def get_config_raw(request: web.Request) -> web.Response:
     """Return raw config.json without sanitization (for editing)."""
-    config = read_config()
-    return web.json_response(config)
+    entry = await run_blocking(FS, _load)
+    return json_response(entry.data, headers={"ETag": entry.etag})
 
 
 async def put_config(request: web.Request) -> web.Response:
-    """Write config.json."""
-    body = await request.json()
+    """Write config.json. Honors If-Match when the client sends one."""
+    body = await request.json(loads=loads)
     config_text = body.get("content", "")
     # Validate JSON
     try:
-        parsed = json.loads(config_text)
-    except json.JSONDecodeError as e:
-        return web.json_response({"error": f"Invalid JSON: {e}"}, status=400)
+        parsed = loads(config_text)
+    except ValueError as e:
+        return json_response({"error": f"Invalid JSON: {e}"}, status=400)
 
-    config_file = NANOBOT_ROOT / "config.json"
-    config_file.write_text(
-        json.dumps(parsed, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+    entry = await run_blocking(FS, _load)
+    if_match = request.headers.get("If-Match")
+    if if_match is not None and not _etag_matches(if_match, entry):
+        raise web.HTTPPreconditionFailed(text="config.json changed; reload and retry")
+
+    new = await run_blocking(FS, _write_if_unchanged, entry, parsed)
+    return json_response({"ok": True, "etag": new.etag}, headers={"ETag": new.etag})
+
+
+async def patch_config(request: web.Request) -> web.Response:
+    """PATCH /api/config — apply a JSON Patch or merge patch; requires If-Match.
+
+    Content-Type selects the format: application/json-patch+json (RFC 6902)
+    or application/merge-patch+json (RFC 7396). Plain application/json is
+    treated as a JSON Patch if the body is an array, else as a merge patch.
+    """
+    if_match = request.headers.get("If-Match")
+    if if_match is None:
+        raise web.HTTPPreconditionRequired(text="If-Match header is required")
+
+    try:
+        patch = await request.json(loads=loads)
+    except ValueError as e:
+        return json_response({"error": f"Invalid JSON: {e}"}, status=400)
+
+    entry = await run_blocking(FS, _load)
+    if not _etag_matches(if_match, entry):
+        raise web.HTTPPreconditionFailed(
+            text="config.json changed; reload and retry",
+            headers={"ETag": entry.etag},
+        )
+
+    content_type = request.content_type
+    use_json_patch = content_type == JSON_PATCH_TYPE or (
+        content_type != MERGE_PATCH_TYPE and isinstance(patch, list)
     )
-    return web.json_response({"ok": True})
+    try:
+        if use_json_patch:
+            config = apply_json_patch(thaw(entry.data), patch)
+        else:
+            config = apply_merge_patch(thaw(entry.data), patch)
+    except PatchError as e:
+        return json_response({"error": str(e)}, status=422)
+    if not isinstance(config, dict):
+        return json_response({"error": "config must remain a JSON object"}, status=422)
+
+    new = await run_blocking(FS, _write_if_unchanged, entry, config)
+    return json_response({"ok": True, "etag": new.etag}, headers={"ETag": new.etag})
 
 
 def setup(app: web.Application):
     app.router.add_get("/api/config", get_config)
     app.router.add_get("/api/config/raw", get_config_raw)
     app.router.add_put("/api/config", put_config)
+    app.router.add_patch("/api/config", patch_config)
@@ -1,45 +1,63 @@
 """Cron job management endpoints."""
 
-import asyncio
-import fcntl
-import json
+import math
 import secrets
 import time
 
 from aiohttp import web
 
-from dashboard.config import CRON_JOBS_FILE
-from dashboard.utils.nanobot import read_cron_jobs, write_cron_jobs
+from dashboard.config import CRON_RUN_CONCURRENCY, CRON_RUN_HISTORY
+from dashboard.utils.codec import json_response
+from dashboard.utils.cron_runner import CronRunner
+from dashboard.utils.cron_store import cron_store
+from dashboard.utils.cronexpr import CronError, compile_cron, get_zone, next_run_ms, schedule_fires
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import FS, SEARCH, run_blocking
+from dashboard.utils.sse import prepare_sse, send_event, wants_sse
 
+runner_key = web.AppKey("cron_runner", CronRunner)
 
-def _lock_and_write(data: dict):
-    """Write cron jobs with file locking."""
-    CRON_JOBS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(CRON_JOBS_FILE, "w") as f:
-        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-        try:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        finally:
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+TIMELINE_MAX_HOURS = 7 * 24
+TIMELINE_MAX_FIRES = 10_080  # per job: every minute for a week
+TIMELINE_MAX_TOTAL_FIRES = 100_000  # across all jobs in one timeline
 
 
-async def list_jobs(request: web.Request) -> web.Response:
-    data = read_cron_jobs()
-    return web.json_response(data)
+def _validate_schedule(expr: str, tz: str | None):
+    if not isinstance(expr, str) or not isinstance(tz, (str, type(None))):
+        raise web.HTTPBadRequest(text="Invalid schedule: expression and tz must be strings")
+    try:
+        compile_cron(expr)
+        get_zone(tz)
+    except CronError as e:
+        raise web.HTTPBadRequest(text=f"Invalid schedule: {e}")
 
 
-async def create_job(request: web.Request) -> web.Response:
-    body = await request.json()
+def _refresh_next_run(job: dict):
+    """Recompute state.nextRunAtMs from the job's schedule."""
+    state = job.setdefault("state", {})
+    if not job.get("enabled"):
+        state["nextRunAtMs"] = None
+        return
+    try:
+        state["nextRunAtMs"] = next_run_ms(job, int(time.time() * 1000))
+    except CronError:
+        state["nextRunAtMs"] = None
+
 
-    name = body.get("name", "").strip()
+def _new_job(body: dict) -> dict:
+    """Validate a create request and build a job record."""
+    name = (body.get("name") or "").strip()
     if not name:
         raise web.HTTPBadRequest(text="Job name is required")
 
-    cron_expr = body.get("schedule", "").strip()
+    cron_expr = body.get("schedule") or ""
+    if isinstance(cron_expr, str):
+        cron_expr = cron_expr.strip()
     if not cron_expr:
         raise web.HTTPBadRequest(text="Cron schedule expression is required")
+    _validate_schedule(cron_expr, body.get("tz"))
 
-    message = body.get("message", "").strip()
+    message = (body.get("message") or "").strip()
     if not message:
         raise web.HTTPBadRequest(text="Message is required")
 
@@ -72,85 +90,280 @@ async def create_job(request: web.Request) -> web.Response:
         "updatedAtMs": now_ms,
         "deleteAfterRun": False,
     }
+    _refresh_next_run(job)
+    return job
 
-    data = read_cron_jobs()
-    data["jobs"].append(job)
-    _lock_and_write(data)
 
-    return web.json_response(job, status=201)
+def _apply_changes(job: dict, body: dict):
+    """Apply PATCH-style field changes to a job record in place."""
+    if "enabled" in body:
+        job["enabled"] = bool(body["enabled"])
+    if "name" in body:
+        job["name"] = body["name"]
+    if "schedule" in body or "tz" in body:
+        kind = job["schedule"].get("kind")
+        if kind != "cron":
+            raise web.HTTPUnprocessableEntity(
+                text=f"Job {job.get('id')} has a {kind!r} schedule; only cron schedules can be changed")
+        expr = body.get("schedule", job["schedule"].get("expr"))
+        tz = body.get("tz", job["schedule"].get("tz")) or None
+        _validate_schedule(expr, tz)
+        job["schedule"]["expr"] = expr
+        job["schedule"]["tz"] = tz
+    if "message" in body:
+        job["payload"]["message"] = body["message"]
+    if "channel" in body:
+        job["payload"]["channel"] = body["channel"] or None
+    if "to" in body:
+        job["payload"]["to"] = body["to"] or None
 
+    job["updatedAtMs"] = int(time.time() * 1000)
+    _refresh_next_run(job)
 
-async def delete_job(request: web.Request) -> web.Response:
-    job_id = request.match_info["id"]
-    data = read_cron_jobs()
 
-    jobs = data["jobs"]
-    idx = next((i for i, j in enumerate(jobs) if j["id"] == job_id), None)
+def _find(jobs: list, job_id: str) -> int:
+    idx = next((i for i, j in enumerate(jobs) if j.get("id") == job_id), None)
     if idx is None:
-        raise web.HTTPNotFound(text="Job not found")
+        raise web.HTTPNotFound(text=f"Job not found: {job_id}")
+    return idx
+
+
+async def list_jobs(request: web.Request) -> web.Response:
+    entry = await run_blocking(FS, cron_store.entry)
+    etag = version_tag("cron", entry.version)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    return json_response(entry.data, headers=cache_headers(etag))
+
+
+async def create_job(request: web.Request) -> web.Response:
+    body = await request.json()
+    job = _new_job(body)
 
-    removed = jobs.pop(idx)
-    _lock_and_write(data)
-    return web.json_response({"deleted": removed["id"]})
+    await cron_store.apply(lambda data: data["jobs"].append(job))
+    return json_response(job, status=201)
+
+
+async def delete_job(request: web.Request) -> web.Response:
+    job_id = request.match_info["id"]
+
+    removed = await cron_store.apply(lambda data: data["jobs"].pop(_find(data["jobs"], job_id)))
+    return json_response({"deleted": removed["id"]})
 
 
 async def update_job(request: web.Request) -> web.Response:
     job_id = request.match_info["id"]
     body = await request.json()
-    data = read_cron_jobs()
 
-    job = next((j for j in data["jobs"] if j["id"] == job_id), None)
-    if job is None:
-        raise web.HTTPNotFound(text="Job not found")
+    def update(data: dict) -> dict:
+        job = data["jobs"][_find(data["jobs"], job_id)]
+        _apply_changes(job, body)
+        return job
 
-    if "enabled" in body:
-        job["enabled"] = bool(body["enabled"])
-    if "name" in body:
-        job["name"] = body["name"]
-    if "schedule" in body:
-        job["schedule"]["expr"] = body["schedule"]
-    if "message" in body:
-        job["payload"]["message"] = body["message"]
-    if "channel" in body:
-        job["payload"]["channel"] = body["channel"] or None
-    if "to" in body:
-        job["payload"]["to"] = body["to"] or None
+    return json_response(await cron_store.apply(update))
 
-    job["updatedAtMs"] = int(time.time() * 1000)
-    _lock_and_write(data)
-    return web.json_response(job)
+
+async def bulk_jobs(request: web.Request) -> web.Response:
+    """POST /api/cron/jobs/bulk — apply many changes in one transaction.
+
+    Body: {"operations": [
+        {"op": "create", ...create fields},
+        {"op": "update", "id": "...", ...PATCH fields},
+        {"op": "delete", "id": "..."},
+    ]}
+    All operations succeed or none are written.
+    """
+    body = await request.json()
+    operations = body.get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise web.HTTPBadRequest(text="operations must be a non-empty list")
+
+    def apply(data: dict) -> tuple[list, int]:
+        results = []
+        jobs = data["jobs"]
+        for op in operations:
+            kind = op.get("op") if isinstance(op, dict) else None
+            if kind == "create":
+                job = _new_job(op)
+                jobs.append(job)
+                results.append({"op": kind, "id": job["id"]})
+            elif kind == "update":
+                _apply_changes(jobs[_find(jobs, op.get("id"))], op)
+                results.append({"op": kind, "id": op["id"]})
+            elif kind == "delete":
+                jobs.pop(_find(jobs, op.get("id")))
+                results.append({"op": kind, "id": op["id"]})
+            else:
+                raise web.HTTPBadRequest(text=f"Unknown operation: {kind!r}")
+        return results, len(jobs)
+
+    results, total = await cron_store.apply(apply)
+    return json_response({"results": results, "total": total})
+
+
+def _timeline(jobs: list, now_ms: int, end_ms: int, count: int, include_disabled: bool) -> dict:
+    """Fires and per-minute load of `jobs` in (now_ms, end_ms]; CPU-bound, run in the SEARCH pool."""
+    per_minute: dict[int, list[str]] = {}
+    jobs_out = []
+    budget = TIMELINE_MAX_TOTAL_FIRES
+    for job in jobs:
+        if not job.get("enabled") and not include_disabled:
+            continue
+        entry = {
+            "id": job.get("id"),
+            "name": job.get("name"),
+            "enabled": job.get("enabled", False),
+            "schedule": job.get("schedule"),
+            "next": [],
+            "fires": 0,
+            "truncated": False,
+            "error": None,
+        }
+        jobs_out.append(entry)
+        limit = min(TIMELINE_MAX_FIRES, budget)
+        if limit <= 0:
+            entry["truncated"] = True
+            continue
+        try:
+            fires = schedule_fires(job, now_ms, end_ms, limit)
+        except CronError as e:
+            entry["error"] = str(e)
+            continue
+        budget -= len(fires)
+        entry["next"] = fires[:count]
+        entry["fires"] = len(fires)
+        entry["truncated"] = len(fires) == limit < TIMELINE_MAX_FIRES
+        if job.get("enabled"):
+            for t in fires:
+                per_minute.setdefault(t - t % 60_000, []).append(job.get("id"))
+
+    minutes = [
+        {"t": t, "count": len(ids), "jobs": ids}
+        for t, ids in sorted(per_minute.items())
+    ]
+    jobs_out.sort(key=lambda j: j["next"][0] if j["next"] else float("inf"))
+    return {
+        "from": now_ms,
+        "to": end_ms,
+        "jobs": jobs_out,
+        "minutes": minutes,
+        "maxPerMinute": max((m["count"] for m in minutes), default=0),
+        "collisions": sum(1 for m in minutes if m["count"] > 1),
+        "truncated": any(j["truncated"] for j in jobs_out),
+    }
+
+
+async def get_timeline(request: web.Request) -> web.Response:
+    """GET /api/cron/timeline?hours=24&count=10&all=0 — upcoming fires for every job.
+
+    Returns each job's next `count` fire times within the horizon plus
+    per-minute load: every minute in which at least one job fires, with the
+    number of jobs firing then, so collisions (e.g. 150 jobs at 09:00) are
+    visible. Disabled jobs are skipped unless `all=1`. At most
+    TIMELINE_MAX_TOTAL_FIRES fires are computed across all jobs; jobs cut
+    short by that are flagged `truncated`.
+    """
+    try:
+        hours = min(float(request.query.get("hours", "24")), TIMELINE_MAX_HOURS)
+        count = max(1, min(int(request.query.get("count", "10")), 1000))
+    except ValueError:
+        raise web.HTTPBadRequest(text="hours and count must be numbers")
+    if not math.isfinite(hours) or hours <= 0:
+        raise web.HTTPBadRequest(text="hours must be a positive number")
+    include_disabled = request.query.get("all") in ("1", "true")
+
+    now_ms = int(time.time() * 1000)
+    end_ms = now_ms + int(hours * 3_600_000)
+    jobs = (await run_blocking(FS, cron_store.read))["jobs"]
+    return json_response(await run_blocking(SEARCH, _timeline, jobs, now_ms, end_ms, count, include_disabled))
 
 
 async def run_job(request: web.Request) -> web.Response:
+    """Queue a manual run; returns immediately with a run id to follow."""
     job_id = request.match_info["id"]
 
     # Verify job exists
-    data = read_cron_jobs()
-    job = next((j for j in data["jobs"] if j["id"] == job_id), None)
-    if job is None:
-        raise web.HTTPNotFound(text="Job not found")
+    jobs = (await run_blocking(FS, cron_store.read))["jobs"]
+    job = jobs[_find(jobs, job_id)]
+
+    run = request.app[runner_key].submit(job_id, job.get("name", ""))
+    return json_response({
+        **run.to_dict(),
+        "triggered": job_id,
+        "note": f"Job queued (run {run.id})",
+    }, status=202)
+
+
+async def list_runs(request: web.Request) -> web.Response:
+    """GET /api/cron/runs?job= — recent runs, newest first."""
+    runner = request.app[runner_key]
+    runs = runner.list(request.query.get("job"))
+    return json_response({"runs": [r.to_dict() for r in runs], **runner.stats()})
 
+
+async def get_run(request: web.Request) -> web.StreamResponse:
+    """GET /api/cron/runs/{run_id} — SSE stream of a run's output.
+
+    Replays output captured so far, then follows it live: `status` on
+    state changes, `output` per chunk ({stream, text}), and a final `done`
+    with exit code and duration. Without `Accept: text/event-stream` the
+    run is returned as JSON including its captured output.
+    """
+    run = request.app[runner_key].get(request.match_info["run_id"])
+    if run is None:
+        raise web.HTTPNotFound(text="Run not found")
+    if not wants_sse(request):
+        return json_response(run.to_dict(include_output=True))
+
+    resp = await prepare_sse(request)
+    sent = 0
+    status = None
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "nanobot", "cron", "run", job_id,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            msg = (stderr or stdout or b"").decode().strip() or "Unknown error"
-            raise web.HTTPInternalServerError(text=f"Job failed: {msg}")
-        return web.json_response({
-            "triggered": job_id,
-            "note": "Job triggered successfully",
-        })
-    except FileNotFoundError:
-        raise web.HTTPServiceUnavailable(text="nanobot CLI not found")
+        while True:
+            if run.status != status:
+                status = run.status
+                await send_event(resp, "status", run.to_dict())
+            while sent < len(run.output):
+                stream, text = run.output[sent]
+                sent += 1
+                await send_event(resp, "output", {"stream": stream, "text": text})
+            if run.finished and sent >= len(run.output):
+                await send_event(resp, "done", run.to_dict())
+                break
+            # Periodic wake-up doubles as a keep-alive for idle proxies
+            await run.wait_change(timeout=15)
+            if not run.finished and sent >= len(run.output) and run.status == status:
+                await resp.write(b": keep-alive\n\n")
+        await resp.write_eof()
+    except ConnectionResetError:
+        pass
+    return resp
+
+
+async def cancel_run(request: web.Request) -> web.Response:
+    run = request.app[runner_key].get(request.match_info["run_id"])
+    if run is None:
+        raise web.HTTPNotFound(text="Run not found")
+    if not request.app[runner_key].cancel(run):
+        raise web.HTTPConflict(text="Run already finished")
+    return json_response(run.to_dict())
+
+
+async def _stop_runner(app: web.Application):
+    await app[runner_key].shutdown()
 
 
 def setup(app: web.Application):
+    app[runner_key] = CronRunner(CRON_RUN_CONCURRENCY, CRON_RUN_HISTORY)
+    app.on_cleanup.append(_stop_runner)
+
     app.router.add_get("/api/cron/jobs", list_jobs)
     app.router.add_post("/api/cron/jobs", create_job)
+    app.router.add_post("/api/cron/jobs/bulk", bulk_jobs)
+    app.router.add_get("/api/cron/timeline", get_timeline)
     app.router.add_delete("/api/cron/jobs/{id}", delete_job)
     app.router.add_patch("/api/cron/jobs/{id}", update_job)
     app.router.add_post("/api/cron/jobs/{id}/run", run_job)
+    app.router.add_get("/api/cron/runs", list_runs)
+    app.router.add_get("/api/cron/runs/{run_id}", get_run)
+    app.router.add_delete("/api/cron/runs/{run_id}", cancel_run)
@@ -0,0 +1,43 @@
+"""Live diagnostics: sampling profiler and slow-request traces."""
+
+from aiohttp import web
+
+from dashboard.config import SLOW_REQUEST_MS
+from dashboard.utils import profiler
+from dashboard.utils.codec import json_response
+from dashboard.utils.trace import slow_requests
+
+
+async def get_profile(request: web.Request) -> web.Response:
+    """GET /api/debug/profile?seconds=30&hz=100&idle=0 — sample all threads, collapsed stacks."""
+    try:
+        seconds = float(request.query.get("seconds", 10))
+        hz = int(request.query.get("hz", profiler.DEFAULT_HZ))
+    except ValueError:
+        raise web.HTTPBadRequest(text="seconds and hz must be numbers")
+    if not 0 < seconds <= profiler.MAX_SECONDS:
+        raise web.HTTPBadRequest(text=f"seconds must be between 0 and {profiler.MAX_SECONDS}")
+    if not 1 <= hz <= 1000:
+        raise web.HTTPBadRequest(text="hz must be between 1 and 1000")
+    idle = request.query.get("idle", "1") not in ("0", "false")
+
+    try:
+        stacks, ticks = await profiler.profile(seconds, hz, idle)
+    except RuntimeError as e:
+        raise web.HTTPConflict(text=str(e))
+    return web.Response(text=profiler.collapsed(stacks), headers={
+        "X-Profile-Ticks": str(ticks),
+        "X-Profile-Samples": str(sum(stacks.values())),
+        "Content-Disposition": 'inline; filename="dashboard.folded"',
+        "Cache-Control": "no-store",
+    })
+
+
+async def get_slow_requests(request: web.Request) -> web.Response:
+    """GET /api/debug/slow — span traces of recent requests over the slow threshold."""
+    return json_response({"thresholdMs": SLOW_REQUEST_MS, "requests": list(reversed(slow_requests))})
+
+
+def setup(app: web.Application):
+    app.router.add_get("/api/debug/profile", get_profile)
+    app.router.add_get("/api/debug/slow", get_slow_requests)
@@ -0,0 +1,75 @@
+"""Filesystem change events — batches from utils/fs_events.py pushed over SSE."""
+
+import asyncio
+
+from aiohttp import web
+
+from dashboard.utils import cluster
+from dashboard.utils.fs_events import KINDS, fs_events
+from dashboard.utils.sse import prepare_sse, send_event
+
+HEARTBEAT = 15  # seconds between keep-alive comments (also how soon a gone client is noticed)
+
+
+async def stream_events(request: web.Request) -> web.StreamResponse:
+    """GET /api/events?kinds=sessions,logs — change batches via SSE, resumable with Last-Event-ID."""
+    kinds = [k for k in request.query.get("kinds", "").split(",") if k] or list(KINDS)
+    unknown = set(kinds).difference(KINDS)
+    if unknown:
+        raise web.HTTPBadRequest(text=f"unknown kinds: {', '.join(sorted(unknown))}")
+    last_id = request.headers.get("Last-Event-ID") or request.query.get("since")
+    try:
+        since = int(last_id) if last_id else None
+    except ValueError:
+        since = None
+
+    # Subscribe first so nothing published during the replay is lost
+    sub = fs_events.subscribe(kinds)
+    try:
+        resp = await prepare_sse(request)
+        sent = fs_events.seq
+        missed = fs_events.since(since) if since is not None else []
+        if missed is None:
+            await send_event(resp, "resync", {"seq": sent}, id=sent)
+        else:
+            for batch in missed:
+                await _send_batch(resp, batch, sub.kinds)
+            await send_event(resp, "hello", {"seq": sent, "kinds": kinds}, id=sent)
+        while True:
+            try:
+                batch = await asyncio.wait_for(sub.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                await resp.write(b": ping\n\n")
+                continue
+            if batch is None:
+                await send_event(resp, "resync", {"seq": fs_events.seq}, id=fs_events.seq)
+            elif batch["seq"] > sent:
+                await _send_batch(resp, batch, sub.kinds)
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        fs_events.unsubscribe(sub)
+    return resp
+
+
+async def _send_batch(resp: web.StreamResponse, batch: dict, kinds: set[str]):
+    events = [e for e in batch["events"] if e["kind"] in kinds]
+    if events:
+        await send_event(resp, "changes", {"seq": batch["seq"], "events": events}, id=batch["seq"])
+
+
+async def _start_feed(app: web.Application):
+    # One watcher per server: with --workers the primary runs it and the others forward /api/events
+    if cluster.is_primary():
+        fs_events.start(asyncio.get_running_loop())
+
+
+async def _stop_feed(app: web.Application):
+    await asyncio.to_thread(fs_events.stop)
+
+
+def setup(app: web.Application):
+    app.on_startup.append(_start_feed)
+    app.on_cleanup.append(_stop_feed)
+
+    app.router.add_get("/api/events", stream_events)
@@ -0,0 +1,155 @@
+"""Version history endpoints for workspace files (see utils/versions.py)."""
+
+import asyncio
+import difflib
+import os
+
+from aiohttp import web
+
+from dashboard.config import WORKSPACE_DIR
+from dashboard.routes.memory import ALLOWED_EXTENSIONS, save_from_body
+from dashboard.utils import cluster
+from dashboard.utils.codec import json_response
+from dashboard.utils.executor import BULK, FS, SEARCH, run_blocking
+from dashboard.utils.sanitize import safe_resolve
+from dashboard.utils.versions import VersionNotFound, version_store
+
+GC_INTERVAL = 3600      # seconds between background collections
+GC_FIRST_DELAY = 60
+MAX_DIFF_LINES = 20_000
+
+gc_key = web.AppKey("history_gc", asyncio.Task)
+
+
+def _rel(path: str) -> tuple:
+    try:
+        filepath = safe_resolve(WORKSPACE_DIR, path)
+    except ValueError:
+        raise web.HTTPForbidden(text="Path traversal detected")
+    if filepath.suffix not in ALLOWED_EXTENSIONS:
+        raise web.HTTPBadRequest(text=f"File type {filepath.suffix} not allowed")
+    return filepath, os.path.relpath(filepath, WORKSPACE_DIR)
+
+
+def _version_text(version_id: str) -> str:
+    try:
+        return version_store.content(version_id).decode("utf-8", errors="replace")
+    except VersionNotFound:
+        raise web.HTTPNotFound(text=f"Version {version_id} not found")
+
+
+def _restorable_text(version_id: str) -> str:
+    """Version content for a restore, which must round-trip byte for byte."""
+    try:
+        data = version_store.content(version_id)
+    except VersionNotFound:
+        raise web.HTTPNotFound(text=f"Version {version_id} not found")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        raise web.HTTPUnprocessableEntity(text=f"Version {version_id} is not valid UTF-8 and can't be restored")
+
+
+async def get_stats(request: web.Request) -> web.Response:
+    """GET /api/history — object store size, budget and last GC."""
+    return json_response(await run_blocking(FS, version_store.stats))
+
+
+async def list_versions(request: web.Request) -> web.Response:
+    """GET /api/history/files/{path} — versions of one file, newest first."""
+    path = request.match_info["path"]
+    _filepath, rel = _rel(path)
+    return json_response({"path": path, "versions": await run_blocking(FS, version_store.history, rel)})
+
+
+async def get_version(request: web.Request) -> web.Response:
+    """GET /api/history/versions/{id} — content of one version."""
+    version_id = request.match_info["id"]
+    content = await run_blocking(FS, _version_text, version_id)
+    return json_response({"id": version_id, "content": content})
+
+
+async def get_diff(request: web.Request) -> web.Response:
+    """GET /api/history/diff?path=&from=&to= — unified diff; `to` defaults to the file on disk."""
+    path = request.query.get("path", "")
+    frm = request.query.get("from")
+    to = request.query.get("to")
+    if not path or not frm:
+        raise web.HTTPBadRequest(text="path and from are required")
+    filepath, _rel_path = _rel(path)
+
+    def diff() -> str:
+        old = _version_text(frm)
+        if to:
+            new = _version_text(to)
+        else:
+            try:
+                new = filepath.read_text(encoding="utf-8", errors="replace")
+            except FileNotFoundError:
+                new = ""
+        lines = difflib.unified_diff(
+            old.splitlines(keepends=True), new.splitlines(keepends=True),
+            fromfile=f"{path}@{frm[:12]}", tofile=f"{path}@{to[:12]}" if to else path,
+        )
+        return "".join(line for _, line in zip(range(MAX_DIFF_LINES), lines))
+
+    return json_response({"path": path, "from": frm, "to": to, "diff": await run_blocking(SEARCH, diff)})
+
+
+async def restore_version(request: web.Request) -> web.Response:
+    """POST /api/history/restore/{path} — write version `id` back (optionally against a `base` ETag)."""
+    path = request.match_info["path"]
+    filepath, _rel_path = _rel(path)
+    body = await request.json()
+    version_id = body.get("id") if isinstance(body, dict) else None
+    if not isinstance(version_id, str):
+        raise web.HTTPBadRequest(text="id is required")
+
+    content = await run_blocking(FS, _restorable_text, version_id)
+    etag, size = await run_blocking(
+        FS, save_from_body, filepath, {"content": content, "base": body.get("base")}, op="restore")
+    return json_response({"path": path, "id": version_id, "sizeBytes": size, "etag": etag},
+                             headers={"ETag": etag})
+
+
+async def run_gc(request: web.Request) -> web.Response:
+    """POST /api/history/gc — trim history to the budget now."""
+    return json_response(await run_blocking(BULK, version_store.gc))
+
+
+async def _gc_loop():
+    await asyncio.sleep(GC_FIRST_DELAY)
+    while True:
+        try:
+            await run_blocking(BULK, version_store.gc)
+        except Exception:
+            pass
+        await asyncio.sleep(GC_INTERVAL)
+
+
+async def _start_gc(app: web.Application):
+    if not cluster.is_primary():
+        return
+    app[gc_key] = asyncio.create_task(_gc_loop())
+
+
+async def _stop_gc(app: web.Application):
+    task = app.get(gc_key)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def setup(app: web.Application):
+    app.on_startup.append(_start_gc)
+    app.on_cleanup.append(_stop_gc)
+
+    app.router.add_get("/api/history", get_stats)
+    app.router.add_post("/api/history/gc", run_gc)
+    app.router.add_get("/api/history/diff", get_diff)
+    app.router.add_get("/api/history/versions/{id}", get_version)
+    app.router.add_get(r"/api/history/files/{path:.+}", list_versions)
+    app.router.add_post(r"/api/history/restore/{path:.+}", restore_version)
@@ -1,67 +1,163 @@
 """Log file viewer endpoints."""
 
+import asyncio
 import os
 
 from aiohttp import web
 
 from dashboard.config import NANOBOT_ROOT
+from dashboard.utils import warmup
+from dashboard.utils.codec import json_response
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import FS, run_blocking
 
+FOLLOW_INTERVAL = 1.0       # seconds between size checks of a followed log
+FOLLOW_MAX_READ = 512_000   # bytes sent per check; a burst beyond this is skipped
 
-async def list_logs(request: web.Request) -> web.Response:
-    """List all .log files in NANOBOT_ROOT."""
-    files = []
+
+# (NANOBOT_ROOT mtime_ns, .log names): names only change when the directory does
+_log_names: tuple[int, list[str]] | None = None
+
+
+def _log_stats() -> list[tuple[str, int, int]]:
+    """(name, size, mtime_ns) of every .log file in NANOBOT_ROOT, by name."""
+    global _log_names
     try:
-        for entry in sorted(NANOBOT_ROOT.iterdir()):
-            if entry.is_file() and entry.suffix == ".log":
-                try:
-                    stat = entry.stat()
-                    files.append({
-                        "name": entry.name,
-                        "size": stat.st_size,
-                        "modified": stat.st_mtime,
-                    })
-                except OSError:
-                    continue
+        mtime = os.stat(NANOBOT_ROOT).st_mtime_ns
     except OSError:
-        pass
-    return web.json_response({"files": files})
+        return []
+    if _log_names is None or _log_names[0] != mtime:
+        try:
+            names = sorted(e.name for e in os.scandir(NANOBOT_ROOT)
+                           if e.name.endswith(".log") and e.is_file())
+        except OSError:
+            names = []
+        _log_names = (mtime, names)
+    stats = []
+    for name in _log_names[1]:
+        try:
+            st = os.stat(NANOBOT_ROOT / name)
+        except OSError:
+            continue
+        stats.append((name, st.st_size, st.st_mtime_ns))
+    return stats
 
 
-async def get_log(request: web.Request) -> web.Response:
-    """Read tail of a specific log file."""
-    name = request.match_info["name"]
+async def list_logs(request: web.Request) -> web.Response:
+    """List all .log files in NANOBOT_ROOT."""
+    stats = await run_blocking(FS, _log_stats)
+    etag = version_tag("logs", stats)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    files = [{"name": name, "size": size, "modified": mtime / 1e9} for name, size, mtime in stats]
+    return json_response({"files": files}, headers=cache_headers(etag))
+
 
-    # Security: only allow .log files directly in NANOBOT_ROOT
+def _log_path(name: str):
+    """Resolve a log name; only .log files directly in NANOBOT_ROOT are allowed."""
     if "/" in name or "\\" in name or not name.endswith(".log"):
-        return web.json_response({"error": "Invalid log file name"}, status=400)
+        raise ValueError("Invalid log file name")
+    return NANOBOT_ROOT / name
+
+
+def read_tail(log_path, lines: int) -> tuple[list[str], int]:
+    """Return the last `lines` lines of a log and its size."""
+    # Read from end efficiently for large files
+    size = log_path.stat().st_size
+    if size > 512_000:
+        # For large files, read last ~512KB
+        with open(log_path, "rb") as f:
+            f.seek(max(0, size - 512_000))
+            if size > 512_000:
+                f.readline()  # skip partial first line
+            text = f.read().decode("utf-8", errors="replace")
+    else:
+        text = log_path.read_text(errors="replace")
+
+    all_lines = text.strip().split("\n")
+    tail = all_lines[-lines:] if all_lines != [""] else []
+    return tail, size
 
-    log_path = NANOBOT_ROOT / name
-    if not log_path.is_file():
-        return web.json_response({"lines": [], "note": f"{name} not found"})
 
+async def get_log(request: web.Request) -> web.Response:
+    """Read tail of a specific log file."""
+    name = request.match_info["name"]
+
+    try:
+        log_path = _log_path(name)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
     lines = int(request.query.get("lines", "500"))
     lines = min(lines, 5000)
 
     try:
-        # Read from end efficiently for large files
-        size = log_path.stat().st_size
-        if size > 512_000:
-            # For large files, read last ~512KB
-            with open(log_path, "rb") as f:
-                f.seek(max(0, size - 512_000))
-                if size > 512_000:
-                    f.readline()  # skip partial first line
-                text = f.read().decode("utf-8", errors="replace")
-        else:
-            text = log_path.read_text(errors="replace")
-
-        all_lines = text.strip().split("\n")
-        tail = all_lines[-lines:] if all_lines != [""] else []
-        return web.json_response({"lines": tail, "totalSize": size})
+        tail, size = await run_blocking(FS, read_tail, log_path, lines)
+    except FileNotFoundError:
+        return json_response({"lines": [], "note": f"{name} not found"})
     except Exception as e:
-        return web.json_response({"lines": [], "error": str(e)})
+        return json_response({"lines": [], "error": str(e)})
+    return json_response({"lines": tail, "totalSize": size})
+
+
+async def follow_log(name: str, lines: int, emit, interval: float = FOLLOW_INTERVAL):
+    """Send the tail of a log, then its new complete lines as they are appended.
+
+    Events: `lines` {lines, totalSize, reset?}. `reset` marks a truncated or
+    rotated file, after which lines restart from the top of the new file.
+    """
+    log_path = _log_path(name)
+
+    def open_tail():
+        try:
+            tail, size = read_tail(log_path, min(lines, 5000))
+            return tail, size, log_path.stat().st_ino
+        except FileNotFoundError:
+            return [], 0, None
+
+    def read_from(start: int, end: int) -> bytes:
+        with open(log_path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    tail, offset, inode = await run_blocking(FS, open_tail)
+    await emit("lines", {"lines": tail, "totalSize": offset, "reset": True})
+    partial = b""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            st = await run_blocking(FS, os.stat, log_path)
+        except OSError:
+            continue
+        reset = st.st_ino != inode or st.st_size < offset
+        if reset:
+            inode, offset, partial = st.st_ino, 0, b""
+        if st.st_size == offset and not reset:
+            continue
+        start = max(offset, st.st_size - FOLLOW_MAX_READ)
+        try:
+            chunk = await run_blocking(FS, read_from, start, st.st_size)
+        except OSError:
+            continue
+        if start > offset:
+            partial = b""  # skipped ahead; drop the now-orphaned line fragment
+            chunk = chunk.split(b"\n", 1)[1] if b"\n" in chunk else b""
+        offset = st.st_size
+        data = partial + chunk
+        complete, _, partial = data.rpartition(b"\n")
+        new_lines = complete.decode("utf-8", errors="replace").split("\n") if complete else []
+        if new_lines or reset:
+            await emit("lines", {"lines": new_lines, "totalSize": offset, "reset": reset})
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    stats = _log_stats()
+    for name, _size, _mtime in stats:
+        throttle.read(NANOBOT_ROOT / name, tail=512_000)   # what read_tail reads
+    return len(stats)
 
 
 def setup(app: web.Application):
+    warmup.add(app, "logs", _warm)
+
     app.router.add_get("/api/logs", list_logs)
     app.router.add_get("/api/logs/{name}", get_log)
@@ -4,13 +4,17 @@ Serves files from NANOBOT_ROOT/media/ — supports images, audio, video, text.
 """
 
 import mimetypes
-import os
 from pathlib import Path
 
 from aiohttp import web
 
 from dashboard.config import MEDIA_DIR
+from dashboard.utils import warmup
+from dashboard.utils.codec import json_response
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import FS, run_blocking
 from dashboard.utils.sanitize import safe_resolve
+from dashboard.utils.workspace_tree import media_tree
 
 
 def _classify(mime: str) -> str:
@@ -30,36 +34,42 @@ def _classify(mime: str) -> str:
     return "other"
 
 
-async def list_media(request: web.Request) -> web.Response:
-    """List all files in the media directory (recursive)."""
-    if not MEDIA_DIR.exists():
-        return web.json_response({"exists": False, "files": []})
+def _scan_media() -> list[dict] | None:
+    """Media files from the media tree cache; None if the directory doesn't exist."""
+    tree = media_tree.walk()
+    if not tree:
+        return None
 
     files = []
-    media_root = str(MEDIA_DIR)
-    for dirpath, _dirnames, filenames in os.walk(MEDIA_DIR, followlinks=True):
-        for fname in sorted(filenames):
+    for dirpath, _dirnames, entries in tree:
+        for fname in sorted(entries):
             if fname.startswith("."):
                 continue
-            fullpath = os.path.join(dirpath, fname)
-            rel = os.path.relpath(fullpath, media_root)
             mime, _ = mimetypes.guess_type(fname)
             mime = mime or "application/octet-stream"
-            try:
-                stat = os.stat(fullpath)
-                files.append({
-                    "name": fname,
-                    "path": rel,
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "mime": mime,
-                    "type": _classify(mime),
-                })
-            except OSError:
-                continue
+            info = entries[fname]
+            files.append({
+                "name": fname,
+                "path": f"{dirpath}/{fname}" if dirpath else fname,
+                "size": info.size,
+                "modified": info.mtime_ns / 1e9,
+                "mime": mime,
+                "type": _classify(mime),
+            })
 
     files.sort(key=lambda f: f["path"])
-    return web.json_response({"exists": True, "files": files})
+    return files
+
+
+async def list_media(request: web.Request) -> web.Response:
+    """List all files in the media directory (recursive)."""
+    etag = version_tag("media", await run_blocking(FS, media_tree.version))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    files = await run_blocking(FS, _scan_media)
+    if files is None:
+        return json_response({"exists": False, "files": []}, headers=cache_headers(etag))
+    return json_response({"exists": True, "files": files}, headers=cache_headers(etag))
 
 
 async def get_media_file(request: web.Request) -> web.Response:
@@ -71,7 +81,7 @@ async def get_media_file(request: web.Request) -> web.Response:
     except ValueError:
         raise web.HTTPForbidden(text="Path traversal detected")
 
-    if not filepath.is_file():
+    if not await run_blocking(FS, filepath.is_file):
         raise web.HTTPNotFound(text="File not found")
 
     return web.FileResponse(filepath)
@@ -86,14 +96,23 @@ async def delete_media_file(request: web.Request) -> web.Response:
     except ValueError:
         raise web.HTTPForbidden(text="Path traversal detected")
 
-    if not filepath.is_file():
-        raise web.HTTPNotFound(text="File not found")
+    def delete():
+        if not filepath.is_file():
+            raise web.HTTPNotFound(text="File not found")
+        filepath.unlink()
+        media_tree.invalidate(path)
+
+    await run_blocking(FS, delete)
+    return json_response({"deleted": path})
 
-    filepath.unlink()
-    return web.json_response({"deleted": path})
+
+def _warm(throttle: warmup.Throttle) -> int:
+    return len(_scan_media() or [])
 
 
 def setup(app: web.Application):
+    warmup.add(app, "media", _warm)
+
     app.router.add_get("/api/media", list_media)
     app.router.add_get("/api/media/{path:.+}", get_media_file)
     app.router.add_delete("/api/media/{path:.+}", delete_media_file)
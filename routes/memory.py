@@ -2,16 +2,23 @@
 
 Dynamically discovers all subdirectories under workspace/,
 excluding sessions/ and skills/ (they have dedicated pages).
-Uses os.walk(followlinks=True) to correctly traverse symlinked dirs.
+Listings come from utils.workspace_tree, which follows symlinked dirs.
 """
 
 import os
-from pathlib import Path
 
 from aiohttp import web
 
 from dashboard.config import WORKSPACE_DIR
+from dashboard.utils import warmup
+from dashboard.utils.codec import dumps, json_response, loads
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import FS, SEARCH, run_blocking
+from dashboard.utils.line_index import line_index
 from dashboard.utils.sanitize import safe_resolve
+from dashboard.utils.text_patch import Conflict, PatchError, read_versioned, save_text
+from dashboard.utils.versions import version_store
+from dashboard.utils.workspace_tree import workspace_tree
 
 # Only allow these extensions
 ALLOWED_EXTENSIONS = {".md", ".json", ".jsonl", ".txt"}
@@ -19,86 +26,95 @@ ALLOWED_EXTENSIONS = {".md", ".json", ".jsonl", ".txt"}
 # Directories to skip entirely
 SKIP_DIRS = {"sessions", "skills", "__pycache__", ".DS_Store"}
 
-
-def _walk_dir(base: Path, group: str) -> list[dict]:
-    """Walk a directory tree (follows symlinks) and collect viewable files."""
+# Larger files are served in pieces (see get_file)
+MAX_INLINE_BYTES = 2 * 1024 * 1024
+DEFAULT_CHUNK_BYTES = 256 * 1024
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_LINES = 200
+MAX_LINES = 5000
+DEFAULT_RECORDS = 100
+MAX_RECORDS = 1000
+
+RAW_CONTENT_TYPES = {
+    ".json": "application/json",
+    ".jsonl": "application/x-ndjson",
+    ".md": "text/markdown; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+
+def _walk_dir(base: str, group: str, exclude: frozenset = frozenset()) -> list[dict]:
+    """Collect viewable files under a workspace-relative directory (symlinks followed)."""
     files = []
-    if not base.exists():
-        return files
 
-    for dirpath, dirnames, filenames in os.walk(str(base), followlinks=True):
+    def skip(d: str) -> bool:
         # Prune hidden/unwanted dirs
-        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS]
+        return d.startswith(".") or d in SKIP_DIRS or d in exclude
 
-        for fname in sorted(filenames):
-            fp = Path(dirpath) / fname
-            if fp.suffix in ALLOWED_EXTENSIONS and not fname.startswith("."):
+    for dirpath, _dirnames, entries in workspace_tree.walk(base, skip=skip):
+        for fname in sorted(entries):
+            if os.path.splitext(fname)[1] in ALLOWED_EXTENSIONS and not fname.startswith("."):
                 # Path relative to WORKSPACE_DIR (logical, not resolved)
-                rel = os.path.relpath(str(fp), str(WORKSPACE_DIR))
                 files.append({
-                    "path": rel,
+                    "path": f"{dirpath}/{fname}",
                     "name": fname,
-                    "sizeBytes": fp.stat().st_size,
+                    "sizeBytes": entries[fname].size,
                     "group": group,
                 })
     return files
 
 
 def _scan_files():
-    """Scan workspace for viewable files, organized by group.
+    """List viewable workspace files, organized by group.
 
     Dynamically discovers all subdirectories, excluding sessions/ and skills/.
     Special handling: memory/knowledge/ gets its own "knowledge" group.
+    Served from the shared workspace tree cache, so repeated calls only
+    re-read directories that changed.
     """
     files = []
-    if not WORKSPACE_DIR.exists():
+    root = workspace_tree.listdir("")
+    if root is None:
         return files
+    subdirs, entries = root
 
     # Workspace root files (non-recursive)
-    for f in sorted(WORKSPACE_DIR.glob("*.md")):
-        if not f.name.startswith("."):
+    for fname in sorted(entries):
+        if fname.endswith(".md") and not fname.startswith("."):
             files.append({
-                "path": f.name,
-                "name": f.name,
-                "sizeBytes": f.stat().st_size,
+                "path": fname,
+                "name": fname,
+                "sizeBytes": entries[fname].size,
                 "group": "workspace",
             })
 
     # Enumerate all subdirectories dynamically
-    for entry in sorted(WORKSPACE_DIR.iterdir()):
-        if not entry.is_dir() or entry.name.startswith(".") or entry.name in SKIP_DIRS:
+    for name in subdirs:
+        if name.startswith(".") or name in SKIP_DIRS:
             continue
 
-        if entry.name == "memory":
+        if name == "memory":
             # memory/ tree — exclude knowledge/ subdir (it gets its own group)
-            for dirpath, dirnames, filenames in os.walk(str(entry), followlinks=True):
-                dirnames[:] = [d for d in dirnames if d != "knowledge" and not d.startswith(".") and d not in SKIP_DIRS]
-                for fname in sorted(filenames):
-                    fp = Path(dirpath) / fname
-                    if fp.suffix in ALLOWED_EXTENSIONS and not fname.startswith("."):
-                        rel = os.path.relpath(str(fp), str(WORKSPACE_DIR))
-                        files.append({
-                            "path": rel,
-                            "name": fname,
-                            "sizeBytes": fp.stat().st_size,
-                            "group": "memory",
-                        })
+            files.extend(_walk_dir(name, "memory", exclude=frozenset({"knowledge"})))
             # knowledge/ (symlink under memory/)
-            files.extend(_walk_dir(entry / "knowledge", "knowledge"))
+            files.extend(_walk_dir(f"{name}/knowledge", "knowledge"))
         else:
             # Generic subdirectory → group = directory name
-            files.extend(_walk_dir(entry, entry.name))
+            files.extend(_walk_dir(name, name))
 
     return files
 
 
 async def list_files(request: web.Request) -> web.Response:
-    files = _scan_files()
-    return web.json_response({"files": files})
+    etag = version_tag("memory", await run_blocking(FS, workspace_tree.version))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    files = await run_blocking(FS, _scan_files)
+    return json_response({"files": files}, headers=cache_headers(etag))
 
 
-async def get_file(request: web.Request) -> web.Response:
-    path = request.match_info["path"]
+def _resolve_existing(path: str):
+    """Validate `path` (blocking: stats the file); returns (filepath, size)."""
     try:
         filepath = safe_resolve(WORKSPACE_DIR, path)
     except ValueError:
@@ -109,16 +125,190 @@ async def get_file(request: web.Request) -> web.Response:
 
     if filepath.suffix not in ALLOWED_EXTENSIONS:
         raise web.HTTPBadRequest(text=f"File type {filepath.suffix} not allowed")
+    return filepath, filepath.stat().st_size
+
+
+def _int_param(request: web.Request, name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be an integer")
+    if value < low:
+        raise web.HTTPBadRequest(text=f"{name} must be >= {low}")
+    return min(value, high)
+
 
-    content = filepath.read_text(encoding="utf-8")
-    return web.json_response({
+def _read_range(filepath, offset: int, length: int) -> tuple[str, int, int]:
+    """Read bytes [offset, offset+length), widened/narrowed to whole UTF-8 characters.
+
+    Returns (text, actual start, actual end).
+    """
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        data = f.read(length + 4)
+    start = 0
+    # Don't start inside a multi-byte character
+    while start < min(3, len(data)) and offset + start > 0 and data[start] & 0xC0 == 0x80:
+        start += 1
+    end = min(length, len(data))
+    # ...or stop inside one
+    if end < len(data):
+        while end > start and data[end] & 0xC0 == 0x80:
+            end -= 1
+        if end == start:
+            # Range smaller than the character at `start`: return that one character
+            end += 1
+            while end < len(data) and data[end] & 0xC0 == 0x80:
+                end += 1
+    return data[start:end].decode("utf-8", errors="replace"), offset + start, offset + end
+
+
+async def get_file(request: web.Request) -> web.StreamResponse:
+    """GET /api/memory/files/{path} — file content.
+
+    Files up to MAX_INLINE_BYTES come back whole. Larger ones (and any
+    request with parameters) are read in pieces:
+      ?offset=&length=   a byte range (whole UTF-8 characters)
+      ?line=&lines=      a line range, 1-based, via the shared line index
+      ?raw=1             the file itself, streamed, with HTTP Range support
+    """
+    path = request.match_info["path"]
+    filepath, size = await run_blocking(FS, _resolve_existing, path)
+    query = request.query
+
+    if query.get("raw"):
+        return web.FileResponse(filepath, headers={
+            "Content-Type": RAW_CONTENT_TYPES.get(filepath.suffix, "text/plain; charset=utf-8"),
+            "Cache-Control": "no-cache",
+        })
+
+    if "line" in query or "lines" in query:
+        line = _int_param(request, "line", 1, 1, 2**63)
+        count = _int_param(request, "lines", DEFAULT_LINES, 1, MAX_LINES)
+        index = line_index(filepath)
+        rows = await run_blocking(SEARCH, index.read_lines, line - 1, count)
+        return json_response({
+            "path": path,
+            "content": "\n".join(text for text, _ in rows),
+            "line": line,
+            "lineCount": len(rows),
+            "totalLines": index.total_lines,
+            "truncatedLines": [line + i for i, (_, cut) in enumerate(rows) if cut],
+            "sizeBytes": index.size,
+            "eof": line - 1 + len(rows) >= index.total_lines,
+        })
+
+    if "offset" in query or "length" in query or size > MAX_INLINE_BYTES:
+        offset = _int_param(request, "offset", 0, 0, size)
+        length = _int_param(request, "length", DEFAULT_CHUNK_BYTES, 1, MAX_CHUNK_BYTES)
+        text, start, end = await run_blocking(FS, _read_range, filepath, offset, length)
+        return json_response({
+            "path": path,
+            "content": text,
+            "offset": start,
+            "nextOffset": end,
+            "sizeBytes": size,
+            "eof": end >= size,
+            # The whole-file view was cut short; don't save this back as the file
+            "truncated": end < size or start > 0,
+        })
+
+    content, etag = await run_blocking(FS, read_versioned, filepath)
+    return json_response({
         "path": path,
         "content": content,
-        "sizeBytes": filepath.stat().st_size,
+        "sizeBytes": size,
+        "etag": etag,
+    }, headers={"ETag": etag})
+
+
+def _read_records(filepath, start: int, limit: int) -> tuple[list[dict], int, int]:
+    """Parse lines [start, start+limit) of a .jsonl file; returns (records, total lines, size)."""
+    index = line_index(filepath)
+    rows = index.read_lines(start, limit)
+    records = []
+    for i, (text, cut) in enumerate(rows):
+        record = {"index": start + i}
+        if cut:
+            record.update(raw=text, error="line too long")
+        elif not text.strip():
+            record["data"] = None
+        else:
+            try:
+                record["data"] = loads(text)
+            except ValueError as e:
+                record.update(raw=text, error=str(e))
+        records.append(record)
+    return records, index.total_lines, index.size
+
+
+async def get_records(request: web.Request) -> web.Response:
+    """GET /api/memory/records/{path}?start=&limit= — a page of parsed .jsonl records."""
+    path = request.match_info["path"]
+    if not path.endswith(".jsonl"):
+        raise web.HTTPBadRequest(text="Records are only available for .jsonl files")
+    start = _int_param(request, "start", 0, 0, 2**63)
+    limit = _int_param(request, "limit", DEFAULT_RECORDS, 1, MAX_RECORDS)
+
+    filepath, _size = await run_blocking(FS, _resolve_existing, path)
+    records, total, size = await run_blocking(SEARCH, _read_records, filepath, start, limit)
+
+    return json_response({
+        "path": path,
+        "start": start,
+        "records": records,
+        "total": total,
+        "sizeBytes": size,
+        "eof": start + len(records) >= total,
     })
 
 
+def record_version(rel: str, old: bytes | None, new: bytes | None, op: str = "save"):
+    """Add a write to the version history; a history failure never fails the write."""
+    try:
+        version_store.record(rel, old, new, op)
+    except (OSError, ValueError):
+        pass
+
+
+def save_from_body(filepath, body, op: str = "save") -> tuple[str, int]:
+    """Apply a save request body to `filepath`; returns (etag, size).
+
+    Body: {"content": ...} or {"edits": [...]}, plus the "base" ETag the
+    client read (see utils/text_patch.py). Stale bases get 409 with the
+    current ETag, edits that don't apply get 422. The write is recorded
+    in the version history. Blocking; run it in the FS pool.
+    """
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Expected a JSON object")
+    base = body.get("base")
+    content = body.get("content")
+    edits = body.get("edits")
+    if (content is None) == (edits is None):
+        raise web.HTTPBadRequest(text="Exactly one of content or edits is required")
+    if not isinstance(base, (str, type(None))) or not isinstance(content, (str, type(None))):
+        raise web.HTTPBadRequest(text="base and content must be strings")
+    try:
+        rel = os.path.relpath(filepath, WORKSPACE_DIR)
+        result = save_text(filepath, base=base, content=content, edits=edits,
+                           on_write=lambda old, new: record_version(rel, old, new, op))
+    except Conflict as e:
+        raise web.HTTPConflict(
+            body=dumps({"error": "File changed since it was read; reload and retry", "etag": e.etag}),
+            content_type="application/json",
+            headers={"ETag": e.etag} if e.etag else None,
+        )
+    except PatchError as e:
+        raise web.HTTPUnprocessableEntity(
+            body=dumps({"error": str(e)}),
+            content_type="application/json",
+        )
+    workspace_tree.invalidate(rel)
+    return result
+
+
 async def update_file(request: web.Request) -> web.Response:
+    """PUT/PATCH /api/memory/files/{path} — save full content or edits against a base version."""
     path = request.match_info["path"]
     try:
         filepath = safe_resolve(WORKSPACE_DIR, path)
@@ -128,23 +318,17 @@ async def update_file(request: web.Request) -> web.Response:
     if filepath.suffix not in ALLOWED_EXTENSIONS:
         raise web.HTTPBadRequest(text=f"File type {filepath.suffix} not allowed")
 
-    body = await request.json()
-    content = body.get("content")
-    if content is None:
-        raise web.HTTPBadRequest(text="Content is required")
-
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    filepath.write_text(content, encoding="utf-8")
+    etag, size = await run_blocking(FS, save_from_body, filepath, await request.json())
 
-    return web.json_response({
+    return json_response({
         "path": path,
-        "sizeBytes": filepath.stat().st_size,
+        "sizeBytes": size,
+        "etag": etag,
         "updated": True,
-    })
+    }, headers={"ETag": etag})
 
 
-async def delete_file(request: web.Request) -> web.Response:
-    path = request.match_info["path"]
+def _delete_file(path: str):
     try:
         filepath = safe_resolve(WORKSPACE_DIR, path)
     except ValueError:
@@ -156,13 +340,28 @@ async def delete_file(request: web.Request) -> web.Response:
     if filepath.suffix not in ALLOWED_EXTENSIONS:
         raise web.HTTPBadRequest(text=f"File type {filepath.suffix} not allowed")
 
+    rel = os.path.relpath(filepath, WORKSPACE_DIR)
+    record_version(rel, filepath.read_bytes(), None)
     filepath.unlink()
+    workspace_tree.invalidate(rel)
 
-    return web.json_response({"path": path, "deleted": True})
+
+async def delete_file(request: web.Request) -> web.Response:
+    path = request.match_info["path"]
+    await run_blocking(FS, _delete_file, path)
+    return json_response({"path": path, "deleted": True})
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    return len(_scan_files())
 
 
 def setup(app: web.Application):
+    warmup.add(app, "workspace", _warm)
+
     app.router.add_get("/api/memory/files", list_files)
     app.router.add_get(r"/api/memory/files/{path:.+}", get_file)
+    app.router.add_get(r"/api/memory/records/{path:.+}", get_records)
     app.router.add_put(r"/api/memory/files/{path:.+}", update_file)
+    app.router.add_patch(r"/api/memory/files/{path:.+}", update_file)
     app.router.add_delete(r"/api/memory/files/{path:.+}", delete_file)
@@ -0,0 +1,36 @@
+"""Prometheus metrics endpoint."""
+
+import asyncio
+
+from aiohttp import web
+
+from dashboard.utils.metrics import CONTENT_TYPE, metrics, probe_lag
+
+lag_probe_key = web.AppKey("metrics_lag_probe", asyncio.Task)
+
+
+async def get_metrics(request: web.Request) -> web.Response:
+    """GET /api/metrics — request, event-loop and executor metrics (Prometheus text format)."""
+    return web.Response(text=metrics.render(), headers={"Content-Type": CONTENT_TYPE,
+                                                        "Cache-Control": "no-store"})
+
+
+async def _start_probe(app: web.Application):
+    app[lag_probe_key] = asyncio.create_task(probe_lag())
+
+
+async def _stop_probe(app: web.Application):
+    task = app.get(lag_probe_key)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def setup(app: web.Application):
+    app.on_startup.append(_start_probe)
+    app.on_cleanup.append(_stop_probe)
+
+    app.router.add_get("/api/metrics", get_metrics)
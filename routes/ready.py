@@ -0,0 +1,61 @@
+"""Readiness endpoint and the startup warm-up runner."""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from dashboard.config import WARMUP
+from dashboard.utils import warmup
+from dashboard.utils.codec import json_response
+from dashboard.utils.executor import BULK, run_blocking
+
+runner_key = web.AppKey("warmup_runner", asyncio.Task)
+
+
+async def get_ready(request: web.Request) -> web.Response:
+    """GET /api/ready — warm-up progress per subsystem; 503 until every step has finished."""
+    state = warmup.get(request.app)
+    return json_response(state.to_dict(), status=200 if state.ready else 503,
+                         headers={"Cache-Control": "no-store"})
+
+
+async def _run(app: web.Application):
+    state = warmup.get(app)
+    state.started_at = time.time()
+    for step in state.steps:
+        step.state = "running"
+        started = time.monotonic()
+        try:
+            step.items = await run_blocking(BULK, step.fn, state.throttle)
+            step.state = "done"
+        except Exception as e:
+            step.state = "failed"
+            step.error = str(e) or type(e).__name__
+        step.ms = round((time.monotonic() - started) * 1000, 1)
+    state.finished_at = time.time()
+
+
+async def _start_warmup(app: web.Application):
+    if not WARMUP:
+        warmup.get(app).skip()
+        return
+    app[runner_key] = asyncio.create_task(_run(app))
+
+
+async def _stop_warmup(app: web.Application):
+    task = app.get(runner_key)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def setup(app: web.Application):
+    warmup.get(app)
+    app.on_startup.append(_start_warmup)
+    app.on_cleanup.append(_stop_warmup)
+
+    app.router.add_get("/api/ready", get_ready)
@@ -7,12 +7,18 @@ file-level results with line-number snippets.
 import math
 import os
 import re
+import threading
 from collections import Counter
 
 from aiohttp import web
 
 from dashboard.config import WORKSPACE_DIR
 from dashboard.routes.memory import _scan_files
+from dashboard.utils import warmup
+from dashboard.utils.fs_events import fs_events
+from dashboard.utils.codec import json_response
+from dashboard.utils.executor import SEARCH, run_blocking
+from dashboard.utils.trace import span
 
 # File extensions eligible for content search
 CONTENT_EXTENSIONS = {".md", ".txt", ".log", ".json", ".jsonl"}
@@ -25,6 +31,10 @@ CONTEXT_CHARS = 80  # chars around match in snippet
 FILENAME_BONUS = 5.0  # extra score when query appears in filename
 SUBSTRING_BONUS = 3.0  # extra score when raw query appears as substring in content
 
+# Parsed files are kept while their (size, mtime) is unchanged, up to this
+# much source text in total; larger workspaces re-read the rest per search
+PARSE_CACHE_BYTES = 64 * 1024 * 1024
+
 # CJK Unicode ranges (CJK Unified Ideographs + Extension A + Compat)
 _CJK_RE = re.compile(
     r"[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]"
@@ -77,6 +87,66 @@ def _bm25_score_file(
     return score
 
 
+# ---------------------------------------------------------------------------
+# Parsed file cache
+# ---------------------------------------------------------------------------
+
+# relative path -> ((size, mtime_ns), lines, tokens)
+_parsed: dict[str, tuple[tuple[int, int], list[str], list[str]]] = {}
+_parsed_bytes = 0
+_parsed_lock = threading.Lock()
+
+
+def _parse_file(rel: str) -> tuple[list[str], list[str]]:
+    """Lines and BM25 tokens of a workspace file, reused until it changes."""
+    global _parsed_bytes
+    filepath = WORKSPACE_DIR / rel
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return [], []
+    version = (st.st_size, st.st_mtime_ns)
+    cached = _parsed.get(rel)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+    try:
+        text = filepath.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        lines, tokens = [], []
+    else:
+        lines, tokens = text.splitlines(), _tokenize(text)
+    with _parsed_lock:
+        old = _parsed.pop(rel, None)
+        if old is not None:
+            _parsed_bytes -= old[0][0]
+        if _parsed_bytes + st.st_size <= PARSE_CACHE_BYTES:
+            _parsed[rel] = (version, lines, tokens)
+            _parsed_bytes += st.st_size
+    return lines, tokens
+
+
+def _prune_parsed(paths: set[str]):
+    """Forget files that are no longer searched."""
+    global _parsed_bytes
+    with _parsed_lock:
+        for rel in [r for r in _parsed if r not in paths]:
+            _parsed_bytes -= _parsed.pop(rel)[0][0]
+
+
+def _forget_changed(events: list[dict]):
+    """Change feed listener: drop parsed copies of files that changed or went away."""
+    global _parsed_bytes
+    with _parsed_lock:
+        if any(e["type"] == "rescan" for e in events):
+            _parsed.clear()
+            _parsed_bytes = 0
+            return
+        for event in events:
+            old = _parsed.pop(event["path"], None)
+            if old is not None:
+                _parsed_bytes -= old[0][0]
+
+
 # ---------------------------------------------------------------------------
 # Search
 # ---------------------------------------------------------------------------
@@ -86,23 +156,19 @@ def _search(query: str) -> list[dict]:
     query_tokens = _tokenize(query)
     files = _scan_files()
 
-    # Phase 1: read all file contents and tokenize
+    # Phase 1: file contents and tokens (cached per file until it changes)
     file_data: list[dict] = []
-    for f in files:
-        filepath = WORKSPACE_DIR / f["path"]
-        ext = os.path.splitext(f["name"])[1].lower()
-        content_lines: list[str] = []
-        tokens: list[str] = []
+    with span("scan", f"{len(files)} files"):
+        for f in files:
+            ext = os.path.splitext(f["name"])[1].lower()
+            content_lines: list[str] = []
+            tokens: list[str] = []
 
-        if ext in CONTENT_EXTENSIONS and filepath.exists():
-            try:
-                text = filepath.read_text(encoding="utf-8")
-                content_lines = text.splitlines()
-                tokens = _tokenize(text)
-            except (OSError, UnicodeDecodeError):
-                pass
+            if ext in CONTENT_EXTENSIONS:
+                content_lines, tokens = _parse_file(f["path"])
 
-        file_data.append({**f, "_lines": content_lines, "_tokens": tokens})
+            file_data.append({**f, "_lines": content_lines, "_tokens": tokens})
+    _prune_parsed({f["path"] for f in files})
 
     # Phase 2: compute document frequencies across all files
     n = len(file_data)
@@ -186,9 +252,20 @@ def _search(query: str) -> list[dict]:
 async def search_files(request: web.Request) -> web.Response:
     q = request.query.get("q", "").strip()
     if len(q) < MIN_QUERY_LEN:
-        return web.json_response({"results": []})
-    return web.json_response({"results": _search(q)})
+        return json_response({"results": []})
+    return json_response({"results": await run_blocking(SEARCH, _search, q)})
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    files = [f for f in _scan_files() if os.path.splitext(f["name"])[1].lower() in CONTENT_EXTENSIONS]
+    for f in files:
+        throttle.consume(f["sizeBytes"])
+        _parse_file(f["path"])
+    return len(files)
 
 
 def setup(app: web.Application):
+    warmup.add(app, "search", _warm)
+    fs_events.listen("workspace", _forget_changed)
+
     app.router.add_get("/api/search", search_files)
@@ -1,29 +1,34 @@
 """Session browser endpoints."""
 
-import json
+import threading
 from pathlib import Path
 
 from aiohttp import web
 
 from dashboard.config import SESSIONS_DIR
+from dashboard.utils import warmup
+from dashboard.utils.codec import iter_jsonl, json_response, loads
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import FS, SEARCH, run_blocking
+from dashboard.utils.filecache import file_cache, thaw
+from dashboard.utils.trace import span
+from dashboard.utils.workspace_tree import sessions_tree
 
 NOTES_FILE = SESSIONS_DIR / ".notes.json"
+WARM_SESSIONS = 10  # newest session files read into the page cache at startup
+
+_notes_lock = threading.Lock()
 
 
 def _load_notes() -> dict:
-    """Load session notes from .notes.json."""
-    if NOTES_FILE.exists():
-        try:
-            return json.loads(NOTES_FILE.read_text())
-        except Exception:
-            pass
-    return {}
+    """Load session notes from .notes.json (cached, read-only)."""
+    notes = file_cache.get(NOTES_FILE, {}).data
+    return notes if isinstance(notes, dict) else {}
 
 
 def _save_notes(notes: dict):
     """Save session notes to .notes.json."""
-    NOTES_FILE.parent.mkdir(parents=True, exist_ok=True)
-    NOTES_FILE.write_text(json.dumps(notes, ensure_ascii=False, indent=2))
+    file_cache.write_json(NOTES_FILE, notes)
 
 
 def _parse_channel(filename: str) -> str:
@@ -39,48 +44,54 @@ def _read_metadata(filepath: Path) -> dict | None:
         with open(filepath, "r") as f:
             first_line = f.readline().strip()
             if first_line:
-                data = json.loads(first_line)
-                if data.get("_type") == "metadata":
+                data = loads(first_line)
+                if isinstance(data, dict) and data.get("_type") == "metadata":
                     return data
     except Exception:
         pass
     return None
 
 
-
-async def list_sessions(request: web.Request) -> web.Response:
-    channel_filter = request.query.get("channel")
-
-    if not SESSIONS_DIR.exists():
-        return web.json_response({"sessions": []})
+def _list_sessions(channel_filter: str | None) -> list[dict]:
+    """Sessions, newest first (directory listing from the sessions tree cache)."""
+    listing = sessions_tree.listdir("")
+    if listing is None:
+        return []
 
     notes = _load_notes()
     sessions = []
-    for f in sorted(SESSIONS_DIR.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True):
-        channel = _parse_channel(f.name)
+    files = listing[1]
+    names = [n for n in files if n.endswith(".jsonl") and not n.startswith(".")]
+    for name in sorted(names, key=lambda n: files[n].mtime_ns, reverse=True):
+        channel = _parse_channel(name)
         if channel_filter and channel != channel_filter:
             continue
 
-        meta = _read_metadata(f)
-        key = f.stem  # filename without extension
+        meta = _read_metadata(SESSIONS_DIR / name)
+        key = name[:-len(".jsonl")]
         sessions.append({
             "key": key,
             "channel": channel,
-            "filename": f.name,
-            "sizeBytes": f.stat().st_size,
+            "filename": name,
+            "sizeBytes": files[name].size,
             "createdAt": meta.get("created_at") if meta else None,
             "updatedAt": meta.get("updated_at") if meta else None,
             "metadataKey": meta.get("key") if meta else None,
             "note": notes.get(key, ""),
         })
+    return sessions
 
-    return web.json_response({"sessions": sessions})
 
+async def list_sessions(request: web.Request) -> web.Response:
+    etag = version_tag("sessions", await run_blocking(FS, sessions_tree.version))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    channel_filter = request.query.get("channel")
+    sessions = await run_blocking(FS, _list_sessions, channel_filter)
+    return json_response({"sessions": sessions}, headers=cache_headers(etag))
 
-async def get_session(request: web.Request) -> web.Response:
-    key = request.match_info["key"]
-    filepath = SESSIONS_DIR / f"{key}.jsonl"
 
+def _read_session(key: str, filepath: Path) -> dict:
     if not filepath.exists() or not filepath.is_file():
         raise web.HTTPNotFound(text="Session not found")
 
@@ -90,71 +101,89 @@ async def get_session(request: web.Request) -> web.Response:
 
     messages = []
     metadata = None
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                if data.get("_type") == "metadata":
-                    metadata = data
-                else:
-                    messages.append(data)
-            except json.JSONDecodeError:
+    raw = filepath.read_bytes()
+    with span("parse", filepath.name):
+        for data in iter_jsonl(raw):
+            if not isinstance(data, dict):
                 continue
+            if data.get("_type") == "metadata":
+                metadata = data
+            else:
+                messages.append(data)
 
     notes = _load_notes()
-    return web.json_response({
+    return {
         "key": key,
         "metadata": metadata,
         "messages": messages,
         "note": notes.get(key, ""),
-    })
+    }
 
 
-async def update_session_note(request: web.Request) -> web.Response:
+async def get_session(request: web.Request) -> web.Response:
     key = request.match_info["key"]
     filepath = SESSIONS_DIR / f"{key}.jsonl"
+    return json_response(await run_blocking(SEARCH, _read_session, key, filepath))
 
-    if not filepath.exists():
-        raise web.HTTPNotFound(text="Session not found")
+
+def _set_note(key: str, note: str):
+    """Set or clear a session's note; read-modify-write is serialized."""
+    with _notes_lock:
+        notes = thaw(_load_notes())
+        if note:
+            notes[key] = note
+        else:
+            notes.pop(key, None)
+        _save_notes(notes)
+    sessions_tree.invalidate(NOTES_FILE.name)
+
+
+async def update_session_note(request: web.Request) -> web.Response:
+    key = request.match_info["key"]
+    filepath = SESSIONS_DIR / f"{key}.jsonl"
 
     body = await request.json()
     note = body.get("note", "").strip()
 
-    notes = _load_notes()
-    if note:
-        notes[key] = note
-    else:
-        notes.pop(key, None)
-    _save_notes(notes)
+    if not await run_blocking(FS, filepath.exists):
+        raise web.HTTPNotFound(text="Session not found")
+    await run_blocking(FS, _set_note, key, note)
 
-    return web.json_response({"key": key, "note": note})
+    return json_response({"key": key, "note": note})
 
 
 async def delete_session(request: web.Request) -> web.Response:
     key = request.match_info["key"]
     filepath = SESSIONS_DIR / f"{key}.jsonl"
 
-    if not filepath.exists():
-        raise web.HTTPNotFound(text="Session not found")
+    def delete():
+        if not filepath.exists():
+            raise web.HTTPNotFound(text="Session not found")
 
-    if not str(filepath.resolve()).startswith(str(SESSIONS_DIR.resolve())):
-        raise web.HTTPForbidden(text="Access denied")
+        if not str(filepath.resolve()).startswith(str(SESSIONS_DIR.resolve())):
+            raise web.HTTPForbidden(text="Access denied")
 
-    filepath.unlink()
+        filepath.unlink()
+        sessions_tree.invalidate(filepath.name)
 
-    # Clean up note
-    notes = _load_notes()
-    if key in notes:
-        del notes[key]
-        _save_notes(notes)
+        # Clean up note
+        if key in _load_notes():
+            _set_note(key, "")
 
-    return web.json_response({"deleted": key})
+    await run_blocking(FS, delete)
+    return json_response({"deleted": key})
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    sessions = _list_sessions(None)
+    for session in sessions[:WARM_SESSIONS]:
+        throttle.read(SESSIONS_DIR / session["filename"])
+    return len(sessions)
 
 
 def setup(app: web.Application):
+    warmup.add(app, "sessions", _warm)
+
     app.router.add_get("/api/sessions", list_sessions)
     app.router.add_get("/api/sessions/{key}", get_session)
     app.router.add_patch("/api/sessions/{key}", update_session_note)
@@ -1,19 +1,46 @@
 """Skills management endpoints.
 
 Scans workspace/skills/ for skill directories, parses SKILL.md frontmatter.
+The catalog is rebuilt only when the workspace tree changed, and a
+SKILL.md is only re-read and re-parsed when its size or mtime changed.
+Skills move between hosts as zip archives (export/import), streamed in
+both directions.
 """
 
 import os
 import re
+import shutil
+import tempfile
+import threading
+import zipfile
 from pathlib import Path
 
 from aiohttp import web
 
 from dashboard.config import WORKSPACE_DIR
+from dashboard.routes.memory import ALLOWED_EXTENSIONS, record_version, save_from_body
+from dashboard.utils import warmup
+from dashboard.utils.codec import json_response
+from dashboard.utils.etag import cache_headers, not_modified, version_tag
+from dashboard.utils.executor import BULK, FS, run_blocking
 from dashboard.utils.sanitize import safe_resolve
+from dashboard.utils.text_patch import read_versioned
+from dashboard.utils.workspace_tree import FileInfo, workspace_tree
+from dashboard.utils.zipstream import stream_zip
 
 SKILLS_DIR = WORKSPACE_DIR / "skills"
 
+MAX_IMPORT_BYTES = 50 * 1024 * 1024          # uploaded archive
+MAX_IMPORT_UNPACKED = 200 * 1024 * 1024      # total uncompressed size
+MAX_IMPORT_FILES = 5000
+
+# skill id -> (SKILL.md FileInfo, parsed frontmatter)
+_frontmatter: dict[str, tuple[FileInfo, dict]] = {}
+# (workspace tree stamp, catalog)
+_catalog: tuple[tuple[str, int], list[dict]] | None = None
+# Scans run in FS pool threads; both caches are only touched under this lock
+_scan_lock = threading.Lock()
+
 
 def _parse_frontmatter(text: str) -> dict:
     """Extract YAML frontmatter from a SKILL.md file (simple parser)."""
@@ -32,46 +59,66 @@ def _parse_frontmatter(text: str) -> dict:
     return fm
 
 
+def _skill_frontmatter(name: str, info: FileInfo) -> dict:
+    cached = _frontmatter.get(name)
+    if cached is not None and cached[0] == info:
+        return cached[1]
+    try:
+        fm = _parse_frontmatter((SKILLS_DIR / name / "SKILL.md").read_text(encoding="utf-8"))
+    except Exception:
+        fm = {}
+    _frontmatter[name] = (info, fm)
+    return fm
+
+
 def _scan_skills() -> list[dict]:
-    """Scan skills directory for all skill definitions."""
-    skills = []
-    if not SKILLS_DIR.exists():
-        return skills
+    """List all skill definitions (directory listings come from the workspace tree cache)."""
+    with _scan_lock:
+        return _build_catalog()
 
-    for entry in sorted(SKILLS_DIR.iterdir()):
-        if not entry.is_dir() or entry.name.startswith("."):
-            continue
 
-        skill_md = entry / "SKILL.md"
+def _build_catalog() -> list[dict]:
+    global _catalog
+    listing = workspace_tree.listdir("skills")
+    stamp = workspace_tree.stamp
+    if _catalog is not None and _catalog[0] == stamp:
+        return _catalog[1]
+
+    skills = []
+    names = [name for name in listing[0] if not name.startswith(".")] if listing else []
+    for name in names:
+        _subdirs, files = workspace_tree.listdir(f"skills/{name}") or ([], {})
+
         info: dict = {
-            "id": entry.name,
-            "name": entry.name,
+            "id": name,
+            "name": name,
             "description": "",
-            "hasSkillMd": skill_md.exists(),
+            "hasSkillMd": "SKILL.md" in files,
             "files": [],
         }
 
-        if skill_md.exists():
-            try:
-                content = skill_md.read_text(encoding="utf-8")
-                fm = _parse_frontmatter(content)
-                info["name"] = fm.get("name", entry.name)
-                info["description"] = fm.get("description", "")
-            except Exception:
-                pass
+        if info["hasSkillMd"]:
+            fm = _skill_frontmatter(name, files["SKILL.md"])
+            info["name"] = fm.get("name", name)
+            info["description"] = fm.get("description", "")
 
         # List files in skill dir
-        for f in sorted(entry.iterdir()):
-            if f.is_file() and not f.name.startswith("."):
-                info["files"].append(f.name)
+        info["files"] = sorted(f for f in files if not f.startswith("."))
 
         skills.append(info)
+
+    for name in set(_frontmatter).difference(names):
+        _frontmatter.pop(name, None)
+    _catalog = (stamp, skills)
     return skills
 
 
 async def list_skills(request: web.Request) -> web.Response:
-    skills = _scan_skills()
-    return web.json_response({"skills": skills})
+    etag = version_tag("skills", await run_blocking(FS, workspace_tree.version))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    skills = await run_blocking(FS, _scan_skills)
+    return json_response({"skills": skills}, headers=cache_headers(etag))
 
 
 async def get_skill_file(request: web.Request) -> web.Response:
@@ -84,20 +131,23 @@ async def get_skill_file(request: web.Request) -> web.Response:
     except ValueError:
         raise web.HTTPForbidden(text="Path traversal detected")
 
-    if not filepath.exists() or not filepath.is_file():
-        raise web.HTTPNotFound(text="File not found")
+    def read():
+        if not filepath.exists() or not filepath.is_file():
+            raise web.HTTPNotFound(text="File not found")
+        return (*read_versioned(filepath), filepath.stat().st_size)
 
-    content = filepath.read_text(encoding="utf-8")
-    return web.json_response({
+    content, etag, size = await run_blocking(FS, read)
+    return json_response({
         "skill": skill_id,
         "filename": filename,
         "content": content,
-        "sizeBytes": filepath.stat().st_size,
-    })
+        "sizeBytes": size,
+        "etag": etag,
+    }, headers={"ETag": etag})
 
 
 async def update_skill_file(request: web.Request) -> web.Response:
-    """Update a file in a skill directory."""
+    """Update a file in a skill directory (full content or edits, see memory.save_from_body)."""
     skill_id = request.match_info["id"]
     filename = request.match_info["filename"]
 
@@ -106,25 +156,19 @@ async def update_skill_file(request: web.Request) -> web.Response:
     except ValueError:
         raise web.HTTPForbidden(text="Path traversal detected")
 
-    body = await request.json()
-    content = body.get("content")
-    if content is None:
-        raise web.HTTPBadRequest(text="Content is required")
-
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    filepath.write_text(content, encoding="utf-8")
+    etag, size = await run_blocking(FS, save_from_body, filepath, await request.json())
 
-    return web.json_response({
+    return json_response({
         "skill": skill_id,
         "filename": filename,
-        "sizeBytes": filepath.stat().st_size,
+        "sizeBytes": size,
+        "etag": etag,
         "updated": True,
-    })
+    }, headers={"ETag": etag})
 
 
 async def delete_skill(request: web.Request) -> web.Response:
     """Delete a skill directory."""
-    import shutil
     skill_id = request.match_info["id"]
 
     try:
@@ -132,15 +176,155 @@ async def delete_skill(request: web.Request) -> web.Response:
     except ValueError:
         raise web.HTTPForbidden(text="Path traversal detected")
 
-    if not dirpath.exists() or not dirpath.is_dir():
-        raise web.HTTPNotFound(text="Skill not found")
+    def delete():
+        if not dirpath.exists() or not dirpath.is_dir():
+            raise web.HTTPNotFound(text="Skill not found")
+        _record_deleted(dirpath)
+        shutil.rmtree(str(dirpath))
+        workspace_tree.invalidate(os.path.relpath(dirpath, WORKSPACE_DIR))
+
+    await run_blocking(BULK, delete)
+    return json_response({"deleted": skill_id})
+
+
+def _record_deleted(dirpath: Path):
+    """Keep a skill's text files in the version history so it can be restored."""
+    for root, _dirs, files in os.walk(dirpath):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] in ALLOWED_EXTENSIONS:
+                try:
+                    with open(path, "rb") as f:
+                        record_version(os.path.relpath(path, WORKSPACE_DIR), f.read(), None)
+                except OSError:
+                    pass
+
+
+async def export_skills(request: web.Request) -> web.StreamResponse:
+    """GET /api/skills/export?ids=a,b — zip of the given skills (default: all), streamed."""
+    wanted = [i for i in request.query.get("ids", "").split(",") if i]
+    entries = await run_blocking(FS, _export_entries, wanted)
+    filename = f"skills-{wanted[0]}.zip" if len(wanted) == 1 else "skills.zip"
+    return await stream_zip(request, entries, filename)
+
+
+def _export_entries(wanted: list[str]) -> list[tuple[str, Path]]:
+    listing = workspace_tree.listdir("skills")
+    available = [n for n in listing[0] if not n.startswith(".")] if listing else []
+    missing = set(wanted).difference(available)
+    if missing:
+        raise web.HTTPNotFound(text=f"Skill not found: {', '.join(sorted(missing))}")
+
+    entries = []
+    for name in wanted or available:
+        for rel, _subdirs, files in workspace_tree.walk(f"skills/{name}", skip=lambda d: d.startswith(".")):
+            for filename in sorted(files):
+                if filename.startswith("."):
+                    continue
+                # Archive names are relative to skills/: <id>/<path>
+                arcname = f"{rel.removeprefix('skills/')}/{filename}"
+                entries.append((arcname, WORKSPACE_DIR / rel / filename))
+    return entries
+
+
+def _check_archive(zf: zipfile.ZipFile) -> dict[str, list[zipfile.ZipInfo]]:
+    """Validate an uploaded archive; returns its file entries grouped by skill id."""
+    skills: dict[str, list[zipfile.ZipInfo]] = {}
+    total = 0
+    infos = zf.infolist()
+    if len(infos) > MAX_IMPORT_FILES:
+        raise ValueError(f"Too many files (max {MAX_IMPORT_FILES})")
+    for info in infos:
+        if info.is_dir():
+            continue
+        parts = info.filename.split("/")
+        if (len(parts) < 2 or info.filename.startswith("/") or "\\" in info.filename
+                or any(p in ("", ".", "..") for p in parts)):
+            raise ValueError(f"Invalid path in archive: {info.filename}")
+        if (info.external_attr >> 16) & 0o170000 == 0o120000:
+            raise ValueError(f"Symlinks are not allowed: {info.filename}")
+        total += info.file_size
+        if total > MAX_IMPORT_UNPACKED:
+            raise ValueError(f"Archive unpacks to more than {MAX_IMPORT_UNPACKED // (1024 * 1024)} MB")
+        if parts[0].startswith("."):
+            raise ValueError(f"Invalid skill name: {parts[0]}")
+        skills.setdefault(parts[0], []).append(info)
+    if not skills:
+        raise ValueError("Archive contains no skills")
+    return skills
+
 
-    shutil.rmtree(str(dirpath))
-    return web.json_response({"deleted": skill_id})
+def _install(archive: str, overwrite: bool) -> dict:
+    with zipfile.ZipFile(archive) as zf:
+        skills = _check_archive(zf)
+        existing = sorted(n for n in skills if (SKILLS_DIR / n).exists())
+        if existing and not overwrite:
+            raise FileExistsError(", ".join(existing))
+
+        SKILLS_DIR.mkdir(parents=True, exist_ok=True)
+        files = 0
+        for name, infos in skills.items():
+            target = safe_resolve(SKILLS_DIR, name)
+            staging = Path(tempfile.mkdtemp(dir=SKILLS_DIR, prefix=f".import-{name}-"))
+            try:
+                for info in infos:
+                    dest = safe_resolve(staging, info.filename.split("/", 1)[1])
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    with zf.open(info) as src, open(dest, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 256 * 1024)
+                    files += 1
+                staging.chmod(0o755)
+                # Swap the finished tree in; an existing skill is replaced whole
+                if target.exists():
+                    _record_deleted(target)
+                    old = Path(tempfile.mkdtemp(dir=SKILLS_DIR, prefix=f".replaced-{name}-"))
+                    os.replace(target, old / name)
+                    os.replace(staging, target)
+                    shutil.rmtree(old, ignore_errors=True)
+                else:
+                    os.replace(staging, target)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            workspace_tree.invalidate(os.path.relpath(target, WORKSPACE_DIR))
+    return {"imported": sorted(skills), "files": files}
+
+
+async def import_skills(request: web.Request) -> web.Response:
+    """POST /api/skills/import?overwrite=1 — install skills from a zip body (<id>/<path> entries)."""
+    overwrite = request.query.get("overwrite") in ("1", "true")
+    fd, archive = tempfile.mkstemp(prefix="skills-import-", suffix=".zip")
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.content.iter_chunked(256 * 1024):
+                size += len(chunk)
+                if size > MAX_IMPORT_BYTES:
+                    raise web.HTTPRequestEntityTooLarge(max_size=MAX_IMPORT_BYTES, actual_size=size)
+                await run_blocking(FS, f.write, chunk)
+        try:
+            result = await run_blocking(BULK, _install, archive, overwrite)
+        except zipfile.BadZipFile:
+            raise web.HTTPBadRequest(text="Not a zip archive")
+        except FileExistsError as e:
+            return json_response({"error": f"Skill already exists: {e}"}, status=409)
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+    finally:
+        os.unlink(archive)
+    return json_response(result)
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    return len(_scan_skills())
 
 
 def setup(app: web.Application):
+    warmup.add(app, "skills", _warm)
+
     app.router.add_get("/api/skills", list_skills)
+    app.router.add_get("/api/skills/export", export_skills)
+    app.router.add_post("/api/skills/import", import_skills)
     app.router.add_get("/api/skills/{id}/{filename}", get_skill_file)
     app.router.add_put("/api/skills/{id}/{filename}", update_skill_file)
+    app.router.add_patch("/api/skills/{id}/{filename}", update_skill_file)
     app.router.add_delete("/api/skills/{id}", delete_skill)
@@ -1,12 +1,26 @@
 """System status endpoint."""
 
-import json
+import asyncio
+import time
 
 from aiohttp import web
 
-from dashboard.config import NANOBOT_ROOT
-from dashboard.utils.nanobot import is_gateway_running, read_config, read_cron_jobs
+from dashboard.config import STATUS_HISTORY_FILE
+from dashboard.utils import cluster, executor, warmup
+from dashboard.utils.codec import json_response
+from dashboard.utils.executor import FS, run_blocking
+from dashboard.utils.filecache import file_cache
+from dashboard.utils.nanobot import GatewayProbe, is_gateway_running, read_config, read_cron_jobs, read_state
 from dashboard.utils.sanitize import sanitize_config
+from dashboard.utils.timeseries import ResourceHistory
+from dashboard.utils.workspace_tree import workspace_tree
+
+SAMPLE_INTERVAL = 1.0   # seconds between gateway samples
+PERSIST_INTERVAL = 60   # seconds between history snapshots on disk
+DEFAULT_WINDOW = 3600   # /api/status/history default range (last hour)
+
+history_key = web.AppKey("status_history", ResourceHistory)
+sampler_key = web.AppKey("status_sampler", asyncio.Task)
 
 
 def _read_active_models(config: dict) -> dict:
@@ -16,44 +30,125 @@ def _read_active_models(config: dict) -> dict:
         "model": defaults.get("model", "unknown"),
         "compact_model": defaults.get("compact_model", ""),
     }
-    state_file = NANOBOT_ROOT / ".state.json"
-    if state_file.is_file():
-        try:
-            data = json.loads(state_file.read_text(encoding="utf-8"))
-            if data.get("model"):
-                result["model"] = data["model"]
-            if data.get("compact_model"):
-                result["compact_model"] = data["compact_model"]
-        except Exception:
-            pass
+    state = read_state()
+    if isinstance(state, dict):
+        if state.get("model"):
+            result["model"] = state["model"]
+        if state.get("compact_model"):
+            result["compact_model"] = state["compact_model"]
     return result
 
 
-async def get_status(request: web.Request) -> web.Response:
+async def collect_status() -> dict:
+    """Gateway, model, channel and cron summary (GET /api/status and the ws status channel)."""
     gateway = await is_gateway_running()
 
-    config = read_config()
-    models = _read_active_models(config)
+    config = await run_blocking(FS, read_config)
+    models = await run_blocking(FS, _read_active_models, config)
 
     channels = {}
     for name, ch in config.get("channels", {}).items():
         channels[name] = {"enabled": ch.get("enabled", False)}
 
-    cron_data = read_cron_jobs()
+    cron_data = await run_blocking(FS, read_cron_jobs)
     jobs = cron_data.get("jobs", [])
     cron_summary = {
         "total": len(jobs),
         "enabled": sum(1 for j in jobs if j.get("enabled")),
     }
 
-    return web.json_response({
+    return {
         "gateway": gateway,
         "model": models["model"],
         "compactModel": models["compact_model"],
         "channels": channels,
         "cron": cron_summary,
-    })
+    }
+
+
+async def get_status(request: web.Request) -> web.Response:
+    return json_response(await collect_status())
+
+
+async def get_cache_stats(request: web.Request) -> web.Response:
+    """GET /api/status/cache — shared file cache counters and workspace tree state."""
+    return json_response({**file_cache.stats(), "workspaceTree": workspace_tree.stats()})
+
+
+async def get_io_stats(request: web.Request) -> web.Response:
+    """GET /api/status/io — per-pool thread, queue depth and wait time counters."""
+    return json_response(executor.stats())
+
+
+async def get_history(request: web.Request) -> web.Response:
+    """GET /api/status/history?from=&to=&step= — gateway cpu/rss time series (unix seconds)."""
+    now = time.time()
+    try:
+        to = float(request.query.get("to", now))
+        frm = float(request.query.get("from", to - DEFAULT_WINDOW))
+        step = int(request.query["step"]) if "step" in request.query else None
+    except ValueError:
+        raise web.HTTPBadRequest(text="from, to and step must be numbers")
+    if frm >= to:
+        raise web.HTTPBadRequest(text="from must be before to")
+    if step is not None and step <= 0:
+        raise web.HTTPBadRequest(text="step must be positive")
+
+    return json_response(request.app[history_key].query(frm, to, now, step))
+
+
+async def _sample_loop(app: web.Application):
+    history = app[history_key]
+    probe = GatewayProbe()
+    last_saved = time.monotonic()
+    while True:
+        started = time.monotonic()
+        try:
+            sample = await probe.sample()
+            history.add(time.time(), sample["cpu"], sample["rss"], sample["up"])
+            if started - last_saved >= PERSIST_INTERVAL:
+                await run_blocking(FS, history.save, STATUS_HISTORY_FILE)
+                last_saved = started
+        except Exception:
+            pass
+        await asyncio.sleep(max(0.0, SAMPLE_INTERVAL - (time.monotonic() - started)))
+
+
+async def _start_sampler(app: web.Application):
+    if not cluster.is_primary():
+        return  # the primary samples; /api/status/history is forwarded to it
+    app[history_key].load(STATUS_HISTORY_FILE)
+    app[sampler_key] = asyncio.create_task(_sample_loop(app))
+
+
+async def _stop_sampler(app: web.Application):
+    task = app.get(sampler_key)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        try:
+            app[history_key].save(STATUS_HISTORY_FILE)
+        except OSError:
+            pass
+
+
+def _warm(throttle: warmup.Throttle) -> int:
+    read_config()
+    read_cron_jobs()
+    read_state()
+    return 3
 
 
 def setup(app: web.Application):
+    warmup.add(app, "config", _warm)
+    app[history_key] = ResourceHistory()
+    app.on_startup.append(_start_sampler)
+    app.on_cleanup.append(_stop_sampler)
+
     app.router.add_get("/api/status", get_status)
+    app.router.add_get("/api/status/history", get_history)
+    app.router.add_get("/api/status/cache", get_cache_stats)
+    app.router.add_get("/api/status/io", get_io_stats)
@@ -0,0 +1,244 @@
+"""Multiplexed WebSocket — chat streams, log follows and status pushes on one socket.
+
+A browser tab opens one socket and runs any number of channels over it,
+each identified by a positive integer the client picks:
+
+    → {"op": "open", "ch": 1, "type": "chat", "message": ..., "session_id": ..., "context": ...}
+    → {"op": "open", "ch": 2, "type": "logs", "name": "gateway.log", "lines": 500}
+    → {"op": "open", "ch": 3, "type": "status", "interval": 5}
+    → {"op": "credit", "ch": 2, "n": 32}
+    → {"op": "close", "ch": 2}
+    ← {"ch": 1, "event": "delta", "data": {...}}
+    ← {"ch": 1, "event": "closed", "data": {"reason": "done" | "cancelled" | "busy" | "error", ...}}
+
+Chat channels carry the same events as the SSE stream of POST /api/chat
+(plus a first `session` event), log channels send `lines`, status channels
+send `status` when it changes and the latest gateway `sample` every interval.
+
+Flow control is credit based: opening a channel grants `credit` messages
+(default INITIAL_CREDIT) and every message on it spends one. A channel out
+of credit stops producing — a chat stops reading agent output, a log
+follow stops reading the file — until the client sends more. `closed` and
+channel 0 (connection errors) are not metered.
+
+Browsers can't set headers on a WebSocket, so the token may be given as
+?token= instead (see utils/auth.py).
+"""
+
+import asyncio
+import secrets
+
+from aiohttp import WSCloseCode, WSMsgType, web
+
+from dashboard.routes.chat import limiter_key, run_admitted, with_context
+from dashboard.routes.logs import follow_log
+from dashboard.routes.status import collect_status, history_key
+from dashboard.utils.chat_limiter import ChatBusy
+from dashboard.utils.codec import dumps_str, loads
+
+INITIAL_CREDIT = 64
+MAX_CREDIT = 10_000
+MAX_CHANNELS = 32
+HEARTBEAT = 30             # seconds between pings
+MIN_STATUS_INTERVAL = 1.0
+
+sockets_key = web.AppKey("ws_sockets", set)
+
+
+class ChannelError(Exception):
+    def __init__(self, message: str, reason: str = "error"):
+        super().__init__(message)
+        self.reason = reason
+
+
+class Channel:
+    def __init__(self, conn: "Connection", ch: int, credit: int):
+        self.conn = conn
+        self.ch = ch
+        self.credit = credit
+        self.closing = False
+        self.task: asyncio.Task | None = None
+        self._credited = asyncio.Event()
+
+    def grant(self, n: int):
+        self.credit = min(self.credit + n, MAX_CREDIT)
+        if self.credit > 0:
+            self._credited.set()
+
+    async def emit(self, event: str, data):
+        """Send one message on this channel, waiting for credit first."""
+        while self.credit <= 0:
+            self._credited.clear()
+            await self._credited.wait()
+        self.credit -= 1
+        await self.conn.send(self.ch, event, data)
+
+
+class Connection:
+    def __init__(self, request: web.Request, ws: web.WebSocketResponse):
+        self.request = request
+        self.ws = ws
+        self.channels: dict[int, Channel] = {}
+        self._lock = asyncio.Lock()
+
+    async def send(self, ch: int, event: str, data):
+        frame = dumps_str({"ch": ch, "event": event, "data": data})
+        async with self._lock:
+            await self.ws.send_str(frame)
+
+    async def dispatch(self, msg: dict):
+        op = msg.get("op")
+        ch = msg.get("ch")
+        if not isinstance(ch, int) or isinstance(ch, bool) or ch <= 0:
+            await self.send(0, "error", {"message": "ch must be a positive integer"})
+            return
+        if op == "open":
+            await self._open(ch, msg)
+        elif op == "credit":
+            channel = self.channels.get(ch)
+            n = msg.get("n")
+            if channel is not None and isinstance(n, int) and n > 0:
+                channel.grant(n)
+        elif op == "close":
+            channel = self.channels.get(ch)
+            if channel is not None:
+                channel.closing = True
+                channel.task.cancel()
+        else:
+            await self.send(0, "error", {"message": f"unknown op: {op!r}"})
+
+    async def _open(self, ch: int, msg: dict):
+        handler = CHANNEL_TYPES.get(msg.get("type"))
+        error = None
+        if ch in self.channels:
+            error = f"channel {ch} is already open"
+        elif len(self.channels) >= MAX_CHANNELS:
+            error = f"too many channels (max {MAX_CHANNELS})"
+        elif handler is None:
+            error = f"unknown channel type: {msg.get('type')!r}"
+        if error:
+            await self.send(ch, "closed", {"reason": "error", "message": error})
+            return
+        credit = msg.get("credit", INITIAL_CREDIT)
+        if not isinstance(credit, int) or credit <= 0:
+            credit = INITIAL_CREDIT
+        channel = Channel(self, ch, min(credit, MAX_CREDIT))
+        self.channels[ch] = channel
+        channel.task = asyncio.create_task(self._run(channel, handler, msg))
+
+    async def _run(self, channel: Channel, handler, msg: dict):
+        try:
+            await handler(self.request, channel, msg)
+            result = {"reason": "done"}
+        except asyncio.CancelledError:
+            if channel.closing:
+                raise
+            # Cancelled from elsewhere, e.g. DELETE /api/chat/{session_id}/active
+            result = {"reason": "cancelled"}
+        except ChannelError as e:
+            result = {"reason": e.reason, "message": str(e)}
+        except ConnectionResetError:
+            return
+        except Exception as e:
+            result = {"reason": "error", "message": str(e)}
+        finally:
+            self.channels.pop(channel.ch, None)
+        if not self.ws.closed:
+            try:
+                await self.send(channel.ch, "closed", result)
+            except ConnectionResetError:
+                pass
+
+    async def close_all(self):
+        tasks = []
+        for channel in list(self.channels.values()):
+            channel.closing = True
+            channel.task.cancel()
+            tasks.append(channel.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _chat_channel(request: web.Request, channel: Channel, msg: dict):
+    message = (msg.get("message") or "").strip()
+    if not message:
+        raise ChannelError("message is required")
+    session_id = msg.get("session_id") or f"dashboard_chat_{secrets.token_hex(4)}"
+    try:
+        ticket = request.app[limiter_key].enqueue(session_id)
+    except ChatBusy as e:
+        raise ChannelError(str(e), reason="busy")
+    try:
+        await channel.emit("session", {"session_id": session_id})
+        await run_admitted(request.app, ticket, with_context(message, msg.get("context")), channel.emit)
+    finally:
+        # The emit may fail or the channel be cancelled before run_admitted takes over the ticket
+        request.app[limiter_key].release(ticket)
+
+
+async def _logs_channel(request: web.Request, channel: Channel, msg: dict):
+    try:
+        lines = int(msg.get("lines", 500))
+        await follow_log(str(msg.get("name", "")), lines, channel.emit)
+    except ValueError as e:
+        raise ChannelError(str(e))
+
+
+async def _status_channel(request: web.Request, channel: Channel, msg: dict):
+    try:
+        interval = max(MIN_STATUS_INTERVAL, float(msg.get("interval", 5)))
+    except (TypeError, ValueError):
+        raise ChannelError("interval must be a number")
+    history = request.app.get(history_key)
+    last = None
+    while True:
+        status = await collect_status()
+        if status != last:
+            await channel.emit("status", status)
+            last = status
+        if history is not None and history.latest is not None:
+            await channel.emit("sample", history.latest)
+        await asyncio.sleep(interval)
+
+
+CHANNEL_TYPES = {
+    "chat": _chat_channel,
+    "logs": _logs_channel,
+    "status": _status_channel,
+}
+
+
+async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+    """GET /api/ws — multiplexed WebSocket (see module docstring)."""
+    ws = web.WebSocketResponse(heartbeat=HEARTBEAT, max_msg_size=1024 * 1024)
+    await ws.prepare(request)
+    conn = Connection(request, ws)
+    request.app[sockets_key].add(ws)
+    try:
+        async for frame in ws:
+            if frame.type != WSMsgType.TEXT:
+                continue
+            try:
+                msg = loads(frame.data)
+            except ValueError:
+                await conn.send(0, "error", {"message": "invalid JSON"})
+                continue
+            if not isinstance(msg, dict):
+                await conn.send(0, "error", {"message": "expected a JSON object"})
+                continue
+            await conn.dispatch(msg)
+    finally:
+        request.app[sockets_key].discard(ws)
+        await conn.close_all()
+    return ws
+
+
+async def _close_sockets(app: web.Application):
+    for ws in list(app[sockets_key]):
+        await ws.close(code=WSCloseCode.GOING_AWAY, message=b"server shutdown")
+
+
+def setup(app: web.Application):
+    app[sockets_key] = set()
+    app.on_shutdown.append(_close_sockets)
+
+    app.router.add_get("/api/ws", ws_handler)
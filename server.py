@@ -1,5 +1,6 @@
 """Nanobot Dashboard — standalone web dashboard for nanobot."""
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -8,13 +9,24 @@ from aiohttp import web
 # Ensure dashboard package is importable
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dashboard.config import HOST, PORT
+from dashboard.config import HOST, PORT, WORKERS
+from dashboard.utils import cluster, executor
+from dashboard.utils.admission import admission_middleware
 from dashboard.utils.auth import auth_middleware
-from dashboard.routes import status, sessions, cron, memory, config_view, skills, logs, media, chat, search
+from dashboard.utils.compress import compression_middleware
+from dashboard.utils.metrics import metrics_middleware
+from dashboard.utils.trace import tracing_middleware
+from dashboard.routes import status, sessions, cron, memory, config_view, skills, logs, media, chat, search, ws, history, metrics, debug, ready, events
+
+
+async def _shutdown_executor(app: web.Application):
+    executor.shutdown()
 
 
 def create_app() -> web.Application:
-    app = web.Application(middlewares=[auth_middleware])
+    # Metrics outermost: latency includes auth and compression, 401s are counted
+    app = web.Application(middlewares=[metrics_middleware, tracing_middleware, cluster.cluster_middleware,
+                                       compression_middleware, auth_middleware, admission_middleware])
 
     # Register API routes
     status.setup(app)
@@ -27,6 +39,15 @@ def create_app() -> web.Application:
     media.setup(app)
     chat.setup(app)
     search.setup(app)
+    ws.setup(app)
+    history.setup(app)
+    metrics.setup(app)
+    debug.setup(app)
+    ready.setup(app)
+    events.setup(app)
+    cluster.setup(app)
+    # Last, so cleanup hooks above can still use the pools
+    app.on_cleanup.append(_shutdown_executor)
 
     # Serve frontend static files
     static_dir = Path(__file__).parent / "static"
@@ -46,6 +67,15 @@ def create_app() -> web.Application:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Nanobot Dashboard")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="server processes sharing the port via SO_REUSEPORT (default: %(default)s)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        print(f"Nanobot Dashboard starting on http://{HOST}:{PORT} with {args.workers} workers")
+        cluster.serve(create_app, HOST, PORT, args.workers)
+        return
+
     app = create_app()
     print(f"Nanobot Dashboard starting on http://{HOST}:{PORT}")
     web.run_app(app, host=HOST, port=PORT, print=None)
@@ -0,0 +1,27 @@
+"""Test setup: an empty nanobot root, set before dashboard.config is imported.
+
+Run from the repository checkout (a directory named `dashboard`):
+
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure dashboard package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+_root = tempfile.mkdtemp(prefix="nanobot-test-")
+os.environ["NANOBOT_ROOT"] = _root
+os.environ["NANOBOT_DASHBOARD_DATA"] = os.path.join(_root, ".dashboard")
+os.environ["NANOBOT_DASHBOARD_TOKEN"] = ""
+os.environ["NANOBOT_DASHBOARD_WARMUP"] = "0"
+
+pytest_plugins = ("aiohttp.pytest_plugin",)
+
+
+def pytest_configure(config):
+    # Its fixtures are all these tests need; pytest-aiohttp isn't required
+    config.addinivalue_line("filterwarnings", "ignore:aiohttp.pytest_plugin will be removed:DeprecationWarning")
@@ -0,0 +1,56 @@
+import asyncio
+import sys
+import textwrap
+
+from dashboard.utils import agent_pool
+from dashboard.utils.agent_pool import EVENT_QUEUE, AgentWorker
+
+# Answers each chat with `count` deltas as fast as it can write them
+FAKE_WORKER = textwrap.dedent("""
+    import json, os, sys
+    def emit(msg):
+        sys.stdout.write(json.dumps(msg) + "\\n"); sys.stdout.flush()
+    emit({"type": "ready", "pid": os.getpid()})
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if msg["type"] == "ping":
+            emit({"type": "pong", "id": msg["id"]})
+        elif msg["type"] == "chat":
+            for i in range(int(msg["message"])):
+                emit({"type": "delta", "id": msg["id"], "text": "x" * 100})
+            emit({"type": "done", "id": msg["id"], "response": ""})
+""")
+
+
+async def _worker(tmp_path) -> AgentWorker:
+    script = tmp_path / "worker.py"
+    script.write_text(FAKE_WORKER)
+    worker = AgentWorker(0, [sys.executable, str(script)])
+    await worker.start()
+    return worker
+
+
+async def test_events_queue_is_bounded_while_the_consumer_stalls(tmp_path):
+    worker = await _worker(tmp_path)
+    try:
+        chat = worker.chat("5000", "s")
+        assert (await chat.__anext__())["type"] == "delta"
+        await asyncio.sleep(0.3)            # consumer stalls; the worker keeps writing
+        assert worker._events.qsize() <= EVENT_QUEUE
+        received = 1 + sum([1 async for _ in chat])
+        assert received == 5001
+    finally:
+        await worker.kill()
+
+
+async def test_abandoned_chat_does_not_wedge_the_read_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_pool, "EVENT_QUEUE", 2)
+    worker = await _worker(tmp_path)
+    try:
+        chat = worker.chat("100", "s")
+        await chat.__anext__()
+        await asyncio.sleep(0.1)            # read loop now blocks on the full queue
+        await chat.aclose()
+        assert await worker.ping()
+    finally:
+        await worker.kill()
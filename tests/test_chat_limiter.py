@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from dashboard.routes import chat
+from dashboard.utils.chat_limiter import ChatBusy, ChatLimiter
+
+
+async def test_admits_up_to_max_active_then_queues_in_order():
+    limiter = ChatLimiter(max_active=2, max_queued=2)
+    a, b, c, d = (limiter.enqueue(s) for s in "abcd")
+    assert [t.state for t in (a, b, c, d)] == ["active", "active", "queued", "queued"]
+    assert (c.position, d.position) == (1, 2)
+    with pytest.raises(ChatBusy):
+        limiter.enqueue("e")
+
+    limiter.release(a)
+    assert c.state == "active"
+    assert d.position == 1
+    assert limiter.stats()["rejected"] == 1
+
+
+async def test_one_turn_per_session():
+    limiter = ChatLimiter(max_active=4, max_queued=4)
+    first = limiter.enqueue("s")
+    second = limiter.enqueue("s")
+    other = limiter.enqueue("t")
+    assert (first.state, second.state, other.state) == ("active", "queued", "active")
+    limiter.release(first)
+    assert second.state == "active"
+
+
+async def test_session_queue_is_bounded():
+    limiter = ChatLimiter(max_active=1, max_queued=10)
+    limiter.enqueue("s")
+    limiter.enqueue("s")
+    limiter.enqueue("s")
+    with pytest.raises(ChatBusy):
+        limiter.enqueue("s")
+
+
+async def test_release_is_idempotent():
+    limiter = ChatLimiter(max_active=1, max_queued=1)
+    first = limiter.enqueue("a")
+    waiting = limiter.enqueue("b")
+    limiter.release(first)
+    assert waiting.state == "active"
+    limiter.release(first)
+    assert waiting.state == "active"
+    assert limiter.stats()["active"] == ["b"]
+
+
+async def test_wait_reports_positions_until_admitted():
+    limiter = ChatLimiter(max_active=1, max_queued=2)
+    running = limiter.enqueue("a")
+    limiter.enqueue("b")
+    last = limiter.enqueue("c")
+    positions = []
+
+    async def on_position(n):
+        positions.append(n)
+
+    waiter = asyncio.create_task(limiter.wait(last, on_position))
+    await asyncio.sleep(0)
+    limiter.release(running)
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    limiter.release(next(t for t in limiter._active))
+    await asyncio.wait_for(waiter, 1)
+    assert positions == [2, 1]
+    assert last.state == "active"
+
+
+async def test_cancel_session_cancels_running_and_queued():
+    limiter = ChatLimiter(max_active=1, max_queued=2)
+    tickets = [limiter.enqueue("s"), limiter.enqueue("s")]
+    for ticket in tickets:
+        ticket.task = asyncio.create_task(asyncio.sleep(10))
+    assert limiter.cancel_session("s") == 2
+    await asyncio.sleep(0)
+    assert all(t.task.cancelled() for t in tickets)
+
+
+async def test_chat_send_releases_ticket_when_sse_prepare_fails(aiohttp_client, monkeypatch):
+    async def gone(request):
+        raise ConnectionResetError("client went away")
+
+    monkeypatch.setattr(chat, "prepare_sse", gone)
+    app = web.Application()
+    app[chat.limiter_key] = limiter = ChatLimiter(1, 0)
+    app.router.add_post("/api/chat", chat.chat_send)
+    client = await aiohttp_client(app)
+
+    for _ in range(2):
+        resp = await client.post("/api/chat", json={"message": "hi", "session_id": "s"})
+        assert resp.status == 500   # not 429: the first failure gave the slot back
+    assert limiter.stats()["active"] == []
@@ -0,0 +1,50 @@
+import importlib
+import json
+import sys
+from types import ModuleType
+
+from dashboard.utils import codec
+
+JSONL = b'{"a": 1}\n\nnot json\n[2]\n'
+
+
+class _DecodeError(ValueError):
+    pass
+
+
+class _Decoder:
+    # A msgspec release from before Decoder.decode_lines existed
+    def decode(self, data):
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise _DecodeError(str(e))
+
+
+class _Encoder:
+    def encode(self, obj):
+        return json.dumps(obj).encode()
+
+
+def _old_msgspec() -> ModuleType:
+    mod = ModuleType("msgspec")
+    mod.DecodeError = _DecodeError
+    mod.json = ModuleType("msgspec.json")
+    mod.json.Decoder, mod.json.Encoder = _Decoder, _Encoder
+    return mod
+
+
+def test_iter_jsonl_skips_blank_and_invalid_lines():
+    assert list(codec.iter_jsonl(JSONL)) == [{"a": 1}, [2]]
+
+
+def test_iter_jsonl_without_msgspec_decode_lines(monkeypatch):
+    try:
+        with monkeypatch.context() as m:
+            m.setitem(sys.modules, "orjson", None)
+            m.setitem(sys.modules, "msgspec", _old_msgspec())
+            importlib.reload(codec)
+            assert codec.BACKEND == "msgspec"
+            assert list(codec.iter_jsonl(JSONL)) == [{"a": 1}, [2]]
+    finally:
+        importlib.reload(codec)
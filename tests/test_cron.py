@@ -0,0 +1,112 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+
+from dashboard.routes import cron
+from dashboard.utils.cron_store import cron_store
+from dashboard.utils.cronexpr import CronError, compile_cron, get_zone, schedule_fires
+
+UTC = timezone.utc
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_fields_lists_ranges_steps_and_names():
+    expr = compile_cron("*/15 9-17/4 * jan,JUL mon-fri")
+    assert expr.minutes == (0, 15, 30, 45)
+    assert expr.hours == (9, 13, 17)
+    assert compile_cron("@daily").day_offsets == (0,)
+    for bad in ("* * * *", "60 * * * *", "* * 0 * *", "* * * foo *", "5-1 * * * *"):
+        with pytest.raises(CronError):
+            compile_cron(bad)
+
+
+def test_next_fires_in_utc():
+    fires = compile_cron("30 8 * * 1").next_fires(_utc(2026, 1, 1), UTC, 3)   # Thursday
+    assert fires == [_utc(2026, 1, 5, 8, 30), _utc(2026, 1, 12, 8, 30), _utc(2026, 1, 19, 8, 30)]
+
+
+def test_day_of_month_or_day_of_week():
+    # Vixie cron: both restricted means either matches
+    fires = compile_cron("0 0 13 * 5").next_fires(_utc(2026, 2, 1), UTC, 3)
+    assert fires == [_utc(2026, 2, 6), _utc(2026, 2, 13), _utc(2026, 2, 20)]
+
+
+def test_impossible_date_never_fires():
+    assert compile_cron("0 0 30 2 *").next_fires(_utc(2026, 1, 1), UTC) == []
+
+
+def test_dst_gap_is_skipped_and_overlap_fires_once():
+    berlin = get_zone("Europe/Berlin")
+    spring = compile_cron("30 2 * * *").iter_fires(_utc(2026, 3, 28), _utc(2026, 3, 31), berlin)
+    assert [t.day for t in spring] == [28, 30]   # 02:30 doesn't exist on the 29th
+    autumn = compile_cron("30 2 25 10 *").iter_fires(_utc(2026, 10, 24), _utc(2026, 10, 26), berlin)
+    assert list(autumn) == [_utc(2026, 10, 25, 0, 30)]
+
+
+def test_schedule_fires_for_every_and_at_jobs():
+    every = {"schedule": {"kind": "every", "everyMs": 1000}, "createdAtMs": 500}
+    assert schedule_fires(every, 2000, 5000, 10) == [2500, 3500, 4500]
+    at = {"schedule": {"kind": "at", "atMs": 3000}}
+    assert schedule_fires(at, 2000, 5000, 10) == [3000]
+    assert schedule_fires(at, 3000, 5000, 10) == []
+
+
+@pytest.fixture
+async def client(aiohttp_client):
+    cron_store.path.parent.mkdir(parents=True, exist_ok=True)
+    cron_store.path.write_text(json.dumps({"version": 1, "jobs": [
+        {"id": "c1", "name": "c", "enabled": True, "schedule": {"kind": "cron", "expr": "0 9 * * *"},
+         "payload": {}, "state": {}},
+        {"id": "e1", "name": "e", "enabled": True, "schedule": {"kind": "every", "everyMs": 60000},
+         "payload": {}, "state": {}},
+    ]}))
+    app = web.Application()
+    cron.setup(app)
+    return await aiohttp_client(app)
+
+
+async def test_update_changes_a_cron_schedule(client):
+    resp = await client.patch("/api/cron/jobs/c1", json={"schedule": "0 10 * * *", "tz": "UTC"})
+    assert resp.status == 200
+    assert (await resp.json())["schedule"]["expr"] == "0 10 * * *"
+
+
+async def test_update_refuses_schedule_on_non_cron_job(client):
+    resp = await client.patch("/api/cron/jobs/e1", json={"schedule": "0 10 * * *"})
+    assert resp.status == 422
+    job = next(j for j in cron_store.read()["jobs"] if j["id"] == "e1")
+    assert "expr" not in job["schedule"]
+
+
+@pytest.mark.parametrize("body", [{"schedule": 5}, {"schedule": ["* * * * *"]}, {"tz": 1}])
+async def test_update_rejects_non_string_schedule(client, body):
+    resp = await client.patch("/api/cron/jobs/c1", json=body)
+    assert resp.status == 400
+
+
+async def test_create_rejects_non_string_schedule(client):
+    resp = await client.post("/api/cron/jobs", json={"name": "n", "message": "m", "schedule": 5})
+    assert resp.status == 400
+
+
+@pytest.mark.parametrize("hours", ["nan", "-inf", "0", "x"])
+async def test_timeline_rejects_bad_hours(client, hours):
+    resp = await client.get("/api/cron/timeline", params={"hours": hours})
+    assert resp.status == 400
+
+
+async def test_timeline_caps_fires_across_jobs(client, monkeypatch):
+    monkeypatch.setattr(cron, "TIMELINE_MAX_FIRES", 50)
+    monkeypatch.setattr(cron, "TIMELINE_MAX_TOTAL_FIRES", 70)
+    await client.patch("/api/cron/jobs/c1", json={"schedule": "* * * * *"})
+    resp = await client.get("/api/cron/timeline", params={"hours": "24", "count": "3"})
+    body = await resp.json()
+    jobs = {j["id"]: j for j in body["jobs"]}
+    assert sum(j["fires"] for j in jobs.values()) == 70
+    assert body["truncated"] and jobs["e1"]["truncated"]
+    assert len(jobs["c1"]["next"]) == 3
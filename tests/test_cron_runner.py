@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+from dashboard.routes import cron
+from dashboard.utils import cron_runner
+from dashboard.utils.cron_runner import CronRunner
+
+
+def _fake_cli(tmp_path, monkeypatch, body):
+    cli = tmp_path / "nanobot"
+    cli.write_text("#!/bin/sh\n" + body + "\n")
+    cli.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+
+
+async def test_run_captures_output_and_exit_code(tmp_path, monkeypatch):
+    _fake_cli(tmp_path, monkeypatch, 'echo "ran $3"; exit 3')
+    run = CronRunner().submit("job1")
+    while not run.finished:
+        await run.wait_change(1)
+    assert (run.status, run.exit_code) == ("failed", 3)
+    assert run.output == [("stdout", "ran job1\n")]
+
+
+async def test_cancel_while_the_process_is_starting_kills_it(tmp_path, monkeypatch):
+    _fake_cli(tmp_path, monkeypatch, "sleep 30")
+    runner = CronRunner()
+    spawn = asyncio.create_subprocess_exec
+
+    async def cancelled_during_spawn(*args, **kwargs):
+        proc = await spawn(*args, **kwargs)
+        runner.cancel(run)        # proc isn't on the run yet
+        return proc
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", cancelled_during_spawn)
+    run = runner.submit("job1")
+    await asyncio.wait_for(asyncio.gather(*runner._tasks), 5)
+    assert run.status == "cancelled"
+    assert run.exit_code is not None and run.exit_code < 0
+
+
+async def test_cancel_escalates_to_sigkill(tmp_path, monkeypatch):
+    _fake_cli(tmp_path, monkeypatch, "trap '' TERM; sleep 30")
+    monkeypatch.setattr(cron_runner, "STOP_TIMEOUT", 0.2)
+    runner = CronRunner()
+    run = runner.submit("job1")
+    while run.proc is None:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)                # let the trap be installed
+    runner.cancel(run)
+    await asyncio.wait_for(asyncio.gather(*runner._tasks), 5)
+    assert run.status == "cancelled"
+    assert run.exit_code == -9
+
+
+async def test_run_stream_propagates_cancellation(tmp_path, monkeypatch):
+    _fake_cli(tmp_path, monkeypatch, "sleep 30")
+    app = web.Application()
+    app[cron.runner_key] = runner = CronRunner()
+    run = runner.submit("job1")
+    request = make_mocked_request("GET", f"/api/cron/runs/{run.id}", headers={"Accept": "text/event-stream"},
+                                  match_info={"run_id": run.id}, app=app)
+
+    async def prepared(request):
+        return SimpleNamespace(write=_noop, write_eof=_noop)
+
+    monkeypatch.setattr(cron, "prepare_sse", prepared)
+    monkeypatch.setattr(cron, "send_event", lambda *a: _noop())
+    stream = asyncio.create_task(cron.get_run(request))
+    await asyncio.sleep(0.1)
+    stream.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await stream
+    await runner.shutdown()
+
+
+async def _noop(*args):
+    pass
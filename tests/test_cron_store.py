@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from dashboard.utils.cron_store import CronStore
+
+
+def _job(job_id, expr="0 9 * * *", state=None):
+    return {"id": job_id, "name": job_id, "schedule": {"kind": "cron", "expr": expr},
+            "state": state or {"nextRunAtMs": 1}}
+
+
+def _gateway_write(path, doc):
+    # The gateway rewrites the file without taking any lock
+    path.write_text(json.dumps(doc))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_keeps_state_the_gateway_wrote_during_the_transaction(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"version": 1, "jobs": [_job("a"), _job("b"), _job("c")]}))
+    store = CronStore(path)
+
+    with store.transaction() as data:
+        data["jobs"][0]["schedule"]["expr"] = "0 10 * * *"
+        data["jobs"] = [j for j in data["jobs"] if j["id"] != "c"]
+        _gateway_write(path, {"version": 1, "jobs": [
+            _job("a", state={"nextRunAtMs": 2, "lastStatus": "ok"}),
+            _job("b", state={"nextRunAtMs": 3}),
+            _job("c"),
+            _job("d"),
+        ]})
+
+    jobs = {j["id"]: j for j in json.loads(path.read_text())["jobs"]}
+    assert sorted(jobs) == ["a", "b", "d"]                     # our delete stands, the new job is kept
+    assert jobs["a"]["schedule"]["expr"] == "0 10 * * *"       # our edit stands
+    assert jobs["a"]["state"] == {"nextRunAtMs": 2, "lastStatus": "ok"}
+    assert jobs["b"]["state"] == {"nextRunAtMs": 3}
+
+
+def test_state_changed_by_the_transaction_wins(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"version": 1, "jobs": [_job("a")]}))
+    store = CronStore(path)
+
+    with store.transaction() as data:
+        data["jobs"][0]["state"] = {"nextRunAtMs": 99}
+        _gateway_write(path, {"version": 1, "jobs": [_job("a", state={"nextRunAtMs": 2})]})
+
+    assert json.loads(path.read_text())["jobs"][0]["state"] == {"nextRunAtMs": 99}
+
+
+def test_jobs_the_gateway_deleted_stay_deleted(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"version": 1, "jobs": [_job("a"), _job("once")]}))
+    store = CronStore(path)
+
+    with store.transaction() as data:
+        data["jobs"][0]["name"] = "renamed"
+        data["jobs"].append(_job("new"))
+        # A deleteAfterRun job ran and the gateway removed it
+        _gateway_write(path, {"version": 1, "jobs": [_job("a")]})
+
+    jobs = json.loads(path.read_text())["jobs"]
+    assert [j["id"] for j in jobs] == ["a", "new"]
+    assert jobs[0]["name"] == "renamed"
+
+
+def test_transaction_refuses_to_run_on_the_event_loop(tmp_path):
+    store = CronStore(tmp_path / "jobs.json")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                pass
+        return await store.apply(lambda data: data["jobs"].append(_job("a")))
+
+    asyncio.run(main())
+    assert [j["id"] for j in store.read()["jobs"]] == ["a"]
@@ -0,0 +1,54 @@
+import asyncio
+
+from dashboard.utils import fs_events
+from dashboard.utils.fs_events import ChangeFeed, Subscription, _collapse
+
+
+def _ev(kind, path, type_="modified"):
+    return {"kind": kind, "type": type_, "path": path}
+
+
+def test_collapse_keeps_the_latest_event_per_path_in_order():
+    events = [_ev("sessions", "a", "created"), _ev("workspace", "x"), _ev("sessions", "a", "deleted"),
+              _ev("sessions", "b")]
+    assert _collapse(events) == [_ev("workspace", "x"), _ev("sessions", "a", "deleted"), _ev("sessions", "b")]
+
+
+def test_collapse_turns_floods_and_rescans_into_one_rescan(monkeypatch):
+    monkeypatch.setattr(fs_events, "MAX_BATCH", 3)
+    flood = [_ev("media", str(i)) for i in range(4)]
+    assert _collapse(flood + [_ev("cron", "jobs.json")]) == [_ev("media", "", "rescan"), _ev("cron", "jobs.json")]
+    assert _collapse([_ev("logs", "a"), _ev("logs", "", "rescan")]) == [_ev("logs", "", "rescan")]
+
+
+def test_since_replays_only_what_is_still_kept():
+    feed = ChangeFeed()
+    assert feed.since(0) == []
+    for i in range(5):
+        feed._publish([_ev("cron", str(i))])
+    assert [b["seq"] for b in feed.since(2)] == [3, 4, 5]
+    assert feed.since(5) == []
+    assert feed.since(9) is None             # a sequence from an earlier run of the server
+
+    feed.recent.popleft()
+    feed.recent.popleft()
+    assert feed.since(0) is None             # batch 1 and 2 were dropped
+    assert [b["seq"] for b in feed.since(2)] == [3, 4, 5]
+
+
+async def test_subscribers_get_their_kinds_and_resync_when_lagging(monkeypatch):
+    monkeypatch.setattr(fs_events, "SUBSCRIBER_QUEUE", 2)
+    feed = ChangeFeed()
+    cron = feed.subscribe({"cron"})
+    logs = feed.subscribe({"logs"})
+    assert isinstance(cron, Subscription)
+
+    feed._publish([_ev("cron", "a")])
+    assert (await cron.get())["events"] == [_ev("cron", "a")]
+    assert logs.queue.empty()
+
+    for i in range(3):
+        feed._publish([_ev("cron", str(i))])
+    assert await cron.get() is None          # dropped its backlog: must reload
+    feed._publish([_ev("cron", "b")])
+    assert (await asyncio.wait_for(cron.get(), 1))["events"] == [_ev("cron", "b")]
@@ -0,0 +1,35 @@
+from aiohttp import web
+
+from dashboard.config import WORKSPACE_DIR
+from dashboard.routes import history
+from dashboard.utils.versions import content_id, version_store
+
+
+async def _client(aiohttp_client):
+    app = web.Application()
+    app.router.add_post(r"/api/history/restore/{path:.+}", history.restore_version)
+    return await aiohttp_client(app)
+
+
+async def test_restore_writes_the_version_back(aiohttp_client):
+    target = WORKSPACE_DIR / "restore.md"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text("new")
+    version_store.record("restore.md", None, "olé".encode())
+    client = await _client(aiohttp_client)
+    resp = await client.post("/api/history/restore/restore.md", json={"id": content_id("olé".encode())})
+    assert resp.status == 200
+    assert target.read_text() == "olé"
+
+
+async def test_restore_refuses_versions_that_are_not_utf8(aiohttp_client):
+    target = WORKSPACE_DIR / "latin1.md"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(b"caf\xe9")
+    version_store.record("latin1.md", None, b"caf\xe9")
+    target.write_text("cafe")
+    client = await _client(aiohttp_client)
+    resp = await client.post("/api/history/restore/latin1.md", json={"id": content_id(b"caf\xe9")})
+    assert resp.status == 422
+    assert target.read_text() == "cafe"
+    assert len(version_store.history("latin1.md")) == 1
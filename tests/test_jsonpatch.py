@@ -0,0 +1,53 @@
+import pytest
+
+from dashboard.utils.jsonpatch import PatchError, apply_json_patch, apply_merge_patch
+
+
+def test_rfc6902_operations():
+    doc = {"a": {"b": [1, 2]}, "c": "x"}
+    doc = apply_json_patch(doc, [
+        {"op": "add", "path": "/a/b/-", "value": 3},
+        {"op": "add", "path": "/a/b/0", "value": 0},
+        {"op": "replace", "path": "/c", "value": "y"},
+        {"op": "copy", "from": "/a/b", "path": "/d"},
+        {"op": "move", "from": "/c", "path": "/a/c"},
+        {"op": "remove", "path": "/a/b/1"},
+        {"op": "add", "path": "/e~1f", "value": {"~": 1}},
+        {"op": "test", "path": "/e~1f/~0", "value": 1},
+    ])
+    assert doc == {"a": {"b": [0, 2, 3], "c": "y"}, "d": [0, 1, 2, 3], "e/f": {"~": 1}}
+
+
+def test_replace_root():
+    assert apply_json_patch({"a": 1}, [{"op": "replace", "path": "", "value": [1]}]) == [1]
+
+
+@pytest.mark.parametrize("ops", [
+    {"op": "add"},
+    [{"op": "add", "path": "/a"}],
+    [{"op": "remove", "path": "/missing"}],
+    [{"op": "add", "path": "a", "value": 1}],
+    [{"op": "add", "path": "/l/01", "value": 1}],
+    [{"op": "add", "path": "/l/5", "value": 1}],
+    [{"op": "move", "from": "/l", "path": "/l/0"}],
+    [{"op": "move", "path": "/x"}],
+    [{"op": "test", "path": "/l/0", "value": 2}],
+    [{"op": "frobnicate", "path": "/l"}],
+    [{"op": "remove", "path": ""}],
+    # Non-string fields are a malformed patch, not a server error
+    [{"op": "add", "path": 5, "value": 1}],
+    [{"op": "add", "path": ["l"], "value": 1}],
+    [{"op": ["add"], "path": "/a", "value": 1}],
+    [{"op": "copy", "from": None, "path": "/a"}],
+    [{"op": "move", "from": {"p": 1}, "path": "/a"}],
+])
+def test_invalid_patches_raise_patch_error(ops):
+    with pytest.raises(PatchError):
+        apply_json_patch({"l": [1]}, ops)
+
+
+def test_merge_patch():
+    target = {"a": {"b": 1, "c": 2}, "d": [1]}
+    assert apply_merge_patch(target, {"a": {"b": None, "e": 3}, "d": {"x": 1}}) == \
+        {"a": {"c": 2, "e": 3}, "d": {"x": 1}}
+    assert apply_merge_patch({"a": 1}, [1, 2]) == [1, 2]
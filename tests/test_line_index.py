@@ -0,0 +1,47 @@
+from dashboard.utils import line_index as li
+from dashboard.utils.line_index import LineIndex
+
+
+def test_reads_any_line_range(tmp_path, monkeypatch):
+    monkeypatch.setattr(li, "STRIDE", 4)
+    path = tmp_path / "log.jsonl"
+    path.write_text("".join(f"line {i}\n" for i in range(50)))
+    index = LineIndex(path)
+    assert index.update() == 50
+    assert [t for t, _ in index.read_lines(0, 2)] == ["line 0", "line 1"]
+    assert [t for t, _ in index.read_lines(13, 3)] == ["line 13", "line 14", "line 15"]
+    assert [t for t, _ in index.read_lines(48, 10)] == ["line 48", "line 49"]
+    assert index.read_lines(50, 1) == []
+
+
+def test_resumes_on_growth_and_rescans_on_rewrite(tmp_path, monkeypatch):
+    monkeypatch.setattr(li, "STRIDE", 4)
+    path = tmp_path / "log.jsonl"
+    path.write_text("a\nb\nc")                  # unterminated last line counts
+    index = LineIndex(path)
+    assert index.update() == 3
+    with open(path, "a") as f:
+        f.write("c\n" + "".join(f"{i}\n" for i in range(10)))
+    assert index.update() == 13
+    assert index.read_lines(2, 2) == [("cc", False), ("0", False)]
+    assert index.read_lines(12, 1) == [("9", False)]
+
+    path.write_text("x\r\ny\n")
+    assert index.update() == 2
+    assert index.read_lines(0, 5) == [("x", False), ("y", False)]
+
+
+def test_long_lines_are_cut_and_flagged(tmp_path, monkeypatch):
+    monkeypatch.setattr(li, "MAX_LINE_BYTES", 8)
+    path = tmp_path / "log.jsonl"
+    path.write_text("short\n" + "x" * 20 + "\nafter\n")
+    assert LineIndex(path).read_lines(0, 3) == [("short", False), ("x" * 8, True), ("after", False)]
+
+
+def test_shared_indexes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(li, "MAX_INDEXES", 2)
+    a, b, c = (tmp_path / n for n in "abc")
+    assert li.line_index(a) is li.line_index(a)
+    li.line_index(b)
+    li.line_index(c)
+    assert str(a) not in li._indexes
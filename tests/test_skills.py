@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from dashboard.routes import skills
+from dashboard.utils.workspace_tree import workspace_tree
+
+
+def _skill(name, description):
+    d = skills.SKILLS_DIR / name
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "SKILL.md").write_text(f"---\nname: {name}\ndescription: {description}\n---\nbody\n")
+
+
+def test_catalog_follows_the_skills_dir_from_concurrent_scans():
+    for i in range(20):
+        _skill(f"s{i}", f"skill {i}")
+    workspace_tree.refresh()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: skills._scan_skills(), range(32)))
+    assert all(len(r) == 20 for r in results)
+    assert {s["description"] for s in results[0]} == {f"skill {i}" for i in range(20)}
+
+    (skills.SKILLS_DIR / "s0" / "SKILL.md").unlink()
+    (skills.SKILLS_DIR / "s0").rmdir()
+    workspace_tree.refresh()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: skills._scan_skills(), range(32)))
+    assert "s0" not in skills._frontmatter
+    assert len(skills._scan_skills()) == 19
@@ -0,0 +1,32 @@
+import pytest
+
+from dashboard.utils.versions import VersionNotFound, VersionStore, content_id
+
+
+def _store(tmp_path) -> VersionStore:
+    return VersionStore(tmp_path / "versions", budget_bytes=1 << 20, min_versions=2)
+
+
+def test_versions_round_trip_through_deltas(tmp_path):
+    store = _store(tmp_path)
+    texts = [b"header\n" + b"x" * 5000 + b"\nline %d\n" % i for i in range(5)]
+    old = None
+    for text in texts:
+        store.record("a.md", old, text)
+        old = text
+    history = store.history("a.md")
+    assert [v["id"] for v in history] == [content_id(t) for t in reversed(texts)]
+    assert all(store.content(content_id(t)) == t for t in texts)
+
+
+def test_corrupt_object_does_not_break_later_saves(tmp_path):
+    store = _store(tmp_path)
+    store.record("a.md", None, b"one")
+    store._object_path(content_id(b"one")).write_bytes(b"not zlib")
+    with pytest.raises(VersionNotFound):
+        store.content(content_id(b"one"))
+
+    store.record("a.md", b"one", b"two")
+    assert store.content(content_id(b"two")) == b"two"
+    assert store.content(content_id(b"one")) == b"one"     # rewritten from the file's content
+    assert store.history("a.md")[0]["id"] == content_id(b"two")
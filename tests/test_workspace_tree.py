@@ -0,0 +1,56 @@
+from dashboard.utils.workspace_tree import WorkspaceTree
+
+
+def _tree(root, snapshot, owner):
+    tree = WorkspaceTree(root, watch=False, poll_interval=0)
+    tree.share(snapshot, owner=owner)
+    return tree
+
+
+def test_mirror_reports_the_owners_stamp(tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "a.md").write_text("a")
+    snapshot = tmp_path / "tree.json"
+    owner = _tree(root, snapshot, owner=True)
+    mirror = _tree(root, snapshot, owner=False)
+
+    owner.publish()
+    assert mirror.version() == owner.version()
+
+    (root / "b.md").write_text("b")
+    owner.publish()
+    assert mirror.version() == owner.version()
+    assert sorted(mirror.listdir("")[1]) == ["a.md", "b.md"]
+
+
+def test_mirror_stamp_differs_before_first_snapshot(tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    snapshot = tmp_path / "tree.json"
+    owner = _tree(root, snapshot, owner=True)
+    mirror = _tree(root, snapshot, owner=False)
+    # Both scanned for themselves: same generation, but the stamps must not collide
+    assert mirror.version() != owner.version()
+
+
+def test_restarted_owner_gets_a_new_origin(tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    snapshot = tmp_path / "tree.json"
+    first = _tree(root, snapshot, owner=True)
+    first.publish()
+    second = _tree(root, snapshot, owner=True)
+    second.publish()
+    assert first.version() != second.version()
+
+
+def test_hidden_directories_are_optional(tmp_path):
+    root = tmp_path / "media"
+    (root / ".thumbs").mkdir(parents=True)
+    (root / ".thumbs" / "a.png").write_bytes(b"png")
+    hidden = WorkspaceTree(root, skip_dirs=(), watch=False, poll_interval=0)
+    shown = WorkspaceTree(root, skip_dirs=(), watch=False, poll_interval=0, skip_hidden=False)
+    assert hidden.listdir("")[0] == []
+    assert shown.listdir("")[0] == [".thumbs"]
+    assert list(shown.listdir(".thumbs")[1]) == ["a.png"]
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+from dashboard.routes.chat import limiter_key
+from dashboard.routes.ws import Channel, _chat_channel
+from dashboard.utils.chat_limiter import ChatLimiter
+
+
+class _GoneConnection:
+    async def send(self, ch, event, data):
+        raise ConnectionResetError("client went away")
+
+
+def _request(limiter: ChatLimiter):
+    app = web.Application()
+    app[limiter_key] = limiter
+    return SimpleNamespace(app=app)
+
+
+async def test_chat_channel_releases_ticket_when_emit_fails():
+    limiter = ChatLimiter(1, 1)
+    channel = Channel(_GoneConnection(), 1, credit=10)
+    with pytest.raises(ConnectionResetError):
+        await _chat_channel(_request(limiter), channel, {"message": "hi", "session_id": "s"})
+    assert limiter.stats()["active"] == []
+    limiter.release(limiter.enqueue("s"))   # the session is free again
+
+
+async def test_chat_channel_releases_ticket_when_cancelled_without_credit():
+    limiter = ChatLimiter(1, 1)
+    channel = Channel(_GoneConnection(), 1, credit=0)   # stalled: emit waits for credit
+    task = asyncio.create_task(_chat_channel(_request(limiter), channel, {"message": "hi", "session_id": "s"}))
+    await asyncio.sleep(0)
+    assert limiter.stats()["active"] == ["s"]
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert limiter.stats()["active"] == []
@@ -0,0 +1,41 @@
+import io
+import zipfile
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from dashboard.utils import zipstream
+
+
+def _app(entries):
+    async def handler(request):
+        return await zipstream.stream_zip(request, entries, "out.zip")
+
+    app = web.Application()
+    app.router.add_get("/zip", handler)
+    return app
+
+
+async def test_streams_a_valid_archive(aiohttp_client, tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.txt").write_bytes(b"x" * 300_000)
+    client = await aiohttp_client(_app([("a.txt", tmp_path / "a.txt"), ("dir/b.txt", tmp_path / "b.txt"),
+                                        ("gone.txt", tmp_path / "gone.txt")]))
+    resp = await client.get("/zip")
+    with zipfile.ZipFile(io.BytesIO(await resp.read())) as zf:
+        assert zf.namelist() == ["a.txt", "dir/b.txt"]
+        assert zf.read("a.txt") == b"alpha"
+
+
+async def test_writer_failure_aborts_the_download(aiohttp_client, tmp_path, monkeypatch):
+    def broken(writer, entries):
+        writer.write(b"PK\x03\x04 partial")
+        raise RuntimeError("disk error")
+
+    monkeypatch.setattr(zipstream, "_write_zip", broken)
+    client = await aiohttp_client(_app([]))
+    resp = await client.get("/zip")
+    assert resp.status == 200
+    with pytest.raises(aiohttp.ClientPayloadError):
+        await resp.read()
@@ -0,0 +1,223 @@
+"""Admission control per route class.
+
+Every API request is sorted into a class by its route:
+
+    stream      chat SSE, the change feed and the WebSocket, holding their slot until they end
+    heavy       full scans and big parses (search, session loads, the media tree)
+    mutation    writes
+    light       everything else
+
+Each class has its own gate: at most `limit` requests run at once, the
+rest wait in FIFO order for up to `timeout` seconds and are then refused
+with 503 and a Retry-After estimated from how long the class's requests
+take. A burst of searches therefore queues and sheds behind the heavy
+gate while listings and open chat streams carry on. Readiness, metrics
+and debug endpoints bypass the gates so they still answer under load.
+
+Identical heavy GETs that arrive while one is already running (same URL
+and conditional headers) don't start their own: they wait for the running
+one and get a copy of its response, without taking a slot.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+from aiohttp import web
+
+from dashboard.config import ADMISSION
+from dashboard.utils.trace import span
+
+LIGHT = "light"
+HEAVY = "heavy"
+MUTATION = "mutation"
+STREAM = "stream"
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+EXEMPT = ("/api/ready", "/api/metrics", "/api/debug/")
+
+# Route templates by class; other reads are light, other writes mutations
+ROUTE_CLASSES = {
+    ("POST", "/api/chat"): STREAM,
+    ("GET", "/api/ws"): STREAM,
+    ("GET", "/api/events"): STREAM,
+    ("GET", "/api/search"): HEAVY,
+    ("GET", "/api/sessions/{key}"): HEAVY,
+    ("GET", "/api/media"): HEAVY,
+    ("GET", "/api/logs/{name}"): HEAVY,
+    ("GET", "/api/memory/records/{path}"): HEAVY,
+    ("GET", "/api/history/diff"): HEAVY,
+    ("GET", "/api/skills/export"): HEAVY,
+}
+
+# Heavy routes whose responses can be shared by identical concurrent requests
+COALESCE = {
+    "/api/search", "/api/sessions/{key}", "/api/media", "/api/logs/{name}",
+    "/api/memory/records/{path}", "/api/history/diff",
+}
+COALESCE_HEADERS = ("If-None-Match", "If-Modified-Since", "Range")
+
+EWMA = 0.2          # weight of the latest request in a gate's mean hold time
+MAX_RETRY_AFTER = 30
+
+
+class Gate:
+    """A counting semaphore with a FIFO wait queue and a wait deadline."""
+
+    def __init__(self, name: str, limit: int, timeout: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.timeout = max(0.0, timeout)
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.hold = 0.0     # mean seconds a request keeps its slot
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting up to `timeout`; False when none came free in time."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if self.timeout <= 0:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with span("admission", self.name):
+                await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)   # the slot was handed over just as we were cancelled
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+        return True
+
+    def release(self, held: float):
+        if held:
+            self.hold += EWMA * (held - self.hold) if self.hold else held
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)     # hand the slot straight over
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: the queue ahead drained at the mean hold time."""
+        estimate = self.hold * (len(self._waiters) + 1) / self.limit
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(estimate)))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "timeout": self.timeout,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "holdMs": round(self.hold * 1000, 1),
+        }
+
+
+gates = {name: Gate(name, limit, timeout) for name, (limit, timeout) in ADMISSION.items()}
+
+# Coalescing key → task running the first of the identical requests
+_inflight: dict[tuple, asyncio.Task] = {}
+
+
+def classify(request: web.Request) -> str | None:
+    """The request's class, or None if it isn't subject to admission."""
+    if not request.path.startswith("/api/") or request.path.startswith(EXEMPT):
+        return None
+    resource = request.match_info.route.resource
+    template = resource.canonical if resource is not None else None
+    cls = ROUTE_CLASSES.get((request.method, template))
+    if cls is not None:
+        return cls
+    return LIGHT if request.method in READ_METHODS else MUTATION
+
+
+def stats() -> dict:
+    return {name: gate.stats() for name, gate in gates.items()}
+
+
+async def _admit(gate: Gate, handler, request: web.Request) -> web.StreamResponse:
+    if not await gate.acquire():
+        raise web.HTTPServiceUnavailable(
+            text=f"Server busy ({gate.name} requests), try again shortly",
+            headers={"Retry-After": str(gate.retry_after())})
+    started = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        gate.release(time.perf_counter() - started)
+
+
+def _snapshot(response: web.StreamResponse) -> tuple | None:
+    """Status, headers and body of a complete in-memory response; None if it streams."""
+    if response.prepared or not isinstance(response, web.Response) or not isinstance(response.body, bytes):
+        return None
+    headers = [(k, v) for k, v in response.headers.items() if k.lower() != "content-length"]
+    return response.status, response.reason, headers, response.body
+
+
+async def _shared(gate: Gate, handler, request: web.Request):
+    """Run the first request of a coalesced group; (response or HTTP error, snapshot)."""
+    try:
+        response = await _admit(gate, handler, request)
+    except web.HTTPException as e:
+        return e, _snapshot(e)
+    # Snapshot now, before an outer middleware (compression) rewrites the response
+    return response, _snapshot(response)
+
+
+def _forget(key: tuple, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()    # retrieved even if every waiter went away
+
+
+async def _coalesced(gate: Gate, handler, request: web.Request) -> web.StreamResponse:
+    key = (request.path_qs, *(request.headers.get(h) for h in COALESCE_HEADERS))
+    task = _inflight.get(key)
+    first = task is None
+    if first:
+        # Its own task, so the waiters still get the result if the first client disconnects
+        task = asyncio.ensure_future(_shared(gate, handler, request))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _forget(key, t))
+    else:
+        gate.coalesced += 1
+    result, snapshot = await asyncio.shield(task)
+    if snapshot is not None:
+        status, reason, headers, body = snapshot
+        return web.Response(status=status, reason=reason, headers=headers, body=body)
+    if not first:
+        return await _admit(gate, handler, request)     # streamed: can't be shared
+    if isinstance(result, web.HTTPException):
+        raise result
+    return result
+
+
+@web.middleware
+async def admission_middleware(request: web.Request, handler):
+    cls = classify(request)
+    if cls is None:
+        return await handler(request)
+    gate = gates[cls]
+    if cls == HEAVY and request.method == "GET" and request.match_info.route.resource.canonical in COALESCE:
+        return await _coalesced(gate, handler, request)
+    return await _admit(gate, handler, request)
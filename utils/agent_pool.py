@@ -0,0 +1,365 @@
+"""Pool of long-lived agent worker processes for /api/chat.
+
+`nanobot agent -m ...` pays interpreter startup, config load and provider
+setup on every message. Instead, a few workers (workers/agent_worker.py)
+stay up and take requests over a line-JSON pipe protocol (see
+workers/worker_protocol.py).
+
+- Session affinity is strict: nanobot's SessionManager caches sessions in
+  memory, so a session keeps going to the worker that served it last while
+  that worker lives; otherwise two workers would hold diverging copies.
+- Workers are recycled after `max_requests` chats or once their RSS
+  exceeds `max_rss_mb`, and replaced if they die or miss a health ping.
+- If every worker fails to start (e.g. nanobot not importable by the
+  worker interpreter) the pool reports itself unavailable and the chat
+  route falls back to one CLI process per message.
+- A chat's events go through a bounded queue: while the consumer (e.g. a
+  WebSocket out of credit) isn't taking them, the worker's stdout stops
+  being read and, once the pipe buffers fill, the worker blocks.
+"""
+
+import asyncio
+import os
+import secrets
+import signal
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from dashboard.utils.codec import dumps, loads
+from dashboard.utils.nanobot import read_process_stats
+
+STARTUP_TIMEOUT = 120     # seconds for a worker to report "ready"
+PING_TIMEOUT = 10
+STOP_TIMEOUT = 5
+MAX_AFFINITY = 1000       # remembered session → worker assignments
+RESPAWN_BACKOFF = (1, 2, 5, 15, 30, 60)
+EVENT_QUEUE = 64          # worker events buffered per chat before the pipe stops being read
+
+
+class PoolUnavailable(Exception):
+    """No worker could be leased in time (or the pool is broken)."""
+
+
+class WorkerDied(Exception):
+    pass
+
+
+class AgentWorker:
+    def __init__(self, slot: int, cmd: list[str]):
+        self.slot = slot
+        self.cmd = cmd
+        self.proc: asyncio.subprocess.Process | None = None
+        self.pid: int | None = None
+        self.started_at = 0.0
+        self.served = 0
+        self.busy = False
+        self.retiring = False
+        self.stderr_tail: deque[str] = deque(maxlen=20)
+        self._events: asyncio.Queue | None = None
+        self._request_id: str | None = None
+        self._pings: dict[str, asyncio.Future] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    @property
+    def idle(self) -> bool:
+        return self.alive and not self.busy and not self.retiring
+
+    def rss_mb(self) -> float | None:
+        stats = read_process_stats(self.pid) if self.pid else None
+        return stats["rssBytes"] / (1024 * 1024) if stats else None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+            start_new_session=True,
+            limit=16 * 1024 * 1024,
+        )
+        self._tasks.append(asyncio.create_task(self._drain_stderr()))
+        try:
+            line = await asyncio.wait_for(self.proc.stdout.readline(), STARTUP_TIMEOUT)
+            msg = loads(line) if line else {}
+        except (asyncio.TimeoutError, ValueError):
+            msg = {}
+        if msg.get("type") != "ready":
+            await self.kill()
+            detail = msg.get("message") or (self.stderr_tail[-1] if self.stderr_tail else "no ready message")
+            raise WorkerDied(f"worker failed to start: {detail}")
+        self.pid = msg.get("pid") or self.proc.pid
+        self.started_at = time.monotonic()
+        self._tasks.append(asyncio.create_task(self._read_loop()))
+
+    async def _drain_stderr(self):
+        assert self.proc is not None and self.proc.stderr is not None
+        while True:
+            line = await self.proc.stderr.readline()
+            if not line:
+                return
+            self.stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
+
+    async def _read_loop(self):
+        assert self.proc is not None and self.proc.stdout is not None
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                break
+            try:
+                msg = loads(line)
+            except ValueError:
+                continue
+            if msg.get("type") == "pong":
+                fut = self._pings.pop(msg.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(True)
+            elif (events := self._events) is not None and msg.get("id") == self._request_id:
+                await events.put(msg)
+        if (events := self._events) is not None:
+            detail = self.stderr_tail[-1] if self.stderr_tail else "worker exited"
+            await events.put({"type": "error", "message": detail})
+
+    def _send(self, msg: dict):
+        assert self.proc is not None and self.proc.stdin is not None
+        self.proc.stdin.write(dumps(msg) + b"\n")
+
+    async def ping(self) -> bool:
+        if not self.alive:
+            return False
+        ping_id = secrets.token_hex(4)
+        fut = asyncio.get_running_loop().create_future()
+        self._pings[ping_id] = fut
+        try:
+            self._send({"type": "ping", "id": ping_id})
+            await asyncio.wait_for(fut, PING_TIMEOUT)
+            return True
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            return False
+        finally:
+            self._pings.pop(ping_id, None)
+
+    async def chat(self, message: str, session_id: str):
+        """Send one chat request; yield worker events until done/error."""
+        if not self.alive:
+            raise WorkerDied("worker is not running")
+        self._request_id = secrets.token_hex(6)
+        self._events = events = asyncio.Queue(EVENT_QUEUE)
+        finished = False
+        try:
+            self._send({"type": "chat", "id": self._request_id, "message": message, "session_id": session_id})
+            while True:
+                msg = await events.get()
+                finished = msg.get("type") in ("done", "error")
+                yield msg
+                if finished:
+                    return
+        finally:
+            if not finished and self.alive:
+                # Abandoned mid-reply (client gone or cancelled): stop the agent turn
+                try:
+                    self._send({"type": "cancel", "id": self._request_id})
+                except (ConnectionError, OSError):
+                    pass
+            self._events = None
+            self._request_id = None
+            while not events.empty():   # unblock the read loop if it waits on a full queue
+                events.get_nowait()
+
+    async def kill(self):
+        if self.proc is not None and self.proc.returncode is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await self.proc.wait()
+        for task in self._tasks:
+            task.cancel()
+
+    async def stop(self):
+        """Ask the worker to exit, killing it if it doesn't within STOP_TIMEOUT."""
+        if self.alive:
+            try:
+                self._send({"type": "shutdown"})
+                await asyncio.wait_for(self.proc.wait(), STOP_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError, OSError):
+                pass
+        await self.kill()
+
+
+class AgentPool:
+    def __init__(self, cmd: list[str], size: int, max_requests: int = 100,
+                 max_rss_mb: int = 1024, health_interval: float = 30):
+        self.cmd = cmd
+        self.size = max(1, size)
+        self.max_requests = max_requests
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.workers: list[AgentWorker | None] = [None] * self.size
+        self.errors: list[str | None] = [None] * self.size
+        self.restarts = 0
+        self._starting: set[int] = set()
+        self._cond = asyncio.Condition()
+        self._affinity: OrderedDict[str, int] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self._closed = False
+
+    @property
+    def available(self) -> bool:
+        """False only when no worker is up or starting and the last start of every slot failed."""
+        if any(w is not None and w.alive for w in self.workers) or self._starting:
+            return True
+        return not all(self.errors)
+
+    def _spawn_later(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self):
+        for slot in range(self.size):
+            self._spawn_later(self._spawn(slot))
+        self._spawn_later(self._health_loop())
+
+    async def _spawn(self, slot: int, attempt: int = 0):
+        if self._closed or slot in self._starting:
+            return
+        self._starting.add(slot)
+        worker = AgentWorker(slot, self.cmd)
+        try:
+            await worker.start()
+            self.errors[slot] = None
+        except (WorkerDied, OSError) as e:
+            worker = None
+            self.errors[slot] = str(e)
+        finally:
+            self._starting.discard(slot)
+
+        async with self._cond:
+            self.workers[slot] = worker
+            self._cond.notify_all()
+
+        if worker is None and not self._closed:
+            delay = RESPAWN_BACKOFF[min(attempt, len(RESPAWN_BACKOFF) - 1)]
+            await asyncio.sleep(delay)
+            await self._spawn(slot, attempt + 1)
+
+    async def _recycle(self, worker: AgentWorker):
+        """Replace a worker: stop it once idle, then start a fresh one in its slot."""
+        if worker.retiring:
+            return
+        worker.retiring = True
+        async with self._cond:
+            for session, slot in list(self._affinity.items()):
+                if slot == worker.slot:
+                    del self._affinity[session]
+            self._cond.notify_all()
+        await worker.stop()
+        self.restarts += 1
+        if self.workers[worker.slot] is worker:
+            await self._spawn(worker.slot)
+
+    def _pick(self, session_id: str) -> AgentWorker | None:
+        slot = self._affinity.get(session_id)
+        if slot is not None:
+            worker = self.workers[slot]
+            if worker is not None and worker.alive and not worker.retiring:
+                # Strict affinity: wait for this worker even if others are idle
+                return worker if worker.idle else None
+            del self._affinity[session_id]
+        idle = [w for w in self.workers if w is not None and w.idle]
+        if not idle:
+            return None
+        load = {w.slot: 0 for w in idle}
+        for s in self._affinity.values():
+            if s in load:
+                load[s] += 1
+        return min(idle, key=lambda w: (load[w.slot], w.served))
+
+    @asynccontextmanager
+    async def lease(self, session_id: str, timeout: float = 60):
+        """Reserve a worker for one chat in `session_id`."""
+        worker: AgentWorker | None = None
+
+        def ready() -> bool:
+            nonlocal worker
+            if not self.available:
+                return True
+            worker = self._pick(session_id)
+            return worker is not None
+
+        async with self._cond:
+            try:
+                await asyncio.wait_for(self._cond.wait_for(ready), timeout)
+            except asyncio.TimeoutError:
+                raise PoolUnavailable("no chat worker became available")
+            if worker is None:
+                raise PoolUnavailable(next((e for e in self.errors if e), "chat pool unavailable"))
+            worker.busy = True
+            self._affinity[session_id] = worker.slot
+            self._affinity.move_to_end(session_id)
+            while len(self._affinity) > MAX_AFFINITY:
+                self._affinity.popitem(last=False)
+
+        try:
+            yield worker
+        finally:
+            worker.served += 1
+            worker.busy = False
+            rss = worker.rss_mb()
+            if not worker.alive:
+                self._spawn_later(self._recycle(worker))
+            elif worker.served >= self.max_requests or (rss is not None and rss >= self.max_rss_mb):
+                self._spawn_later(self._recycle(worker))
+            async with self._cond:
+                self._cond.notify_all()
+
+    async def chat(self, message: str, session_id: str, timeout: float = 60):
+        """Run one chat on a leased worker, yielding its events."""
+        async with self.lease(session_id, timeout) as worker:
+            async for event in worker.chat(message, session_id):
+                yield event
+
+    async def _health_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            for worker in list(self.workers):
+                if worker is None or worker.busy or worker.retiring:
+                    continue
+                if not worker.alive or not await worker.ping():
+                    self._spawn_later(self._recycle(worker))
+                    continue
+                rss = worker.rss_mb()
+                if rss is not None and rss >= self.max_rss_mb:
+                    self._spawn_later(self._recycle(worker))
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "available": self.available,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "slot": slot,
+                    "pid": w.pid if w else None,
+                    "alive": bool(w and w.alive),
+                    "busy": bool(w and w.busy),
+                    "served": w.served if w else 0,
+                    "rssMb": round(w.rss_mb() or 0, 1) if w else None,
+                    "starting": slot in self._starting,
+                    "error": self.errors[slot],
+                }
+                for slot, w in enumerate(self.workers)
+            ],
+        }
+
+    async def close(self):
+        self._closed = True
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*(w.stop() for w in self.workers if w is not None), return_exceptions=True)
@@ -13,15 +13,24 @@ async def auth_middleware(request: web.Request, handler):
     if not request.path.startswith("/api/"):
         return await handler(request)
 
+    # Probes from load balancers carry no token
+    if request.path == "/api/ready":
+        return await handler(request)
+
     # Skip if no token configured
     if not AUTH_TOKEN:
         return await handler(request)
 
     auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+    if auth_header.startswith("Bearer "):
+        token = auth_header[7:]
+    elif "token" in request.query and (request.headers.get("Upgrade", "").lower() == "websocket"
+                                       or request.path == "/api/events"):
+        # Browsers can't set headers on a WebSocket handshake or an EventSource
+        token = request.query["token"]
+    else:
         raise web.HTTPUnauthorized(text="Missing Bearer token")
 
-    token = auth_header[7:]
     if not secrets.compare_digest(token, AUTH_TOKEN):
         raise web.HTTPForbidden(text="Invalid token")
 
@@ -0,0 +1,113 @@
+"""Admission control for chat turns.
+
+Every chat turn takes a ticket. At most `max_active` turns run at once and
+at most one per session (nanobot sessions aren't safe to run concurrently);
+the rest wait in a FIFO queue of at most `max_queued` tickets, and anything
+beyond that is refused with `ChatBusy`. A waiting ticket is told its
+position whenever it changes. Tickets remember the task running the turn,
+so a session's chats can be cancelled from another request.
+"""
+
+import asyncio
+import time
+
+MAX_SESSION_QUEUED = 2  # waiting turns per session
+
+
+class ChatBusy(Exception):
+    """The wait queue (global or per session) is full."""
+
+
+class ChatTicket:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.state = "queued"        # queued | active | done
+        self.position = 0
+        self.created = time.monotonic()
+        self.task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+
+class ChatLimiter:
+    def __init__(self, max_active: int, max_queued: int):
+        self.max_active = max(1, max_active)
+        self.max_queued = max(0, max_queued)
+        self._queue: list[ChatTicket] = []
+        self._active: list[ChatTicket] = []
+        self.rejected = 0
+
+    def enqueue(self, session_id: str) -> ChatTicket:
+        """Take a ticket, admitting it right away if there's room. Raises ChatBusy."""
+        ticket = ChatTicket(session_id)
+        self._queue.append(ticket)
+        self._dispatch()
+        if ticket.state == "queued":
+            same_session = sum(1 for t in self._queue if t.session_id == session_id)
+            if len(self._queue) > self.max_queued or same_session > MAX_SESSION_QUEUED:
+                self._queue.remove(ticket)
+                ticket.state = "done"
+                self.rejected += 1
+                raise ChatBusy("too many chats in progress, try again shortly")
+        return ticket
+
+    async def wait(self, ticket: ChatTicket, on_position=None):
+        """Block until `ticket` is admitted; `await on_position(n)` on each queue move."""
+        reported = None
+        while True:
+            ticket._wake.clear()
+            if ticket.state != "queued":
+                return
+            if on_position is not None and ticket.position != reported:
+                reported = ticket.position
+                await on_position(reported)
+            await ticket._wake.wait()
+
+    def release(self, ticket: ChatTicket):
+        """Give the ticket's place back; releasing it again is a no-op."""
+        if ticket.state == "done":
+            return
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+        if ticket in self._active:
+            self._active.remove(ticket)
+        ticket.state = "done"
+        self._dispatch()
+
+    def _dispatch(self):
+        busy = {t.session_id for t in self._active}
+        for ticket in list(self._queue):
+            if len(self._active) >= self.max_active:
+                break
+            if ticket.session_id in busy:
+                continue
+            self._queue.remove(ticket)
+            self._active.append(ticket)
+            busy.add(ticket.session_id)
+            ticket.state = "active"
+            ticket._wake.set()
+        for i, ticket in enumerate(self._queue, 1):
+            if ticket.position != i:
+                ticket.position = i
+                ticket._wake.set()
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel the running and queued turns of a session; returns how many."""
+        count = 0
+        for ticket in self._active + self._queue:
+            if ticket.session_id == session_id and ticket.task is not None and not ticket.task.done():
+                ticket.task.cancel()
+                count += 1
+        return count
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "maxActive": self.max_active,
+            "maxQueued": self.max_queued,
+            "active": [t.session_id for t in self._active],
+            "queued": [
+                {"session": t.session_id, "position": t.position, "waitSeconds": round(now - t.created, 1)}
+                for t in self._queue
+            ],
+            "rejected": self.rejected,
+        }
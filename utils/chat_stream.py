@@ -0,0 +1,203 @@
+"""Incremental chat reply streaming.
+
+A chat source (a pooled worker or a one-off `nanobot agent` process) is
+normalized into an async iterator of `(kind, payload)` tuples:
+
+    ("progress", text)   tool-call hints, sent through immediately
+    ("delta", text)      a piece of the reply, in order
+    ("done", response)   end of the reply; `response` is the full text if
+                         the source knows it, else None
+    ("error", message)
+
+`relay()` turns that into `progress` / `delta` / `done` / `error` events for
+any transport, coalescing deltas so a reply arriving byte by byte doesn't
+become one event per byte.
+"""
+
+import asyncio
+import time
+
+COALESCE_INTERVAL = 0.05   # max seconds a delta waits for more text
+COALESCE_MAX_CHARS = 2048  # flush immediately once this much is pending
+
+_BANNER = "🐈"
+_PROGRESS = "↳"
+
+
+class StdoutDemux:
+    """Split `nanobot agent` stdout into progress lines and reply text as it arrives.
+
+    A line is classified by its first non-blank character: `↳` lines are
+    progress, the `🐈 nanobot` banner is dropped, anything else is reply
+    text and is passed through without waiting for the end of the line.
+    Blank lines are held back until more reply text follows, so the
+    streamed reply has no leading or trailing blank lines.
+    """
+
+    def __init__(self):
+        self._line = ""
+        self._kind: str | None = None   # None until the current line is classified
+        self._held = ""                 # newlines not yet known to be inside the reply
+        self._started = False
+
+    def _classify(self) -> str | None:
+        head = self._line.lstrip()
+        if not head:
+            return None
+        if head.startswith(_PROGRESS):
+            return "progress"
+        if head.startswith(_BANNER):
+            return "banner"
+        return "reply"
+
+    def _reply(self, text: str) -> list[tuple[str, str]]:
+        out = self._held + text if self._started else text
+        self._held = ""
+        self._started = True
+        return [("delta", out)] if out else []
+
+    def _end_line(self) -> list[tuple[str, str]]:
+        out = []
+        if self._kind == "progress":
+            out.append(("progress", self._line.strip().lstrip(_PROGRESS).strip()))
+        elif self._kind in ("reply", None) and self._started:
+            self._held += "\n"
+        self._line = ""
+        self._kind = None
+        return out
+
+    def feed(self, text: str) -> list[tuple[str, str]]:
+        out = []
+        while text:
+            segment, newline, text = text.partition("\n")
+            if self._kind == "reply":
+                out += self._reply(segment)
+            else:
+                self._line += segment
+                if self._kind is None:
+                    self._kind = self._classify()
+                    if self._kind == "reply":
+                        out += self._reply(self._line)
+                        self._line = ""
+            if newline:
+                out += self._end_line()
+        return out
+
+    def close(self) -> list[tuple[str, str]]:
+        return self._end_line() if self._kind == "progress" else []
+
+
+class DeltaCoalescer:
+    """Buffer reply pieces until COALESCE_INTERVAL passes or enough text is pending."""
+
+    def __init__(self, interval: float = COALESCE_INTERVAL, max_chars: int = COALESCE_MAX_CHARS):
+        self.interval = interval
+        self.max_chars = max_chars
+        self._parts: list[str] = []
+        self._size = 0
+        self.deadline: float | None = None
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._parts)
+
+    @property
+    def full(self) -> bool:
+        return self._size >= self.max_chars
+
+    def push(self, text: str):
+        if not text:
+            return
+        if not self._parts:
+            self.deadline = time.monotonic() + self.interval
+        self._parts.append(text)
+        self._size += len(text)
+
+    def take(self) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self.deadline = None
+        return text
+
+
+async def relay(events, emit, session_id: str, idle_timeout: float) -> None:
+    """Forward a chat source to `emit(event, data)`, coalescing deltas.
+
+    `idle_timeout` bounds the time without any event from the source; on
+    expiry an error event is emitted and the source is closed. The final
+    `done` event is a summary (character count and timings), not the reply.
+    """
+    coalescer = DeltaCoalescer()
+    started = time.monotonic()
+    last_event = started
+    first_delta: float | None = None
+    chars = 0
+    deltas = 0
+
+    async def flush():
+        nonlocal deltas
+        if coalescer.pending:
+            deltas += 1
+            await emit("delta", {"text": coalescer.take()})
+
+    pending = asyncio.ensure_future(events.__anext__())
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = idle_timeout - (now - last_event)
+            if coalescer.deadline is not None:
+                timeout = min(timeout, coalescer.deadline - now)
+            done, _ = await asyncio.wait({pending}, timeout=max(timeout, 0))
+            if not done:
+                now = time.monotonic()
+                if coalescer.deadline is not None and now >= coalescer.deadline:
+                    await flush()
+                if now - last_event >= idle_timeout:
+                    await flush()
+                    await emit("error", {"message": f"响应超时 ({int(idle_timeout)}s)"})
+                    return
+                continue
+            try:
+                kind, payload = pending.result()
+            except StopAsyncIteration:
+                await flush()
+                return
+            last_event = time.monotonic()
+
+            if kind == "delta":
+                if payload and first_delta is None:
+                    first_delta = last_event
+                chars += len(payload)
+                coalescer.push(payload)
+                if coalescer.full:
+                    await flush()
+            elif kind == "progress":
+                await flush()
+                await emit("progress", {"text": payload})
+            elif kind == "done":
+                # Sources that don't stream (older workers) only report the final text
+                if chars == 0 and payload:
+                    text = payload.strip()
+                    first_delta = last_event
+                    chars = len(text)
+                    coalescer.push(text)
+                await flush()
+                await emit("done", {
+                    "session_id": session_id,
+                    "chars": chars,
+                    "deltas": deltas,
+                    "firstDeltaMs": round((first_delta - started) * 1000) if first_delta else None,
+                    "durationMs": round((time.monotonic() - started) * 1000),
+                })
+                return
+            elif kind == "error":
+                await flush()
+                await emit("error", {"message": payload})
+                return
+            pending = asyncio.ensure_future(events.__anext__())
+    finally:
+        if not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await events.aclose()
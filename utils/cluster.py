@@ -0,0 +1,268 @@
+"""Multi-process serving: `python3 -m dashboard.server --workers N`.
+
+serve() forks N worker processes that each bind the dashboard port with
+SO_REUSEPORT, so the kernel spreads connections over them and search, JSON
+encoding and log scans run on N cores. The supervisor restarts workers
+that die and stops them all on SIGINT/SIGTERM.
+
+Worker 0 is the primary. It alone:
+
+- runs the background jobs (status sampler, history GC, chat agent pool,
+  the filesystem change feed),
+- watches the workspace, sessions and media trees and publishes each
+  change as a snapshot file; the other workers mirror those snapshots
+  instead of scanning and watching the trees themselves,
+- handles every write and every stateful route. The others forward
+  non-GET API requests, chat, the WebSocket, the change feed, manual cron
+  runs and the status history to it over a loopback socket, so
+  per-process locks, queues and run registries stay correct, and the
+  primary publishes the trees before a write's response goes out, so the
+  next listing on any worker sees it.
+
+Metrics, profiles and slow-request traces are per worker; responses carry
+X-Dashboard-Worker to tell which one answered.
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import aiohttp
+from aiohttp import WSMsgType, hdrs, web
+
+from dashboard.config import DASHBOARD_DATA_DIR
+from dashboard.utils.executor import FS, run_blocking
+from dashboard.utils.workspace_tree import media_tree, sessions_tree, workspace_tree
+
+SNAPSHOT_DIR = DASHBOARD_DATA_DIR / "workers"
+PUBLISH_INTERVAL = 0.5  # seconds between the primary's tree checks
+RESPAWN_DELAY = 1.0
+SNAPSHOT_WAIT = 30.0  # seconds a follower waits for the primary's first snapshots
+
+# GET routes served by the primary only: they use its in-memory state
+PRIMARY_PREFIXES = ("/api/chat", "/api/ws", "/api/events", "/api/cron/runs", "/api/status/history")
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-connection", "te", "trailer",
+    "transfer-encoding", "upgrade", "host",
+}
+
+TREES = {"workspace": workspace_tree, "sessions": sessions_tree, "media": media_tree}
+
+# Set in each forked process before create_app()
+index = 0
+count = 1
+primary_port: int | None = None
+
+session_key = web.AppKey("cluster_session", aiohttp.ClientSession)
+publisher_key = web.AppKey("cluster_publisher", asyncio.Task)
+
+
+def is_primary() -> bool:
+    """True in worker 0 and in single-process mode."""
+    return index == 0
+
+
+def _to_primary(request: web.Request) -> bool:
+    if not request.path.startswith("/api/"):
+        return False
+    return request.method not in READ_METHODS or request.path.startswith(PRIMARY_PREFIXES)
+
+
+# -- primary: tree snapshots ---------------------------------------------------
+
+def _publish_all():
+    for tree in TREES.values():
+        tree.publish()
+
+
+async def _publish_loop():
+    while True:
+        try:
+            await run_blocking(FS, _publish_all)
+        except Exception:
+            pass
+        await asyncio.sleep(PUBLISH_INTERVAL)
+
+
+# -- followers: forwarding to the primary ---------------------------------------
+
+def _forward_headers(headers, *drop: str) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS and k.lower() not in drop}
+
+
+async def _proxy_ws(request: web.Request, session: aiohttp.ClientSession, url: str) -> web.WebSocketResponse:
+    ws = web.WebSocketResponse(max_msg_size=1024 * 1024)
+    await ws.prepare(request)
+    headers = {k: v for k, v in request.headers.items() if k.lower() == "authorization"}
+    try:
+        async with session.ws_connect(url, headers=headers, max_msg_size=1024 * 1024) as upstream:
+            async def pump(src, dst):
+                async for msg in src:
+                    if msg.type == WSMsgType.TEXT:
+                        await dst.send_str(msg.data)
+                    elif msg.type == WSMsgType.BINARY:
+                        await dst.send_bytes(msg.data)
+                    else:
+                        break
+
+            pumps = [asyncio.create_task(pump(ws, upstream)), asyncio.create_task(pump(upstream, ws))]
+            try:
+                await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in pumps:
+                    task.cancel()
+    except aiohttp.ClientError:
+        pass
+    await ws.close()
+    return ws
+
+
+async def _proxy(request: web.Request) -> web.StreamResponse:
+    session = request.app[session_key]
+    url = f"http://127.0.0.1:{primary_port}{request.rel_url}"
+    if request.headers.get(hdrs.UPGRADE, "").lower() == "websocket":
+        return await _proxy_ws(request, session, url)
+
+    # The body is streamed through, so it goes out chunked rather than with its length
+    data = request.content.iter_chunked(64 * 1024) if request.body_exists else None
+    try:
+        upstream = await session.request(request.method, url, data=data, allow_redirects=False,
+                                         headers=_forward_headers(request.headers, "content-length"))
+    except aiohttp.ClientError:
+        raise web.HTTPServiceUnavailable(text="Primary worker unavailable", headers={"Retry-After": "1"})
+    async with upstream:
+        response = web.StreamResponse(status=upstream.status, reason=upstream.reason,
+                                      headers=_forward_headers(upstream.headers))
+        await response.prepare(request)
+        async for chunk in upstream.content.iter_any():
+            await response.write(chunk)
+        await response.write_eof()
+    return response
+
+
+@web.middleware
+async def cluster_middleware(request: web.Request, handler):
+    if count > 1 and not is_primary() and _to_primary(request):
+        response = await _proxy(request)
+    else:
+        response = await handler(request)
+        if count > 1 and request.method not in READ_METHODS and request.path.startswith("/api/"):
+            # Publish before answering: the client's next read may land on any worker
+            await run_blocking(FS, _publish_all)
+    if count > 1 and not response.prepared:
+        response.headers["X-Dashboard-Worker"] = str(index)
+    return response
+
+
+async def _start(app: web.Application):
+    if count == 1:
+        return
+    if is_primary():
+        app[publisher_key] = asyncio.create_task(_publish_loop())
+    else:
+        app[session_key] = aiohttp.ClientSession(
+            auto_decompress=False, timeout=aiohttp.ClientTimeout(total=None, sock_connect=5))
+
+
+async def _stop(app: web.Application):
+    task = app.get(publisher_key)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    session = app.get(session_key)
+    if session is not None:
+        await session.close()
+
+
+def setup(app: web.Application):
+    app.on_startup.append(_start)
+    app.on_cleanup.append(_stop)
+
+
+# -- supervisor -----------------------------------------------------------------
+
+def _run_worker(i: int, n: int, create_app, host: str, port: int, internal: socket.socket):
+    global index, count, primary_port
+    index, count, primary_port = i, n, internal.getsockname()[1]
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    for name, tree in TREES.items():
+        tree.share(SNAPSHOT_DIR / f"{name}.json", owner=is_primary())
+    if not is_primary():
+        # Mirror the primary's first scan rather than repeating it in every worker
+        deadline = time.monotonic() + SNAPSHOT_WAIT
+        while time.monotonic() < deadline and not all(
+                (SNAPSHOT_DIR / f"{name}.json").exists() for name in TREES):
+            time.sleep(0.1)
+    app = create_app()
+    if is_primary():
+        web.run_app(app, host=host, port=port, reuse_port=True, sock=internal, print=None)
+    else:
+        internal.close()
+        web.run_app(app, host=host, port=port, reuse_port=True, print=None)
+
+
+def serve(create_app, host: str, port: int, n: int):
+    """Run `n` worker processes on host:port until SIGINT/SIGTERM (Linux, macOS)."""
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+        sys.exit("--workers needs SO_REUSEPORT and fork(); run a single process instead")
+
+    # Stale snapshots from a previous run must not be mirrored
+    shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    # Loopback listener the followers forward to; bound here so a restarted primary keeps its port
+    internal = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    internal.bind(("127.0.0.1", 0))
+    internal.listen(128)
+
+    children: dict[int, int] = {}
+    stopping = False
+
+    def spawn(i: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(i, n, create_app, host, port, internal)
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        children[pid] = i
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for i in range(n):
+        spawn(i)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        i = children.pop(pid, None)
+        if i is None or stopping:
+            continue
+        print(f"worker {i} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        time.sleep(RESPAWN_DELAY)
+        if not stopping:
+            spawn(i)
+    internal.close()
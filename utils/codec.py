@@ -0,0 +1,112 @@
+"""JSON encoding and decoding for API responses and JSONL files.
+
+Uses orjson when it is installed, else msgspec, else the stdlib json
+module; all three produce the same JSON for the data this dashboard
+handles. Neither fast library is required: `pip install orjson` is enough
+to speed up every endpoint.
+
+- dumps() returns compact UTF-8 bytes (non-ASCII kept as-is), which
+  json_response() sends as the body without a str round trip.
+- loads() accepts bytes or str and raises ValueError on invalid JSON,
+  whichever backend is in use.
+- iter_jsonl() decodes a whole JSONL buffer, skipping blank and invalid
+  lines the way the session readers always have.
+"""
+
+import json
+from typing import Any, Iterator
+
+from aiohttp import web
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+# Decoder.decode_lines is newer than the rest of msgspec's JSON API
+_DECODE_LINES = BACKEND == "msgspec" and hasattr(msgspec.json.Decoder, "decode_lines")
+
+_std_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return _std_encoder.encode(obj).encode("utf-8")
+
+
+if BACKEND == "orjson":
+    def _fast_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)  # orjson.JSONDecodeError is a ValueError
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def _fast_dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def loads(data: bytes | str) -> Any:
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+
+else:
+    _fast_dumps = _std_dumps
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON for `obj`."""
+    try:
+        return _fast_dumps(obj)
+    except TypeError:
+        # Non-str dict keys, integers beyond 64 bits, ...: stdlib handles them
+        return _std_dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """dumps() as text, for WebSocket text frames and other str sinks."""
+    return dumps(obj).decode("utf-8")
+
+
+def json_response(data: Any, *, status: int = 200, reason: str | None = None,
+                  headers=None) -> web.Response:
+    """Drop-in for web.json_response that encodes with dumps()."""
+    return web.Response(body=dumps(data), status=status, reason=reason,
+                        headers=headers, content_type="application/json")
+
+
+def iter_jsonl(data: bytes) -> Iterator[Any]:
+    """Decoded values of a JSONL buffer; blank and unparseable lines are skipped."""
+    if _DECODE_LINES:
+        try:
+            values = _decoder.decode_lines(data)
+        except msgspec.DecodeError:
+            pass  # one bad line fails the batch; redo it line by line
+        else:
+            yield from values
+            return
+    for line in data.split(b"\n"):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            continue
@@ -0,0 +1,181 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+compression_middleware compresses buffered responses (json_response and
+other web.Response bodies) of compressible types once they reach
+COMPRESS_MIN_BYTES, using the best coding the client accepts. gzip is
+always available; br needs the `brotli` package and zstd the `zstandard`
+package (or Python 3.14's compression.zstd). Large bodies are compressed
+in the search pool rather than on the event loop.
+
+Streaming responses are left alone by the middleware: their bytes are
+already on the wire when the handler returns. Streams that must arrive
+event by event (SSE) use CompressedStreamResponse, which flushes the
+compressor after every write so each event is decodable as soon as it
+arrives.
+
+Static files are not compressed on the fly: the build writes .br/.gz
+next to each asset and FileResponse serves the variant the client accepts.
+"""
+
+import zlib
+
+from aiohttp import hdrs, web
+
+from dashboard.config import COMPRESS_MIN_BYTES
+from dashboard.utils.executor import SEARCH, run_blocking
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+zstd = zstandard = None
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard
+    except ImportError:
+        pass
+
+# Bodies at least this large are compressed off the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml",
+}
+
+# Server preference when the client accepts several equally
+AVAILABLE = [c for c, ok in (("zstd", zstd is not None or zstandard is not None),
+                             ("br", brotli is not None),
+                             ("gzip", True)) if ok]
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Best available coding the Accept-Encoding header allows, or None."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding] = q
+    best = None
+    for coding in AVAILABLE:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def compress(coding: str, data: bytes) -> bytes:
+    if coding == "gzip":
+        c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        return c.compress(data) + c.flush()
+    if coding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if zstd is not None:
+        return zstd.compress(data, ZSTD_LEVEL)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+class StreamCompressor:
+    """Incremental compressor whose every compress() output is decodable on its own."""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "gzip":
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        elif coding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif zstd is not None:
+            self._c = zstd.ZstdCompressor(ZSTD_LEVEL)
+        else:
+            self._c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.coding == "gzip":
+            return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+        if self.coding == "br":
+            return self._c.process(data) + self._c.flush()
+        if zstd is not None:
+            return self._c.compress(data, zstd.ZstdCompressor.FLUSH_BLOCK)
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._c.finish()
+        return self._c.flush()
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def _weaken(response: web.StreamResponse):
+    # The encoded body is a different representation: a strong tag no longer matches it
+    etag = response.headers.get(hdrs.ETAG)
+    if etag and not etag.startswith("W/"):
+        response.headers[hdrs.ETAG] = "W/" + etag
+
+
+class CompressedStreamResponse(web.StreamResponse):
+    """StreamResponse compressed with the client's preferred coding, flushed per write."""
+
+    def __init__(self, request: web.Request, **kwargs):
+        super().__init__(**kwargs)
+        coding = negotiate(request.headers.get(hdrs.ACCEPT_ENCODING, ""))
+        self._compressor = StreamCompressor(coding) if coding else None
+        self.headers.add(hdrs.VARY, hdrs.ACCEPT_ENCODING)
+        if self._compressor is not None:
+            self.headers[hdrs.CONTENT_ENCODING] = coding
+            _weaken(self)
+
+    async def write(self, data) -> None:
+        if self._compressor is not None and data:
+            data = self._compressor.compress(bytes(data))
+        await super().write(data)
+
+    async def write_eof(self, data: bytes = b"") -> None:
+        if self._compressor is not None and not self._eof_sent:
+            compressor, self._compressor = self._compressor, None
+            data = compressor.compress(data) + compressor.finish() if data else compressor.finish()
+        await super().write_eof(data)
+
+
+@web.middleware
+async def compression_middleware(request: web.Request, handler):
+    response = await handler(request)
+    if (type(response) is not web.Response or request.method == "HEAD"
+            or response.status < 200 or response.status in (204, 206, 304)
+            or hdrs.CONTENT_ENCODING in response.headers
+            or "no-transform" in response.headers.get(hdrs.CACHE_CONTROL, "")
+            or not _compressible(response.content_type)):
+        return response
+    body = response.body
+    if not isinstance(body, (bytes, bytearray)) or len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.headers.add(hdrs.VARY, hdrs.ACCEPT_ENCODING)
+    coding = negotiate(request.headers.get(hdrs.ACCEPT_ENCODING, ""))
+    if coding is None:
+        return response
+    if len(body) >= OFFLOAD_BYTES:
+        compressed = await run_blocking(SEARCH, compress, coding, bytes(body))
+    else:
+        compressed = compress(coding, bytes(body))
+    response.body = compressed
+    response.headers[hdrs.CONTENT_ENCODING] = coding
+    _weaken(response)
+    return response
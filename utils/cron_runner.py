@@ -0,0 +1,211 @@
+"""Asynchronous run queue for manually triggered cron jobs.
+
+`nanobot cron run <id>` executes a whole agent turn, so runs are queued
+and executed in the background behind a concurrency limit. Each run keeps
+its (bounded) stdout/stderr so clients can follow it live or afterwards;
+the history of finished runs is capped at `history` entries.
+"""
+
+import asyncio
+import codecs
+import os
+import secrets
+import signal
+import time
+from collections import OrderedDict
+
+MAX_OUTPUT_CHARS = 200_000  # per run; later output is dropped and flagged
+READ_CHUNK = 4096
+STOP_TIMEOUT = 5  # seconds between SIGTERM and SIGKILL for a cancelled run
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class CronRun:
+    def __init__(self, job_id: str, job_name: str):
+        self.id = secrets.token_hex(6)
+        self.job_id = job_id
+        self.job_name = job_name
+        self.status = "queued"   # queued → running → succeeded | failed | error | cancelled
+        self.queued_at = _now_ms()
+        self.started_at: int | None = None
+        self.finished_at: int | None = None
+        self.exit_code: int | None = None
+        self.error: str | None = None
+        self.output: list[tuple[str, str]] = []  # (stream, text)
+        self.output_chars = 0
+        self.truncated = False
+        self.proc: asyncio.subprocess.Process | None = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def duration_ms(self) -> int | None:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or _now_ms()) - self.started_at
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_change(self, timeout: float | None = None):
+        event = self._changed
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def append(self, stream: str, text: str):
+        if not text:
+            return
+        room = MAX_OUTPUT_CHARS - self.output_chars
+        if room <= 0:
+            self.truncated = True
+            return
+        if len(text) > room:
+            text = text[:room]
+            self.truncated = True
+        self.output.append((stream, text))
+        self.output_chars += len(text)
+        self.notify()
+
+    def to_dict(self, include_output: bool = False) -> dict:
+        d = {
+            "runId": self.id,
+            "jobId": self.job_id,
+            "jobName": self.job_name,
+            "status": self.status,
+            "queuedAtMs": self.queued_at,
+            "startedAtMs": self.started_at,
+            "finishedAtMs": self.finished_at,
+            "durationMs": self.duration_ms,
+            "exitCode": self.exit_code,
+            "error": self.error,
+            "truncated": self.truncated,
+        }
+        if include_output:
+            d["output"] = [{"stream": s, "text": t} for s, t in self.output]
+        return d
+
+
+class CronRunner:
+    def __init__(self, concurrency: int = 2, history: int = 100):
+        self.concurrency = max(1, concurrency)
+        self.history = history
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._runs: OrderedDict[str, CronRun] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, job_id: str, job_name: str = "") -> CronRun:
+        run = CronRun(job_id, job_name)
+        self._runs[run.id] = run
+        self._trim()
+        task = asyncio.create_task(self._execute(run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return run
+
+    def get(self, run_id: str) -> CronRun | None:
+        return self._runs.get(run_id)
+
+    def list(self, job_id: str | None = None) -> list[CronRun]:
+        runs = reversed(self._runs.values())
+        return [r for r in runs if job_id is None or r.job_id == job_id]
+
+    def stats(self) -> dict:
+        runs = self._runs.values()
+        return {
+            "concurrency": self.concurrency,
+            "queued": sum(1 for r in runs if r.status == "queued"),
+            "running": sum(1 for r in runs if r.status == "running"),
+        }
+
+    def _trim(self):
+        """Drop the oldest finished runs beyond the history cap."""
+        excess = len(self._runs) - self.history
+        if excess <= 0:
+            return
+        for run_id in [r.id for r in self._runs.values() if r.finished][:excess]:
+            del self._runs[run_id]
+
+    async def _pump(self, run: CronRun, stream: asyncio.StreamReader, name: str):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                run.append(name, decoder.decode(b"", final=True))
+                return
+            run.append(name, decoder.decode(chunk))
+
+    async def _execute(self, run: CronRun):
+        async with self._sem:
+            if run.status == "cancelled":
+                return
+            run.status = "running"
+            run.started_at = _now_ms()
+            run.notify()
+            try:
+                run.proc = await asyncio.create_subprocess_exec(
+                    "nanobot", "cron", "run", run.job_id,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env={**os.environ, "PYTHONUNBUFFERED": "1"},
+                    start_new_session=True,
+                )
+                if run.status == "cancelled":   # cancelled while the process was starting
+                    self._kill(run)
+                await asyncio.gather(
+                    self._pump(run, run.proc.stdout, "stdout"),
+                    self._pump(run, run.proc.stderr, "stderr"),
+                )
+                run.exit_code = await run.proc.wait()
+                if run.status != "cancelled":
+                    run.status = "succeeded" if run.exit_code == 0 else "failed"
+            except FileNotFoundError:
+                run.status = "error"
+                run.error = "nanobot CLI not found"
+            except Exception as e:
+                run.status = "error"
+                run.error = str(e)
+            finally:
+                run.proc = None
+                run.finished_at = _now_ms()
+                run.notify()
+                self._trim()
+
+    @staticmethod
+    def _signal(proc: asyncio.subprocess.Process, sig: int):
+        if proc.returncode is None:
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _kill(self, run: CronRun):
+        """SIGTERM the run's process group, then SIGKILL it if still alive after STOP_TIMEOUT."""
+        if run.proc.returncode is None:
+            self._signal(run.proc, signal.SIGTERM)
+            asyncio.get_running_loop().call_later(STOP_TIMEOUT, self._signal, run.proc, signal.SIGKILL)
+
+    def cancel(self, run: CronRun) -> bool:
+        if run.finished:
+            return False
+        run.status = "cancelled"
+        if run.proc is not None:
+            self._kill(run)
+        elif run.started_at is None:
+            run.finished_at = _now_ms()
+        run.notify()
+        return True
+
+    async def shutdown(self):
+        for run in list(self._runs.values()):
+            self.cancel(run)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
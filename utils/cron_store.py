@@ -0,0 +1,113 @@
+"""Transactional access to cron/jobs.json.
+
+A transaction holds an exclusive flock on a sidecar lock file for the
+whole read-modify-write, re-reads the jobs under the lock (through the
+shared file cache, so an unchanged file is not reparsed) and replaces
+jobs.json atomically. The data file itself is never truncated in place,
+so readers — including the gateway — never see a partial document.
+
+The gateway writes jobs.json too (each job's run `state`), and it takes
+no lock at all, so the flock only orders dashboard writers. To keep its
+updates, the commit re-reads the file just before replacing it and
+merges: jobs the transaction didn't touch the state of get the state now
+on disk, jobs that appeared meanwhile are kept and jobs that disappeared
+meanwhile (e.g. deleteAfterRun) stay deleted. What is left is the short
+window between that re-read and the rename.
+
+The flock can wait on other writers, so a transaction must not run on
+the event loop: async code goes through `apply()`, which runs it in the
+FS pool.
+"""
+
+import asyncio
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from dashboard.config import CRON_JOBS_FILE
+from dashboard.utils.executor import FS, run_blocking
+from dashboard.utils.filecache import CachedFile, file_cache, thaw
+
+EMPTY_STORE = {"version": 1, "jobs": []}
+
+
+def _jobs_by_id(doc) -> dict:
+    jobs = doc.get("jobs") if isinstance(doc, dict) else None
+    return {job.get("id"): job for job in jobs or [] if isinstance(job, dict) and job.get("id")}
+
+
+def _merge_external(data: dict, original, current):
+    """Fold changes written by someone else during the transaction into `data`."""
+    before, now = _jobs_by_id(original), _jobs_by_id(current)
+    ours = _jobs_by_id(data)
+    for job_id, job in ours.items():
+        disk = now.get(job_id)
+        if disk is None or "state" not in disk:
+            continue
+        if job.get("state") == (before.get(job_id) or {}).get("state"):
+            job["state"] = thaw(disk["state"])
+    gone = before.keys() - now.keys()
+    if gone:
+        data["jobs"] = [job for job in data["jobs"] if not (isinstance(job, dict) and job.get("id") in gone)]
+    for job_id, disk in now.items():
+        if job_id not in before and job_id not in ours:
+            data["jobs"].append(thaw(disk))
+
+
+class CronStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock_path = path.with_name(path.name + ".lock")
+
+    def read(self) -> dict:
+        """Current jobs document (cached, read-only)."""
+        return self.entry().data
+
+    def entry(self) -> CachedFile:
+        """Current jobs document with its file version."""
+        return file_cache.get(self.path, EMPTY_STORE)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a mutable copy of the jobs document under an exclusive lock.
+
+        The document is written back on a clean exit if it changed; any
+        exception aborts the transaction without touching the file.
+        Blocks on the lock, so never call it on the event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("cron store transaction on the event loop; use apply()")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            original = file_cache.get(self.path, EMPTY_STORE).data
+            data = thaw(original)
+            if not isinstance(data, dict):
+                data = thaw(EMPTY_STORE)
+            if not isinstance(data.get("jobs"), list):
+                data["jobs"] = []
+            yield data
+            if data != thaw(original):
+                current = file_cache.get(self.path, EMPTY_STORE).data
+                if current is not original:
+                    _merge_external(data, original, current)
+                file_cache.write_json(self.path, data)
+        finally:
+            os.close(fd)  # releases the flock
+
+    async def apply(self, fn):
+        """Run `fn(data)` inside a transaction in the FS pool; returns its result."""
+        def run():
+            with self.transaction() as data:
+                return fn(data)
+
+        return await run_blocking(FS, run)
+
+
+cron_store = CronStore(CRON_JOBS_FILE)
@@ -0,0 +1,260 @@
+"""Cron expression engine: compiled field bitsets and fire-time enumeration.
+
+Standard 5-field syntax (minute hour day-of-month month day-of-week) with
+lists, ranges, steps, month/day names and the @hourly/@daily/... macros.
+Each field compiles to an int bitset; `compile_cron` is memoized, so every
+expression is parsed once per process.
+
+Fire times are enumerated day by day: months and days are skipped using
+the bitsets, and within a matching day the fires are the cross product of
+the hour and minute bit lists — no minute-by-minute scanning. Day-of-month
+and day-of-week follow Vixie cron: if both are restricted, either matches.
+Times are evaluated in the job's IANA timezone (default: local time);
+wall times skipped by a DST jump do not fire, repeated ones fire once.
+"""
+
+import calendar
+import os
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MAX_YEARS_AHEAD = 5  # give up on expressions that never fire (e.g. Feb 30)
+
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+_MONTH_NAMES = {m.lower(): i for i, m in enumerate(calendar.month_abbr) if m}
+_DOW_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+# (low, high, names) per field
+_FIELDS = (
+    (0, 59, {}),
+    (0, 23, {}),
+    (1, 31, {}),
+    (1, 12, _MONTH_NAMES),
+    (0, 7, _DOW_NAMES),  # 7 is an alias for Sunday
+)
+
+
+class CronError(ValueError):
+    """Invalid cron expression or timezone."""
+
+
+def _value(token: str, names: dict, low: int, high: int) -> int:
+    v = names.get(token.lower())
+    if v is None:
+        if not token.isdigit():
+            raise CronError(f"Invalid value: {token!r}")
+        v = int(token)
+    if not low <= v <= high:
+        raise CronError(f"Value {v} out of range {low}-{high}")
+    return v
+
+
+def _parse_field(field: str, low: int, high: int, names: dict) -> int:
+    mask = 0
+    for part in field.split(","):
+        rng, _, step_s = part.partition("/")
+        step = 1
+        if step_s:
+            if not step_s.isdigit() or int(step_s) == 0:
+                raise CronError(f"Invalid step: {part!r}")
+            step = int(step_s)
+        if rng in ("*", "?"):
+            start, end = low, high
+        elif "-" in rng:
+            a, _, b = rng.partition("-")
+            start, end = _value(a, names, low, high), _value(b, names, low, high)
+            if start > end:
+                raise CronError(f"Invalid range: {part!r}")
+        else:
+            start = _value(rng, names, low, high)
+            end = high if step_s else start
+        for v in range(start, end + 1, step):
+            mask |= 1 << v
+    return mask
+
+
+def _bits(mask: int) -> tuple[int, ...]:
+    return tuple(i for i in range(mask.bit_length()) if mask >> i & 1)
+
+
+class CronExpr:
+    def __init__(self, expr: str):
+        self.expr = expr
+        text = _MACROS.get(expr.strip().lower(), expr)
+        fields = text.split()
+        if len(fields) != 5:
+            raise CronError(f"Expected 5 fields, got {len(fields)}: {expr!r}")
+        minute, hour, dom, month, dow = (
+            _parse_field(f, lo, hi, names) for f, (lo, hi, names) in zip(fields, _FIELDS)
+        )
+        if dow >> 7 & 1:
+            dow = (dow | 1) & 0x7F
+        self.minutes = _bits(minute)
+        self.hours = _bits(hour)
+        self.dom = dom
+        self.months = month
+        self.dow = dow
+        self.dom_star = fields[2].startswith(("*", "?"))
+        self.dow_star = fields[4].startswith(("*", "?"))
+        # Minute-of-day offsets for one matching day
+        self.day_offsets = tuple(h * 60 + m for h in self.hours for m in self.minutes)
+
+    def matches_day(self, d: date) -> bool:
+        dom_ok = self.dom >> d.day & 1
+        dow_ok = self.dow >> ((d.weekday() + 1) % 7) & 1
+        if self.dom_star and self.dow_star:
+            return True
+        if self.dom_star:
+            return bool(dow_ok)
+        if self.dow_star:
+            return bool(dom_ok)
+        return bool(dom_ok or dow_ok)
+
+    def _days(self, start: date, end: date):
+        """Yield matching dates in [start, end], skipping excluded months."""
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            if self.months >> month & 1:
+                first = start.day if (year, month) == (start.year, start.month) else 1
+                last = calendar.monthrange(year, month)[1]
+                if (year, month) == (end.year, end.month):
+                    last = min(last, end.day)
+                if self.dow_star and not self.dom_star:
+                    days = (d for d in _bits(self.dom) if first <= d <= last)
+                else:
+                    days = range(first, last + 1)
+                for day in days:
+                    d = date(year, month, day)
+                    if self.matches_day(d):
+                        yield d
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+
+    def iter_fires(self, start: datetime, end: datetime, tz: tzinfo):
+        """Yield fire times (aware, UTC) with start < t <= end, in order."""
+        local_start = start.astimezone(tz)
+        local_end = end.astimezone(tz)
+        for d in self._days(local_start.date(), local_end.date()):
+            midnight = datetime(d.year, d.month, d.day)
+            next_midnight = midnight + timedelta(days=1)
+            off0 = midnight.replace(tzinfo=tz).utcoffset()
+            steady = off0 == next_midnight.replace(tzinfo=tz).utcoffset()
+            base = (midnight - off0).replace(tzinfo=timezone.utc)
+            for minute_of_day in self.day_offsets:
+                if steady:
+                    t = base + timedelta(minutes=minute_of_day)
+                else:
+                    wall = midnight + timedelta(minutes=minute_of_day)
+                    t = wall.replace(tzinfo=tz).astimezone(timezone.utc)
+                    # Skip wall times that don't exist (spring-forward gap)
+                    if t.astimezone(tz).replace(tzinfo=None) != wall:
+                        continue
+                if t <= start:
+                    continue
+                if t > end:
+                    return
+                yield t
+
+    def next_fires(self, after: datetime, tz: tzinfo, count: int = 1) -> list[datetime]:
+        """Return up to `count` fire times strictly after `after`."""
+        out = []
+        horizon = after + timedelta(days=366 * MAX_YEARS_AHEAD)
+        for t in self.iter_fires(after, horizon, tz):
+            out.append(t)
+            if len(out) >= count:
+                break
+        return out
+
+
+@lru_cache(maxsize=1024)
+def compile_cron(expr: str) -> CronExpr:
+    """Parse and compile a cron expression (memoized)."""
+    return CronExpr(expr)
+
+
+@lru_cache(maxsize=1)
+def _local_zone() -> tzinfo:
+    name = os.environ.get("TZ", "").lstrip(":")
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    try:
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f, key="localtime")
+    except (OSError, ValueError):
+        return datetime.now().astimezone().tzinfo
+
+
+@lru_cache(maxsize=256)
+def get_zone(name: str | None) -> tzinfo:
+    """IANA zone by name; None/empty means the host's local zone."""
+    if not name:
+        return _local_zone()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise CronError(f"Unknown timezone: {name!r}")
+
+
+def _ms(t: datetime) -> int:
+    return int(t.timestamp() * 1000)
+
+
+def schedule_fires(job: dict, start_ms: int, end_ms: int, limit: int) -> list[int]:
+    """Fire times (epoch ms) of a nanobot job in (start_ms, end_ms], at most `limit`.
+
+    Handles the three schedule kinds nanobot stores: cron (expr + tz),
+    every (everyMs, anchored on the last run or creation time) and at (atMs).
+    """
+    schedule = job.get("schedule") or {}
+    kind = schedule.get("kind", "cron")
+
+    if kind == "at":
+        at = schedule.get("atMs")
+        return [at] if at and start_ms < at <= end_ms and limit > 0 else []
+
+    if kind == "every":
+        every = schedule.get("everyMs")
+        if not every or every <= 0:
+            return []
+        state = job.get("state") or {}
+        anchor = state.get("nextRunAtMs") or state.get("lastRunAtMs") or job.get("createdAtMs") or start_ms
+        if anchor <= start_ms:
+            anchor += ((start_ms - anchor) // every + 1) * every
+        out = []
+        t = anchor
+        while t <= end_ms and len(out) < limit:
+            out.append(t)
+            t += every
+        return out
+
+    expr = compile_cron(schedule.get("expr") or "")
+    tz = get_zone(schedule.get("tz"))
+    start = datetime.fromtimestamp(start_ms / 1000, timezone.utc)
+    end = datetime.fromtimestamp(end_ms / 1000, timezone.utc)
+    out = []
+    for t in expr.iter_fires(start, end, tz):
+        out.append(_ms(t))
+        if len(out) >= limit:
+            break
+    return out
+
+
+def next_run_ms(job: dict, now_ms: int) -> int | None:
+    """First fire time after `now_ms`, or None if it never fires again."""
+    horizon = now_ms + 366 * MAX_YEARS_AHEAD * 86_400_000
+    fires = schedule_fires(job, now_ms, horizon, 1)
+    return fires[0] if fires else None
@@ -0,0 +1,45 @@
+"""Conditional GET for list endpoints.
+
+A list's tag is built from versions the server already tracks — the
+generation of a watched directory tree, the cached version of a JSON file,
+a handful of stats — never from the response body, so a request whose
+If-None-Match still matches is answered with 304 before anything is
+scanned or serialized.
+
+Tree generations count from zero in every process, so each tag carries a
+random epoch: after a restart every tag changes once instead of colliding
+with tags from the previous run. With --workers the epoch is drawn before
+the fork and shared, and tree versions include the primary's origin (see
+WorkspaceTree.stamp), so the same tag means the same listing whichever
+worker answers.
+"""
+
+import hashlib
+import secrets
+
+from aiohttp import web
+
+EPOCH = secrets.token_hex(4)
+
+
+def version_tag(*parts) -> str:
+    """Weak ETag for a listing whose content is determined by `parts`."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{EPOCH}-{digest}"'
+
+
+def cache_headers(etag: str) -> dict:
+    # no-cache: browsers keep the body but revalidate with If-None-Match every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: web.Request, etag: str) -> web.Response | None:
+    """A 304 response if the request's If-None-Match matches `etag`, else None."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    tags = [t.strip() for t in header.split(",")]
+    plain = etag.removeprefix("W/")
+    if "*" in tags or any(t.removeprefix("W/") == plain for t in tags):
+        return web.Response(status=304, headers=cache_headers(etag))
+    return None
@@ -0,0 +1,145 @@
+"""Bounded thread pools for blocking work, one per kind of work.
+
+Handlers must not touch the disk on the event loop: one slow search or a
+big session parse would stall every chat stream and WebSocket on the
+server. Blocking calls go through `run_blocking(category, fn, ...)`
+instead, which runs them in that category's pool:
+
+    fs      small reads, writes, stats and directory listings
+    search  CPU-heavy scans (full-text search, parsing large files)
+    bulk    long jobs: archives, history GC, recursive deletes
+
+Each pool has a fixed number of threads, so a burst of searches queues
+behind the search threads instead of starving file reads. Like
+asyncio.to_thread, the caller's contextvars are carried into the thread.
+Queue depth and timings per pool are reported by stats(); inside a traced
+request each call is also recorded as a span (see utils/trace.py).
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dashboard.config import IO_THREADS, SEARCH_THREADS
+from dashboard.utils import trace
+
+FS = "fs"
+SEARCH = "search"
+BULK = "bulk"
+
+POOL_SIZES = {FS: IO_THREADS, SEARCH: SEARCH_THREADS, BULK: 2}
+
+
+class _Pool:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"dashboard-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.run_total = 0.0
+        self.wait_max = 0.0
+
+    def submitted(self):
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+    def started(self, waited: float):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def finished(self, ran: float, ok: bool):
+        with self._lock:
+            self.active -= 1
+            self.run_total += ran
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "threads": self.size,
+                "active": self.active,
+                "queued": self.queued,
+                "maxQueued": self.max_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avgWaitMs": round(self.wait_total / done * 1000, 2) if done else None,
+                "maxWaitMs": round(self.wait_max * 1000, 2),
+                "avgRunMs": round(self.run_total / done * 1000, 2) if done else None,
+            }
+
+
+_pools: dict[str, _Pool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(category: str) -> _Pool:
+    pool = _pools.get(category)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(category)
+            if pool is None:
+                pool = _pools[category] = _Pool(category, POOL_SIZES[category])
+    return pool
+
+
+async def run_blocking(category: str, fn, /, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` in the `category` pool and return its result."""
+    pool = _pool(category)
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    request_trace = trace.current()
+    submitted = time.perf_counter()
+
+    def run():
+        started = time.perf_counter()
+        pool.started(started - submitted)
+        ok = False
+        try:
+            result = call()
+            ok = True
+            return result
+        finally:
+            ended = time.perf_counter()
+            pool.finished(ended - started, ok)
+            if request_trace is not None:
+                name = getattr(fn, "__qualname__", type(fn).__name__)
+                request_trace.add(f"{category}:{name}", "", started, ended, started - submitted)
+
+    pool.submitted()
+    try:
+        future = asyncio.get_running_loop().run_in_executor(pool.executor, run)
+    except RuntimeError:
+        # Pool shut down: the work never started
+        with pool._lock:
+            pool.queued -= 1
+        raise
+    return await future
+
+
+def stats() -> dict:
+    return {name: _pool(name).stats() for name in POOL_SIZES}
+
+
+def shutdown():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.executor.shutdown(wait=False, cancel_futures=True)
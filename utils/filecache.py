@@ -0,0 +1,178 @@
+"""Shared, mtime-validated cache for the small JSON files every route reads.
+
+An entry is keyed by the file's (mtime_ns, size, inode) version: a lookup
+costs one stat() and the file is only reparsed after it changed on disk.
+Writes made through `write_json` are atomic (temp file + rename) and prime
+the cache with the new version directly.
+
+Cached data is deep-frozen (FrozenDict / tuple) so one entry can be handed
+to every request without copying; use `thaw()` to get a mutable copy.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from dashboard.utils.codec import loads
+from dashboard.utils.trace import span
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation. Still a dict, so json.dumps and .get work."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached data is read-only; use thaw() for a mutable copy")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(obj: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Recursively convert frozen data back into plain dicts and lists."""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    path: Path
+    version: tuple[int, int, int] | None  # (mtime_ns, size, inode); None if missing
+    data: Any
+
+    @property
+    def exists(self) -> bool:
+        return self.version is not None
+
+    @property
+    def etag(self) -> str:
+        if self.version is None:
+            return '"missing"'
+        return '"%x-%x-%x"' % self.version
+
+
+def _version(st: os.stat_result) -> tuple[int, int, int]:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def atomic_write(path: Path, data: bytes, mode: int | None = None) -> os.stat_result:
+    """Write `data` to `path` via a temp file in the same directory plus rename.
+
+    Keeps the permissions of an existing file (config.json holds secrets).
+    Returns the stat of the new file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if mode is None:
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            os.fchmod(f.fileno(), mode)
+            st = os.fstat(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return st
+
+
+class FileCache:
+    def __init__(self):
+        self._entries: dict[Path, CachedFile] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, default: Any = None) -> CachedFile:
+        """Return the parsed file, reparsing only if its version changed.
+
+        Missing or unparsable files yield `default` (frozen).
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+                self.misses += 1
+            return CachedFile(path, None, freeze(default))
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.version == _version(st):
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        try:
+            with open(path, "rb") as f:
+                # Version from the opened fd so it matches the bytes we parse
+                version = _version(os.fstat(f.fileno()))
+                raw = f.read()
+            with span("parse", path.name):
+                data = freeze(loads(raw))
+        except OSError:
+            return CachedFile(path, None, freeze(default))
+        except ValueError:
+            data = freeze(default)
+
+        entry = CachedFile(path, version, data)
+        with self._lock:
+            self._entries[path] = entry
+            self.misses += 1
+        return entry
+
+    def write_json(self, path: Path, data: Any) -> CachedFile:
+        """Serialize `data` (indent=2, UTF-8) atomically and prime the cache."""
+        text = json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+        st = atomic_write(path, text.encode("utf-8"))
+        entry = CachedFile(path, _version(st), freeze(data))
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def invalidate(self, path: Path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else None,
+            }
+
+
+file_cache = FileCache()
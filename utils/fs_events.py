@@ -0,0 +1,260 @@
+"""Filesystem change feed over NANOBOT_ROOT.
+
+One watcher thread turns changes under the nanobot root into typed events:
+
+    {"kind": "sessions", "type": "modified", "path": "telegram_42.jsonl"}
+
+kind is sessions, workspace or media (paths relative to that directory),
+cron (jobs.json), config (config.json, .state.json) or logs (*.log in the
+root); type is created, modified, deleted, or rescan when too much changed
+to list (reload everything of that kind).
+
+The thread sleeps on the inotify descriptors of the workspace, sessions
+and media trees plus one of its own on the root and cron directories.
+When any of them fires it waits DEBOUNCE for the burst to finish, then
+refreshes the trees (which note what their rescans changed) and re-stats
+the loose files, and publishes everything as one batch. Without inotify
+it wakes every POLL_INTERVAL and the same refresh finds changes by
+polling. The trees are driven from here, so requests no longer poll them.
+
+Batches carry an increasing seq and go to in-process listeners on the
+event loop (cache invalidation) and to subscribers (the SSE endpoint,
+routes/events.py). The last REPLAY batches are kept so a reconnecting
+client can resume from its Last-Event-ID.
+"""
+
+import asyncio
+import os
+import select
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from dashboard.config import CONFIG_FILE, CRON_JOBS_FILE, NANOBOT_ROOT, STATE_FILE
+from dashboard.utils import inotify
+from dashboard.utils.filecache import file_cache
+from dashboard.utils.workspace_tree import media_tree, sessions_tree, workspace_tree
+
+KINDS = ("sessions", "workspace", "media", "cron", "config", "logs")
+TREES = {"sessions": sessions_tree, "workspace": workspace_tree, "media": media_tree}
+FILES = {CONFIG_FILE: "config", STATE_FILE: "config", CRON_JOBS_FILE: "cron"}
+
+DEBOUNCE = 0.2          # seconds to let a burst of events settle into one batch
+POLL_INTERVAL = 1.0     # wake-up interval without inotify (or to catch drained events)
+MAX_BATCH = 200         # events per kind in one batch before they collapse into a rescan
+REPLAY = 100            # batches kept for Last-Event-ID resumes
+SUBSCRIBER_QUEUE = 64   # batches a subscriber may fall behind before it must resync
+
+
+class Subscription:
+    def __init__(self, kinds: set[str]):
+        self.kinds = kinds
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self.lagged = False
+
+    def push(self, batch: dict):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop its backlog and have it reload instead
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> dict | None:
+        """The next batch, or None when batches were dropped and the client must resync."""
+        batch = await self.queue.get()
+        if batch is None:
+            self.lagged = False
+        return batch
+
+
+def _collapse(events: list[dict]) -> list[dict]:
+    """Deduplicate by (kind, path), keeping the latest type; rescan per kind when too many."""
+    latest: dict[tuple[str, str], dict] = {}
+    for event in events:
+        latest.pop((event["kind"], event["path"]), None)
+        latest[(event["kind"], event["path"])] = event
+    out, per_kind = [], {}
+    for event in latest.values():
+        per_kind.setdefault(event["kind"], []).append(event)
+    for kind, items in per_kind.items():
+        if len(items) > MAX_BATCH or any(e["type"] == "rescan" for e in items):
+            out.append({"kind": kind, "type": "rescan", "path": ""})
+        else:
+            out.extend(items)
+    return out
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.seq = 0
+        self.batches = 0
+        self.recent: deque[dict] = deque(maxlen=REPLAY)
+        self._subscribers: set[Subscription] = set()
+        self._listeners: dict[str, list] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake_r = self._wake_w = -1
+        self._inotify: inotify.Inotify | None = None
+        self._files: dict[Path, tuple[int, int]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # -- event-loop side ---------------------------------------------------
+
+    def listen(self, kind: str, fn):
+        """Call `fn(events)` on the event loop with each batch's events of `kind`."""
+        self._listeners.setdefault(kind, []).append(fn)
+
+    def subscribe(self, kinds=KINDS) -> Subscription:
+        sub = Subscription(set(kinds))
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subscribers.discard(sub)
+
+    def since(self, seq: int) -> list[dict] | None:
+        """Batches after `seq`, or None if some of them are no longer kept."""
+        if seq > self.seq:
+            return None     # from another run of the server
+        missed = [b for b in self.recent if b["seq"] > seq]
+        if seq < self.seq and (not missed or missed[0]["seq"] != seq + 1):
+            return None
+        return missed
+
+    def _publish(self, events: list[dict]):
+        self.seq += 1
+        self.batches += 1
+        batch = {"seq": self.seq, "time": time.time(), "events": events}
+        self.recent.append(batch)
+        for kind in {e["kind"] for e in events}:
+            mine = [e for e in events if e["kind"] == kind]
+            for fn in self._listeners.get(kind, ()):
+                try:
+                    fn(mine)
+                except Exception:
+                    pass
+        for sub in list(self._subscribers):
+            if not sub.kinds.isdisjoint(e["kind"] for e in events):
+                sub.push(batch)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._thread is not None:
+            return
+        self._loop = loop
+        self._stop.clear()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="dashboard-fs-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        self._thread.join(timeout=5)
+        self._thread = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    # -- watcher thread ----------------------------------------------------
+
+    def _watch_files(self):
+        try:
+            self._inotify = inotify.Inotify()
+        except OSError:
+            return
+        for path in {NANOBOT_ROOT, CRON_JOBS_FILE.parent}:
+            try:
+                self._inotify.add_watch(str(path))
+            except OSError:
+                pass    # missing for now: the poll interval still catches it
+
+    def _stat_files(self) -> dict[Path, tuple[int, int]]:
+        paths = list(FILES)
+        try:
+            with os.scandir(NANOBOT_ROOT) as it:
+                paths += [NANOBOT_ROOT / e.name for e in it if e.name.endswith(".log") and e.is_file()]
+        except OSError:
+            pass
+        out = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out[path] = (st.st_size, st.st_mtime_ns)
+        return out
+
+    def _file_events(self) -> list[dict]:
+        files = self._stat_files()
+        events = []
+        for path in self._files.keys() | files.keys():
+            old, new = self._files.get(path), files.get(path)
+            if old == new:
+                continue
+            kind = FILES.get(path, "logs")
+            if kind != "logs":
+                file_cache.invalidate(path)
+            change = "created" if old is None else "deleted" if new is None else "modified"
+            events.append({"kind": kind, "type": change, "path": path.name})
+        self._files = files
+        return events
+
+    def _collect(self) -> list[dict]:
+        events = []
+        for kind, tree in TREES.items():
+            tree.refresh(poll=True)
+            events += [{"kind": kind, "type": t, "path": p} for t, p in tree.take_changes()]
+        events += self._file_events()
+        return _collapse(events)
+
+    def _run(self):
+        for tree in TREES.values():
+            tree.drive()
+            tree.refresh(poll=True)
+            tree.record_changes()
+        self._files = self._stat_files()
+        self._watch_files()
+        try:
+            while not self._stop.is_set():
+                fds = [self._wake_r] + [fd for fd in [tree.fileno() for tree in TREES.values()] if fd is not None]
+                if self._inotify is not None:
+                    fds.append(self._inotify.fileno())
+                try:
+                    ready, _, _ = select.select(fds, [], [], POLL_INTERVAL)
+                except (OSError, ValueError):
+                    ready = []      # a tree rebuilt and closed its descriptor meanwhile
+                if self._stop.is_set():
+                    break
+                if ready:
+                    time.sleep(DEBOUNCE)
+                if self._inotify is not None:
+                    self._inotify.read_events()     # only a wake-up; the files are re-stat'ed
+                try:
+                    events = self._collect()
+                except Exception:
+                    continue
+                if events:
+                    try:
+                        self._loop.call_soon_threadsafe(self._publish, events)
+                    except RuntimeError:
+                        break   # the loop closed without stop()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            for tree in TREES.values():
+                tree.driven = False
+
+
+fs_events = ChangeFeed()
@@ -0,0 +1,144 @@
+"""JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) application.
+
+Both functions work on plain (thawed) dicts/lists and return the patched
+document; the input may be modified in place.
+"""
+
+import copy
+from typing import Any
+
+
+class PatchError(ValueError):
+    """Raised when a patch is malformed or does not apply to the document."""
+
+
+def _parse_pointer(pointer: Any) -> list[str]:
+    if not isinstance(pointer, str):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [p.replace("~1", "/").replace("~0", "~") for p in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token.startswith("0") and token != "0"):
+        raise PatchError(f"Invalid array index: {token!r}")
+    idx = int(token)
+    if idx > len(container) or (idx == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {token}")
+    return idx
+
+
+def _resolve_parent(doc: Any, tokens: list[str]) -> Any:
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return node
+
+
+def _get(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        return doc
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent[last]
+    if isinstance(parent, list):
+        return parent[_index(parent, last)]
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the document root")
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(last)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, last))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_json_patch(doc: Any, operations: list) -> Any:
+    """Apply an RFC 6902 operation list. Raises PatchError on failure."""
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch must be an array of operations")
+    for op in operations:
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise PatchError(f"Invalid operation: {op!r}")
+        kind = op["op"]
+        if not isinstance(kind, str):
+            raise PatchError(f"Invalid operation: {op!r}")
+        tokens = _parse_pointer(op["path"])
+        if kind in ("add", "replace", "test") and "value" not in op:
+            raise PatchError(f"'{kind}' requires a value")
+
+        if kind == "add":
+            doc = _add(doc, tokens, op["value"])
+        elif kind == "remove":
+            _remove(doc, tokens)
+        elif kind == "replace":
+            _get(doc, tokens)  # must exist
+            if not tokens:
+                doc = op["value"]
+            else:
+                _remove(doc, tokens)
+                doc = _add(doc, tokens, op["value"])
+        elif kind in ("move", "copy"):
+            if "from" not in op:
+                raise PatchError(f"'{kind}' requires a from")
+            src = _parse_pointer(op["from"])
+            if kind == "move" and tokens[:len(src)] == src and tokens != src:
+                raise PatchError("Cannot move a value into one of its children")
+            value = _remove(doc, src) if kind == "move" else copy.deepcopy(_get(doc, src))
+            doc = _add(doc, tokens, value)
+        elif kind == "test":
+            if _get(doc, tokens) != op["value"]:
+                raise PatchError(f"Test failed at {op['path']}")
+        else:
+            raise PatchError(f"Unknown operation: {kind!r}")
+    return doc
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 merge patch: objects merge recursively, null deletes."""
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
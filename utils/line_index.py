@@ -0,0 +1,123 @@
+"""Sparse line-offset index for random access into large text files.
+
+Records the byte offset of every STRIDE-th line, so line N is reached
+with one seek plus at most STRIDE-1 readline() calls, and the file is
+never held in memory. Building the index streams the file once in
+CHUNK_SIZE blocks. When a file only grew (same inode, larger size — the
+usual case for .jsonl logs) indexing resumes where it stopped.
+
+A "line" ends at "\\n"; a final unterminated line also counts.
+"""
+
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+STRIDE = 64
+CHUNK_SIZE = 1 << 20
+MAX_LINE_BYTES = 1 << 20    # longer lines are cut (and flagged) when read
+MAX_INDEXES = 32
+
+_NEWLINE = re.compile(b"\n")
+
+
+class LineIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ino = None
+        self._mtime_ns = None
+        self._size = -1
+        self._offsets = array("Q", [0])   # start of lines 0, STRIDE, 2*STRIDE, ...
+        self._complete = 0                # lines ending in "\n"
+        self._indexed_to = 0              # byte offset just after the last "\n"
+
+    def _reset(self):
+        self._offsets = array("Q", [0])
+        self._complete = 0
+        self._indexed_to = 0
+
+    def _scan(self, f, size: int):
+        f.seek(self._indexed_to)
+        pos = self._indexed_to
+        while pos < size:
+            chunk = f.read(min(CHUNK_SIZE, size - pos))
+            if not chunk:
+                break
+            for m in _NEWLINE.finditer(chunk):
+                self._complete += 1
+                if self._complete % STRIDE == 0:
+                    self._offsets.append(pos + m.end())
+            last = chunk.rfind(b"\n")
+            if last >= 0:
+                self._indexed_to = pos + last + 1
+            pos += len(chunk)
+
+    def update(self) -> int:
+        """Bring the index up to date with the file; returns the total line count."""
+        with self._lock:
+            st = os.stat(self.path)
+            if (st.st_ino, st.st_mtime_ns, st.st_size) != (self._ino, self._mtime_ns, self._size):
+                # Only pure growth can resume; anything else may have rewritten lines
+                if st.st_ino != self._ino or st.st_size <= self._size:
+                    self._reset()
+                with open(self.path, "rb") as f:
+                    self._scan(f, st.st_size)
+                self._ino, self._mtime_ns, self._size = st.st_ino, st.st_mtime_ns, st.st_size
+            return self.total_lines
+
+    @property
+    def total_lines(self) -> int:
+        return self._complete + (1 if self._size > self._indexed_to else 0)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read_lines(self, start: int, count: int) -> list[tuple[str, bool]]:
+        """Lines [start, start+count) as (text, truncated) pairs, without line endings."""
+        total = self.update()
+        with self._lock:
+            if start >= total or count <= 0:
+                return []
+            checkpoint = min(start // STRIDE, len(self._offsets) - 1)
+            out = []
+            with open(self.path, "rb") as f:
+                f.seek(self._offsets[checkpoint])
+                for _ in range(start - checkpoint * STRIDE):
+                    _skip_line(f)
+                for _ in range(min(count, total - start)):
+                    raw = f.readline(MAX_LINE_BYTES)
+                    truncated = len(raw) == MAX_LINE_BYTES and not raw.endswith(b"\n")
+                    if truncated:
+                        _skip_line(f)
+                    text = raw.rstrip(b"\n").rstrip(b"\r").decode("utf-8", errors="replace")
+                    out.append((text, truncated))
+            return out
+
+
+def _skip_line(f):
+    while True:
+        raw = f.readline(CHUNK_SIZE)
+        if not raw or raw.endswith(b"\n"):
+            return
+
+
+_indexes: OrderedDict[str, LineIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def line_index(path: Path) -> LineIndex:
+    """Shared index for `path` (LRU of MAX_INDEXES files); call .update() or read_lines()."""
+    key = str(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = LineIndex(path)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+        return index
@@ -0,0 +1,186 @@
+"""Request, event-loop, executor and admission metrics in Prometheus text format.
+
+metrics_middleware times every request under its route template
+(/api/memory/files/{path}, not the concrete path, so label cardinality
+stays bounded; paths no route matches share the "unmatched" label) and
+tracks how many are in flight. Streaming responses (SSE, WebSocket) count
+until the stream ends.
+
+A background probe sleeps LAG_INTERVAL at a time and records how late it
+wakes up: the event-loop lag every other request on the loop also pays.
+
+Everything is updated on the event loop, so the counters need no locks;
+per request the cost is a dict lookup, a bisect and a few increments.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+from dashboard.utils import admission, executor
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LAG_INTERVAL = 0.5
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+CLIENT_CLOSED = 499     # client went away before the response was complete
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot: +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        sep = "," if labels else ""
+        out = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {total}')
+        total += self.counts[-1]
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {total}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}" if labels else f"{name}_sum {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {total}" if labels else f"{name}_count {total}")
+        return out
+
+
+class RouteStats:
+    __slots__ = ("in_flight", "statuses", "latency")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.statuses: dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.lag = Histogram(LAG_BUCKETS)
+        self.lag_last = 0.0
+
+    def route(self, method: str, template: str) -> RouteStats:
+        key = (method if method in METHODS else "OTHER", template)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        return stats
+
+    def observe_lag(self, seconds: float):
+        self.lag_last = seconds
+        self.lag.observe(seconds)
+
+    def render(self) -> str:
+        out = [
+            "# HELP dashboard_start_time_seconds Unix time the process started.",
+            "# TYPE dashboard_start_time_seconds gauge",
+            f"dashboard_start_time_seconds {self.started:.3f}",
+            "# HELP dashboard_requests_total Requests by route template and status code.",
+            "# TYPE dashboard_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, template), stats in routes:
+            labels = f'method="{method}",route="{_label(template)}"'
+            for status, count in sorted(stats.statuses.items()):
+                out.append(f'dashboard_requests_total{{{labels},status="{status}"}} {count}')
+        out += [
+            "# HELP dashboard_request_duration_seconds Request latency by route template.",
+            "# TYPE dashboard_request_duration_seconds histogram",
+        ]
+        for (method, template), stats in routes:
+            out += stats.latency.lines("dashboard_request_duration_seconds",
+                                       f'method="{method}",route="{_label(template)}"')
+        out += [
+            "# HELP dashboard_requests_in_flight Requests being handled, including open streams.",
+            "# TYPE dashboard_requests_in_flight gauge",
+        ]
+        for (method, template), stats in routes:
+            out.append(f'dashboard_requests_in_flight{{method="{method}",route="{_label(template)}"}} '
+                       f"{stats.in_flight}")
+
+        out += [
+            "# HELP dashboard_event_loop_lag_seconds How late the event loop ran a timer.",
+            "# TYPE dashboard_event_loop_lag_seconds histogram",
+            *self.lag.lines("dashboard_event_loop_lag_seconds", ""),
+            "# HELP dashboard_event_loop_lag_last_seconds Lag measured by the latest probe.",
+            "# TYPE dashboard_event_loop_lag_last_seconds gauge",
+            f"dashboard_event_loop_lag_last_seconds {self.lag_last:.6f}",
+        ]
+
+        pools = executor.stats()
+        for key, name, kind, doc in (
+            ("threads", "dashboard_executor_threads", "gauge", "Threads in the pool."),
+            ("active", "dashboard_executor_active", "gauge", "Calls running now."),
+            ("queued", "dashboard_executor_queued", "gauge", "Calls waiting for a thread."),
+            ("maxQueued", "dashboard_executor_queued_max", "gauge", "Deepest the queue has been."),
+            ("completed", "dashboard_executor_completed_total", "counter", "Calls that returned."),
+            ("failed", "dashboard_executor_failed_total", "counter", "Calls that raised."),
+        ):
+            out += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+            out += [f'{name}{{pool="{pool}"}} {s[key]}' for pool, s in pools.items()]
+
+        classes = admission.stats()
+        for key, name, kind, doc in (
+            ("limit", "dashboard_admission_limit", "gauge", "Requests of the class allowed to run at once."),
+            ("active", "dashboard_admission_active", "gauge", "Requests holding a slot."),
+            ("queued", "dashboard_admission_queued", "gauge", "Requests waiting for a slot."),
+            ("admitted", "dashboard_admission_admitted_total", "counter", "Requests given a slot."),
+            ("rejected", "dashboard_admission_rejected_total", "counter", "Requests refused with 503."),
+            ("coalesced", "dashboard_admission_coalesced_total", "counter", "Requests served by an identical running one."),
+        ):
+            out += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+            out += [f'{name}{{class="{cls}"}} {s[key]}' for cls, s in classes.items()]
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    resource = request.match_info.route.resource
+    stats = metrics.route(request.method, resource.canonical if resource is not None else "unmatched")
+    stats.in_flight += 1
+    status = 500
+    started = time.perf_counter()
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    except asyncio.CancelledError:
+        status = CLIENT_CLOSED
+        raise
+    finally:
+        stats.in_flight -= 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latency.observe(time.perf_counter() - started)
+
+
+async def probe_lag(interval: float = LAG_INTERVAL):
+    """Record event-loop lag forever (run as a task)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        metrics.observe_lag(max(0.0, loop.time() - started - interval))
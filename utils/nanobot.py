@@ -1,49 +1,155 @@
 """Nanobot process detection and data utilities."""
 
 import asyncio
-import json
+import os
+import time
 from pathlib import Path
 
-from dashboard.config import CONFIG_FILE, CRON_JOBS_FILE
+from dashboard.config import CONFIG_FILE, CRON_JOBS_FILE, STATE_FILE
+from dashboard.utils.filecache import file_cache
+from dashboard.utils.trace import span
 
 
 async def is_gateway_running() -> dict:
     """Check if nanobot gateway process is running."""
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "pgrep", "-f", "nanobot gateway",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await proc.communicate()
+        with span("subprocess", "pgrep"):
+            proc = await asyncio.create_subprocess_exec(
+                "pgrep", "-f", "nanobot gateway",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, _ = await proc.communicate()
         pids = stdout.decode().strip().split("\n") if stdout.decode().strip() else []
         return {"running": len(pids) > 0, "pids": pids}
     except Exception:
         return {"running": False, "pids": []}
 
 
-def read_config() -> dict:
-    """Read nanobot config.json."""
-    if not CONFIG_FILE.exists():
-        return {}
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_process_stats(pid: int) -> dict | None:
+    """Read cumulative CPU time and RSS of a process from /proc (Linux).
+
+    Returns None if the process is gone or /proc is unavailable.
+    """
     try:
-        return json.loads(CONFIG_FILE.read_text())
-    except (json.JSONDecodeError, OSError):
-        return {}
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # comm (field 2) may contain spaces and parens; fields resume after the last ')'
+    fields = raw[raw.rfind(b")") + 2:].split()
+    try:
+        return {
+            "cpuSeconds": (int(fields[11]) + int(fields[12])) / _CLK_TCK,
+            "rssBytes": int(fields[21]) * _PAGE_SIZE,
+            "threads": int(fields[17]),
+        }
+    except (IndexError, ValueError):
+        return None
 
 
-def read_cron_jobs() -> dict:
-    """Read cron/jobs.json."""
-    if not CRON_JOBS_FILE.exists():
-        return {"version": 1, "jobs": []}
+def _parse_ps_time(value: str) -> float:
+    """Parse ps TIME ([[dd-]hh:]mm:ss[.xx]) into seconds."""
+    days = 0
+    if "-" in value:
+        d, _, value = value.partition("-")
+        days = int(d)
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return days * 86400 + seconds
+
+
+async def _ps_process_stats(pids: list[int]) -> dict[int, dict]:
+    """Fallback for systems without /proc (macOS): one `ps` call for all pids."""
     try:
-        return json.loads(CRON_JOBS_FILE.read_text())
-    except (json.JSONDecodeError, OSError):
-        return {"version": 1, "jobs": []}
+        with span("subprocess", "ps"):
+            proc = await asyncio.create_subprocess_exec(
+                "ps", "-o", "pid=,rss=,time=", "-p", ",".join(str(p) for p in pids),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await proc.communicate()
+    except OSError:
+        return {}
+    stats = {}
+    for line in stdout.decode().splitlines():
+        parts = line.split()
+        if len(parts) != 3:
+            continue
+        try:
+            stats[int(parts[0])] = {
+                "cpuSeconds": _parse_ps_time(parts[2]),
+                "rssBytes": int(parts[1]) * 1024,
+                "threads": None,
+            }
+        except ValueError:
+            continue
+    return stats
+
+
+class GatewayProbe:
+    """Periodic resource probe for the gateway processes.
 
+    pgrep is only re-run every `refresh_interval` seconds or when a known
+    pid disappears; per-sample cost is then a /proc read per process.
+    CPU percent is derived from the CPU-time delta between two samples.
+    """
 
-def write_cron_jobs(data: dict):
-    """Write cron/jobs.json with atomic rename."""
-    tmp = CRON_JOBS_FILE.with_suffix(".tmp")
-    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-    tmp.rename(CRON_JOBS_FILE)
+    def __init__(self, refresh_interval: float = 10.0):
+        self.refresh_interval = refresh_interval
+        self._pids: list[int] = []
+        self._pids_at = 0.0
+        self._prev: dict[int, tuple[float, float]] = {}  # pid -> (wall, cpuSeconds)
+
+    async def _refresh_pids(self):
+        gateway = await is_gateway_running()
+        self._pids = [int(p) for p in gateway["pids"] if p.isdigit()]
+        self._pids_at = time.monotonic()
+
+    async def sample(self) -> dict:
+        """Return {"up", "pids", "cpu" (percent), "rss" (bytes)} summed over all gateway processes."""
+        if not self._pids or time.monotonic() - self._pids_at > self.refresh_interval:
+            await self._refresh_pids()
+
+        stats = {pid: read_process_stats(pid) for pid in self._pids}
+        if self._pids and all(s is None for s in stats.values()) and not Path("/proc/self/stat").exists():
+            stats = await _ps_process_stats(self._pids)
+        if any(stats.get(pid) is None for pid in self._pids):
+            # A process exited (or restarted); rediscover on the next sample
+            self._pids_at = 0.0
+
+        now = time.monotonic()
+        cpu = 0.0
+        rss = 0
+        alive: dict[int, tuple[float, float]] = {}
+        for pid, st in stats.items():
+            if st is None:
+                continue
+            rss += st["rssBytes"]
+            prev = self._prev.get(pid)
+            if prev and now > prev[0]:
+                cpu += max(0.0, (st["cpuSeconds"] - prev[1]) / (now - prev[0]) * 100)
+            alive[pid] = (now, st["cpuSeconds"])
+        self._prev = alive
+
+        return {"up": bool(alive), "pids": sorted(alive), "cpu": cpu, "rss": rss}
+
+
+def read_config() -> dict:
+    """Read nanobot config.json (cached, read-only)."""
+    return file_cache.get(CONFIG_FILE, {}).data
+
+
+def read_state() -> dict:
+    """Read nanobot .state.json (cached, read-only)."""
+    return file_cache.get(STATE_FILE, {}).data
+
+
+def read_cron_jobs() -> dict:
+    """Read cron/jobs.json (cached, read-only — thaw() before mutating)."""
+    return file_cache.get(CRON_JOBS_FILE, {"version": 1, "jobs": []}).data
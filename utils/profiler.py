@@ -0,0 +1,126 @@
+"""Sampling profiler over every thread in the process.
+
+sample() wakes `hz` times a second, reads every thread's current frame
+with sys._current_frames() and counts the stacks. Nothing is installed in
+the profiled code (no sys.setprofile), so the cost is one frame walk per
+thread per tick, paid by the sampler thread. The event loop and each pool
+thread are all covered, under their own names.
+
+Like any in-process sampler it needs the GIL to take a sample, so it
+wakes when the running thread lets go of it: during I/O waits, or at the
+interpreter's switch interval (5 ms) in pure-Python code. Code that holds
+the event loop for milliseconds, the kind worth finding, shows up at its
+true weight; very short bursts between waits read as idle time.
+
+The result is in collapsed-stack format, one "thread;outer;...;inner count"
+line per distinct stack, as read by flamegraph.pl, inferno and speedscope.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_SECONDS = 120
+DEFAULT_HZ = 100
+
+# Innermost frames of a thread that is waiting for work, not doing any
+IDLE_FRAMES = {
+    ("selectors.py", "select"),     # event loop waiting for I/O
+    ("thread.py", "_worker"),       # pool thread waiting for a job
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+_running = False
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    parent = os.path.basename(os.path.dirname(filename))
+    return f"{code.co_name} ({parent}/{os.path.basename(filename)}:{code.co_firstlineno})"
+
+
+def _idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def sample(seconds: float, hz: int = DEFAULT_HZ, stop: threading.Event | None = None,
+           names: dict[int, str] | None = None, idle: bool = True) -> tuple[Counter, int]:
+    """Sample all other threads for `seconds`; return (stack counts, ticks).
+
+    Keys are ";"-joined stacks, thread name first and innermost frame last.
+    `names` overrides thread names by ident (e.g. the event loop's thread);
+    idle=False leaves out threads waiting for work (IDLE_FRAMES).
+    """
+    me = threading.get_ident()
+    interval = 1.0 / hz
+    names = dict(names or {})
+    labels: dict = {}
+    counts: Counter = Counter()
+    ticks = 0
+    deadline = time.monotonic() + seconds
+    next_tick = time.monotonic()
+    while True:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if not idle and _idle(frame.f_code):
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            name = names.get(ident)
+            if name is None:
+                for t in threading.enumerate():
+                    names.setdefault(t.ident, t.name)
+                name = names.setdefault(ident, f"thread-{ident}")
+            counts[(name, *reversed(codes))] += 1
+        ticks += 1
+        next_tick += interval
+        if next_tick >= deadline or (stop is not None and stop.is_set()):
+            break
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic()    # fell behind: skip the missed ticks
+
+    # Label once per distinct code object, not once per sample
+    stacks: Counter = Counter()
+    for (name, *codes), count in counts.items():
+        frames = [name.replace(";", ":")]
+        for code in codes:
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _label(code).replace(";", ":")
+            frames.append(label)
+        stacks[";".join(frames)] += count
+    return stacks, ticks
+
+
+def collapsed(stacks: Counter) -> str:
+    """Collapsed-stack text, heaviest stacks first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def profile(seconds: float, hz: int = DEFAULT_HZ, idle: bool = True) -> tuple[Counter, int]:
+    """Run sample() in its own thread; raises RuntimeError if a profile is already running.
+
+    The sampler gets a dedicated thread rather than a pool slot: the pools
+    may be the very thing that is saturated. Cancelling stops it early.
+    """
+    global _running
+    if _running:
+        raise RuntimeError("a profile is already running")
+    _running = True
+    stop = threading.Event()
+    names = {threading.get_ident(): "event-loop"}
+    try:
+        return await asyncio.to_thread(sample, seconds, hz, stop, names, idle)
+    finally:
+        stop.set()
+        _running = False
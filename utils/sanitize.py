@@ -37,7 +37,7 @@ def sanitize_config(config: dict) -> dict:
                 k: "***" if k in sensitive_keys and isinstance(v, str) and v else _sanitize(v)
                 for k, v in obj.items()
             }
-        if isinstance(obj, list):
+        if isinstance(obj, (list, tuple)):
             return [_sanitize(i) for i in obj]
         return obj
 
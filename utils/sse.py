@@ -0,0 +1,33 @@
+"""Server-Sent Events helpers."""
+
+from aiohttp import web
+
+from dashboard.utils.codec import dumps
+from dashboard.utils.compress import CompressedStreamResponse
+
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+async def prepare_sse(request: web.Request) -> web.StreamResponse:
+    """Start an event-stream response, compressed if the client accepts it."""
+    resp = CompressedStreamResponse(request, status=200, reason="OK", headers=SSE_HEADERS)
+    await resp.prepare(request)
+    return resp
+
+
+def format_event(event: str, data, id: int | str | None = None) -> bytes:
+    head = b"id: %s\n" % str(id).encode("utf-8") if id is not None else b""
+    return head + b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def send_event(resp: web.StreamResponse, event: str, data, id: int | str | None = None):
+    await resp.write(format_event(event, data, id))
+
+
+def wants_sse(request: web.Request) -> bool:
+    return "text/event-stream" in request.headers.get("Accept", "")
@@ -0,0 +1,113 @@
+"""Versioned text-file saves: content-hash ETags, byte-range edits, atomic writes.
+
+A file's version is the SHA-256 of its bytes, sent as a strong ETag. A save
+names the version it was made against (`base`); if the file on disk is no
+longer that version — the agent rewrote MEMORY.md meanwhile, or another
+tab saved — it fails with Conflict instead of overwriting the other write.
+
+Besides full contents, a save may carry edits against the base, so a
+one-line change to a large note sends one line:
+
+    [{"offset": 120, "delete": 5, "insert": "new text"}, ...]
+
+Offsets and lengths are UTF-8 byte positions in the base, edits ascending
+and non-overlapping.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable
+
+from dashboard.utils.filecache import atomic_write
+
+MAX_EDITS = 10_000
+
+# Saves run in worker threads; the version check and the write must not interleave
+_save_lock = threading.Lock()
+
+
+class PatchError(ValueError):
+    """Raised when edits are malformed or don't apply to the base."""
+
+
+class Conflict(Exception):
+    """The file is not at the base version; `etag` is the current one (None if missing)."""
+
+    def __init__(self, etag: str | None):
+        super().__init__("file changed since it was read")
+        self.etag = etag
+
+
+def content_etag(data: bytes) -> str:
+    return '"%s"' % hashlib.sha256(data).hexdigest()[:32]
+
+
+def apply_edits(base: bytes, edits) -> bytes:
+    if not isinstance(edits, list) or len(edits) > MAX_EDITS:
+        raise PatchError(f"edits must be a list of at most {MAX_EDITS} items")
+    out = []
+    pos = 0
+    for edit in edits:
+        if not isinstance(edit, dict):
+            raise PatchError("each edit must be an object")
+        offset = edit.get("offset")
+        delete = edit.get("delete", 0)
+        insert = edit.get("insert", "")
+        if (not isinstance(offset, int) or not isinstance(delete, int)
+                or isinstance(offset, bool) or isinstance(delete, bool)
+                or not isinstance(insert, str)):
+            raise PatchError("edit needs integer offset/delete and string insert")
+        if offset < pos or delete < 0 or offset + delete > len(base):
+            raise PatchError(f"edit at offset {offset} is out of order or out of range")
+        out.append(base[pos:offset])
+        out.append(insert.encode("utf-8"))
+        pos = offset + delete
+    out.append(base[pos:])
+    return b"".join(out)
+
+
+def read_versioned(path: Path) -> tuple[str, str]:
+    """(text, etag) of a UTF-8 file, read as-is (no newline translation)."""
+    data = path.read_bytes()
+    return data.decode("utf-8"), content_etag(data)
+
+
+def save_text(path: Path, *, base: str | None = None, content: str | None = None,
+              edits=None, on_write: Callable[[bytes | None, bytes], None] | None = None,
+              ) -> tuple[str, int]:
+    """Write `content`, or `edits` applied to version `base`; returns (etag, size).
+
+    Without `base` the write is unconditional (edits require one). Saves
+    are serialized, so within this process the version check and the
+    write can't interleave with another save. `on_write(old, new)` is
+    called after a successful write (old is None if the file didn't exist).
+    """
+    if edits is not None and base is None:
+        raise PatchError("edits require a base version")
+    with _save_lock:
+        return _save(path, base, content, edits, on_write)
+
+
+def _save(path, base, content, edits, on_write) -> tuple[str, int]:
+    try:
+        current = path.read_bytes()
+    except FileNotFoundError:
+        current = None
+    current_etag = content_etag(current) if current is not None else None
+    if base is not None and base.removeprefix("W/") != current_etag:
+        raise Conflict(current_etag)
+
+    if edits is not None:
+        data = apply_edits(current, edits)
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError:
+            raise PatchError("edits split a UTF-8 character")
+    else:
+        data = content.encode("utf-8")
+
+    atomic_write(path, data)
+    if on_write is not None:
+        on_write(current, data)
+    return content_etag(data), len(data)
@@ -0,0 +1,206 @@
+"""Fixed-memory, multi-resolution time series for gateway resource samples.
+
+Each tier is a ring buffer of fixed-width buckets backed by `array`s, so
+memory use is constant regardless of uptime. Every raw sample is folded
+into all tiers at once; a tier's bucket is committed to its ring when the
+next bucket starts.
+
+Default tiers: 1 s for 10 min, 10 s for 6 h, 1 min for 7 days.
+"""
+
+import math
+import os
+import struct
+from array import array
+from pathlib import Path
+
+# Per-bucket values, in storage order
+FIELDS = ("cpu", "cpuMax", "rss", "rssMax", "up")
+
+DEFAULT_TIERS = (
+    (1, 600),        # 1 s  × 10 min
+    (10, 2160),      # 10 s × 6 h
+    (60, 10080),     # 1 min × 7 days
+)
+
+MAX_POINTS = 1000  # auto-step target when the caller gives no step
+
+_MAGIC = b"NBTS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_TIER_HEADER = struct.Struct("<IIII")  # step, capacity, head, count
+
+
+class _Tier:
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.ts = array("I", bytes(4 * capacity))  # bucket start, unix seconds
+        self.values = [array("f", bytes(4 * capacity)) for _ in FIELDS]
+        self.head = 0   # next write slot
+        self.count = 0
+        # Open bucket: [start, n, cpu_sum, cpu_max, rss_sum, rss_max, up_sum]
+        self._open: list | None = None
+
+    def add(self, ts: float, cpu: float, rss: float, up: float):
+        start = int(ts) - int(ts) % self.step
+        b = self._open
+        if b is not None and b[0] != start:
+            self._commit()
+            b = None
+        if b is None:
+            self._open = [start, 1, cpu, cpu, rss, rss, up]
+            return
+        b[1] += 1
+        b[2] += cpu
+        b[3] = max(b[3], cpu)
+        b[4] += rss
+        b[5] = max(b[5], rss)
+        b[6] += up
+
+    def _open_row(self) -> tuple | None:
+        b = self._open
+        if b is None:
+            return None
+        n = b[1]
+        return (b[0], b[2] / n, b[3], b[4] / n, b[5], b[6] / n)
+
+    def _commit(self):
+        row = self._open_row()
+        self._open = None
+        if row is None:
+            return
+        # Ignore clock steps backwards rather than corrupting ring order
+        if self.count and row[0] <= self.ts[(self.head - 1) % self.capacity]:
+            return
+        i = self.head
+        self.ts[i] = row[0]
+        for col, v in zip(self.values, row[1:]):
+            col[i] = v
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def rows(self, frm: float, to: float):
+        """Yield (ts, *values) for buckets in [frm, to], oldest first, including the open bucket."""
+        first = (self.head - self.count) % self.capacity
+        for k in range(self.count):
+            i = (first + k) % self.capacity
+            t = self.ts[i]
+            if t < frm:
+                continue
+            if t > to:
+                return
+            yield (t, *(col[i] for col in self.values))
+        row = self._open_row()
+        if row is not None and frm <= row[0] <= to:
+            yield row
+
+    def oldest(self, now: float) -> float:
+        """Earliest timestamp this tier can cover once full."""
+        return now - self.step * self.capacity
+
+
+class ResourceHistory:
+    """Multi-resolution ring buffer of gateway cpu/rss samples."""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [_Tier(step, cap) for step, cap in tiers]
+        self.latest: dict | None = None
+
+    def add(self, ts: float, cpu: float, rss: float, up: bool):
+        self.latest = {"t": ts, "cpu": cpu, "rss": rss, "up": bool(up)}
+        for tier in self.tiers:
+            tier.add(ts, cpu, rss, 1.0 if up else 0.0)
+
+    def query(self, frm: float, to: float, now: float, step: int | None = None) -> dict:
+        """Return columnar points in [frm, to].
+
+        Reads the coarsest tier that still covers `frm` at no more than
+        `step` resolution; if `step` is coarser than that tier, buckets are
+        re-aggregated (mean of means, max of maxes). Without `step`, one is
+        chosen to keep at most MAX_POINTS points.
+        """
+        if step is None:
+            step = math.ceil((to - frm) / MAX_POINTS)
+        covering = [t for t in self.tiers if t.oldest(now) <= frm] or self.tiers[-1:]
+        tier = max((t for t in covering if t.step <= step), key=lambda t: t.step, default=covering[0])
+        step = max(tier.step, math.ceil(step / tier.step) * tier.step)
+
+        out: dict[str, list] = {"t": [], **{f: [] for f in FIELDS}}
+        acc: list | None = None
+
+        def flush():
+            n = acc[1]
+            out["t"].append(acc[0])
+            out["cpu"].append(round(acc[2] / n, 2))
+            out["cpuMax"].append(round(acc[3], 2))
+            out["rss"].append(int(acc[4] / n))
+            out["rssMax"].append(int(acc[5]))
+            out["up"].append(round(acc[6] / n, 3))
+
+        for t, cpu, cpu_max, rss, rss_max, up in tier.rows(frm, to):
+            start = t - t % step
+            if acc is not None and acc[0] != start:
+                flush()
+                acc = None
+            if acc is None:
+                acc = [start, 1, cpu, cpu_max, rss, rss_max, up]
+                continue
+            acc[1] += 1
+            acc[2] += cpu
+            acc[3] = max(acc[3], cpu_max)
+            acc[4] += rss
+            acc[5] = max(acc[5], rss_max)
+            acc[6] += up
+        if acc is not None:
+            flush()
+
+        return {"from": frm, "to": to, "step": step, "resolution": tier.step, **out}
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: Path):
+        """Write all committed buckets to `path` (binary, atomic rename)."""
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(self.tiers))]
+        for t in self.tiers:
+            parts.append(_TIER_HEADER.pack(t.step, t.capacity, t.head, t.count))
+            parts.append(t.ts.tobytes())
+            parts.extend(col.tobytes() for col in t.values)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(b"".join(parts))
+        os.replace(tmp, path)
+
+    def load(self, path: Path) -> bool:
+        """Restore buckets saved by `save`. Tiers whose layout changed are skipped."""
+        try:
+            data = path.read_bytes()
+            magic, version, n_tiers = _HEADER.unpack_from(data, 0)
+        except (OSError, struct.error):
+            return False
+        if magic != _MAGIC or version != _VERSION:
+            return False
+
+        offset = _HEADER.size
+        by_layout = {(t.step, t.capacity): t for t in self.tiers}
+        try:
+            for _ in range(n_tiers):
+                step, capacity, head, count = _TIER_HEADER.unpack_from(data, offset)
+                offset += _TIER_HEADER.size
+                size = 4 * capacity
+                chunk = data[offset:offset + size * (1 + len(FIELDS))]
+                offset += size * (1 + len(FIELDS))
+                if len(chunk) != size * (1 + len(FIELDS)):
+                    return False
+                tier = by_layout.get((step, capacity))
+                if tier is None:
+                    continue
+                tier.ts = array("I", chunk[:size])
+                tier.values = [
+                    array("f", chunk[size * (k + 1):size * (k + 2)]) for k in range(len(FIELDS))
+                ]
+                tier.head = head % capacity
+                tier.count = min(count, capacity)
+        except struct.error:
+            return False
+        return True
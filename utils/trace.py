@@ -0,0 +1,114 @@
+"""Span tracing for slow API requests.
+
+tracing_middleware gives every API request a Trace, held in a contextvar
+that run_blocking carries into pool threads. Code marks the work worth
+seeing with
+
+    with span("parse", path.name):
+        ...
+
+and run_blocking records each call itself: pool, function, queue wait and
+run time. When a request takes SLOW_REQUEST_MS or longer its spans are
+kept in a ring buffer (GET /api/debug/slow); other traces are dropped.
+Outside a request span() is a no-op.
+
+Streams (SSE, WebSocket) are long by design and are not recorded.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiohttp import web
+
+from dashboard.config import SLOW_REQUEST_MS
+
+KEEP = 50           # slow requests remembered
+MAX_SPANS = 500     # per request; a search over thousands of files stops here
+
+_current: ContextVar["Trace | None"] = ContextVar("dashboard_trace", default=None)
+
+slow_requests: deque[dict] = deque(maxlen=KEEP)
+
+
+class Trace:
+    __slots__ = ("started", "spans", "dropped")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: list[tuple] = []
+        self.dropped = 0
+
+    def add(self, name: str, detail: str, start: float, end: float, wait: float | None = None):
+        # list.append is atomic: pool threads may add while the loop does
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((name, detail, start, end, wait, threading.current_thread().name))
+
+    def to_dict(self) -> list[dict]:
+        out = []
+        for name, detail, start, end, wait, thread in sorted(self.spans, key=lambda s: s[2]):
+            item = {"name": name, "detail": detail, "startMs": round((start - self.started) * 1000, 2),
+                    "ms": round((end - start) * 1000, 2), "thread": thread}
+            if wait is not None:
+                item["waitMs"] = round(wait * 1000, 2)
+            out.append(item)
+        return out
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, detail: str = ""):
+    """Record the enclosed block as a span of the current request, if any."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, detail, start, time.perf_counter())
+
+
+@web.middleware
+async def tracing_middleware(request: web.Request, handler):
+    if not request.path.startswith("/api/") or request.path.startswith("/api/debug/"):
+        return await handler(request)
+    trace = Trace()
+    token = _current.set(trace)
+    status = 500
+    streamed = False
+    try:
+        response = await handler(request)
+        status = response.status
+        streamed = not isinstance(response, web.Response)
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    except asyncio.CancelledError:
+        status = 499    # client went away
+        raise
+    finally:
+        _current.reset(token)
+        ms = (time.perf_counter() - trace.started) * 1000
+        if ms >= SLOW_REQUEST_MS and not streamed:
+            resource = request.match_info.route.resource
+            slow_requests.append({
+                "at": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "route": resource.canonical if resource is not None else None,
+                "status": status,
+                "ms": round(ms, 1),
+                "spans": trace.to_dict(),
+                "droppedSpans": trace.dropped,
+            })
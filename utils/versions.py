@@ -0,0 +1,296 @@
+"""Content-addressed version history for workspace files.
+
+Every dashboard write (and the on-disk content it replaces, if the agent
+changed the file since the last recorded version) is kept as an object:
+
+    versions/objects/ab/cdef...   zlib(header + payload), named by the
+                                  SHA-256 of the file content it restores
+
+Identical content is stored once. An object is either a full snapshot or
+a delta against the file's previous version — the common prefix and
+suffix are copied and only the bytes in between are stored — so history
+grows with the bytes that changed, not with the number of saves. Delta
+chains are cut every MAX_CHAIN versions (or when a delta isn't much
+smaller than the file) with a new snapshot.
+
+Each file has an append-only index, versions/index/<sha1 of path>.jsonl,
+one line per version: {"path", "id", "t", "size", "op"}.
+
+gc() keeps the newest MIN_VERSIONS versions of every file and drops older
+ones, oldest first, until the live objects fit in the byte budget; then
+deletes objects nothing (no index entry, no delta depending on it) uses.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from dashboard.config import DASHBOARD_DATA_DIR, HISTORY_BUDGET_MB, HISTORY_MIN_VERSIONS
+from dashboard.utils.codec import iter_jsonl
+from dashboard.utils.filecache import atomic_write
+
+MAX_CHAIN = 32
+# Store a delta only when it's at most this fraction of the full content
+DELTA_RATIO = 0.5
+_BLOCK = 4096
+
+
+class VersionNotFound(KeyError):
+    pass
+
+
+def _common_prefix(a: bytes, b: bytes, limit: int) -> int:
+    n = 0
+    # Whole blocks at C speed, then bytes within the first differing block
+    while n + _BLOCK <= limit and a[n:n + _BLOCK] == b[n:n + _BLOCK]:
+        n += _BLOCK
+    while n < limit and a[n] == b[n]:
+        n += 1
+    return n
+
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    n = 0
+    la, lb = len(a), len(b)
+    while n + _BLOCK <= limit and a[la - n - _BLOCK:la - n] == b[lb - n - _BLOCK:lb - n]:
+        n += _BLOCK
+    while n < limit and a[la - n - 1] == b[lb - n - 1]:
+        n += 1
+    return n
+
+
+def content_id(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class VersionStore:
+    def __init__(self, root: Path, budget_bytes: int, min_versions: int):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.min_versions = min_versions
+        self._lock = threading.RLock()
+        self.last_gc: dict | None = None
+
+    # -- objects ----------------------------------------------------------
+
+    def _object_path(self, oid: str) -> Path:
+        return self.root / "objects" / oid[:2] / oid[2:]
+
+    def _read_object(self, oid: str) -> tuple[dict, bytes]:
+        """Header and payload of object `oid`; a missing or corrupt object is VersionNotFound."""
+        try:
+            raw = zlib.decompress(self._object_path(oid).read_bytes())
+            header, _, payload = raw.partition(b"\n")
+            return json.loads(header), payload
+        except (FileNotFoundError, zlib.error, ValueError):
+            raise VersionNotFound(oid)
+
+    def _chain_depth(self, oid: str) -> int:
+        try:
+            header, _ = self._read_object(oid)
+        except VersionNotFound:
+            return MAX_CHAIN
+        return header.get("depth", 0)
+
+    def _put(self, data: bytes, base: bytes | None, base_id: str | None) -> str:
+        oid = content_id(data)
+        path = self._object_path(oid)
+        if path.exists():
+            return oid
+        header: dict = {"type": "full"}
+        payload = data
+        if base is not None and base_id is not None and base_id != oid:
+            depth = self._chain_depth(base_id) + 1
+            prefix = _common_prefix(base, data, min(len(base), len(data)))
+            suffix = _common_suffix(base, data, min(len(base), len(data)) - prefix)
+            middle = data[prefix:len(data) - suffix]
+            if depth <= MAX_CHAIN and len(middle) <= len(data) * DELTA_RATIO:
+                header = {"type": "delta", "base": base_id, "prefix": prefix,
+                          "suffix": suffix, "depth": depth}
+                payload = middle
+        blob = zlib.compress(json.dumps(header).encode() + b"\n" + payload, 6)
+        atomic_write(path, blob)
+        return oid
+
+    def content(self, oid: str) -> bytes:
+        """The file content of version `oid`; VersionNotFound if it's gone or corrupt."""
+        if len(oid) != 64 or not all(c in "0123456789abcdef" for c in oid):
+            raise VersionNotFound(oid)
+        chain = []
+        header, payload = self._read_object(oid)
+        while header["type"] == "delta":
+            chain.append((header, payload))
+            header, payload = self._read_object(header["base"])
+        data = payload
+        for header, middle in reversed(chain):
+            suffix = data[len(data) - header["suffix"]:] if header["suffix"] else b""
+            data = data[:header["prefix"]] + middle + suffix
+        if content_id(data) != oid:
+            raise VersionNotFound(oid)
+        return data
+
+    # -- per-file index ---------------------------------------------------
+
+    def _index_path(self, rel: str) -> Path:
+        return self.root / "index" / (hashlib.sha1(rel.encode()).hexdigest() + ".jsonl")
+
+    def _read_index(self, path: Path) -> list[dict]:
+        try:
+            return list(iter_jsonl(path.read_bytes()))
+        except FileNotFoundError:
+            return []
+
+    def history(self, rel: str) -> list[dict]:
+        """Versions of `rel`, newest first."""
+        with self._lock:
+            entries = self._read_index(self._index_path(rel))
+        return [{k: e[k] for k in ("id", "t", "size", "op")} for e in reversed(entries)]
+
+    def _append(self, rel: str, entry: dict):
+        path = self._index_path(rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"path": rel, **entry}) + "\n")
+
+    def record(self, rel: str, old: bytes | None, new: bytes | None, op: str = "save"):
+        """Record a write of `rel` from `old` (None: didn't exist) to `new` (None: deleted).
+
+        If `old` isn't the last recorded version — the agent or an editor
+        changed the file outside the dashboard — it is recorded first.
+        """
+        with self._lock:
+            entries = self._read_index(self._index_path(rel))
+            last = entries[-1] if entries else None
+            last_id = last["id"] if last else None
+            now = time.time()
+            base = base_id = None
+            if last_id is not None:
+                try:
+                    base, base_id = self.content(last_id), last_id
+                except VersionNotFound:
+                    if old is not None and content_id(old) == last_id:
+                        # Lost or corrupt, but the file still has that content: store it again
+                        self._object_path(last_id).unlink(missing_ok=True)
+                        base, base_id = old, self._put(old, None, None)
+            if old is not None and content_id(old) != last_id:
+                base_id = self._put(old, base, base_id)
+                base = old
+                self._append(rel, {"id": base_id, "t": now, "size": len(old), "op": "external"})
+                last_id = base_id
+            if new is None:
+                if last_id is not None:
+                    self._append(rel, {"id": last_id, "t": now, "size": len(old or b""), "op": "delete"})
+                return
+            oid = self._put(new, base, base_id)
+            self._append(rel, {"id": oid, "t": now, "size": len(new), "op": op})
+
+    # -- garbage collection -----------------------------------------------
+
+    def _object_paths(self):
+        objects = self.root / "objects"
+        if not objects.is_dir():
+            return
+        for sub in objects.iterdir():
+            if sub.is_dir() and len(sub.name) == 2:
+                for p in sub.iterdir():
+                    if not p.name.startswith("."):
+                        yield sub.name + p.name, p
+
+    def _live(self, ids: set[str]) -> set[str]:
+        """`ids` plus every delta base they depend on."""
+        live = set()
+        stack = list(ids)
+        while stack:
+            oid = stack.pop()
+            if oid in live:
+                continue
+            live.add(oid)
+            try:
+                header, _ = self._read_object(oid)
+            except VersionNotFound:
+                continue
+            if header.get("type") == "delta":
+                stack.append(header["base"])
+        return live
+
+    def gc(self) -> dict:
+        """Trim history to the byte budget and delete unreferenced objects."""
+        with self._lock:
+            started = time.monotonic()
+            sizes = {oid: p.stat().st_size for oid, p in self._object_paths()}
+            indexes = {}
+            index_dir = self.root / "index"
+            if index_dir.is_dir():
+                for p in index_dir.glob("*.jsonl"):
+                    indexes[p] = self._read_index(p)
+
+            # Oldest first, sparing each file's newest min_versions
+            droppable = sorted(
+                ((e["t"], p, i) for p, entries in indexes.items()
+                 for i, e in enumerate(entries[:max(0, len(entries) - self.min_versions)])),
+                key=lambda x: x[0],
+            )
+            dropped: dict[Path, set[int]] = {}
+
+            def live_bytes():
+                ids = {e["id"] for p, entries in indexes.items()
+                       for i, e in enumerate(entries) if i not in dropped.get(p, ())}
+                live = self._live(ids)
+                return live, sum(sizes.get(oid, 0) for oid in live)
+
+            live, total = live_bytes()
+            pos = 0
+            while total > self.budget_bytes and pos < len(droppable):
+                # Drop in batches; recomputing liveness per entry would be quadratic
+                batch = droppable[pos:pos + max(1, len(droppable) // 10)]
+                pos += len(batch)
+                for _t, p, i in batch:
+                    dropped.setdefault(p, set()).add(i)
+                live, total = live_bytes()
+
+            for p, drop in dropped.items():
+                kept = [e for i, e in enumerate(indexes[p]) if i not in drop]
+                atomic_write(p, "".join(json.dumps(e) + "\n" for e in kept).encode())
+
+            removed = freed = 0
+            for oid, p in list(self._object_paths()):
+                if oid not in live:
+                    freed += sizes.get(oid, 0)
+                    removed += 1
+                    try:
+                        p.unlink()
+                    except OSError:
+                        pass
+
+            self.last_gc = {
+                "at": time.time(),
+                "versionsDropped": sum(len(d) for d in dropped.values()),
+                "objectsRemoved": removed,
+                "bytesFreed": freed,
+                "durationMs": round((time.monotonic() - started) * 1000, 1),
+            }
+            return self.last_gc
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = [p.stat().st_size for _oid, p in self._object_paths()]
+            index_dir = self.root / "index"
+            files = len(list(index_dir.glob("*.jsonl"))) if index_dir.is_dir() else 0
+        return {
+            "files": files,
+            "objects": len(sizes),
+            "bytes": sum(sizes),
+            "budgetBytes": self.budget_bytes,
+            "minVersions": self.min_versions,
+            "lastGc": self.last_gc,
+        }
+
+
+version_store = VersionStore(
+    DASHBOARD_DATA_DIR / "versions",
+    budget_bytes=HISTORY_BUDGET_MB * 1024 * 1024,
+    min_versions=HISTORY_MIN_VERSIONS,
+)
@@ -0,0 +1,110 @@
+"""Startup warm-up of the caches behind the hot endpoints.
+
+Route modules register steps in their setup():
+
+    warmup.add(app, "sessions", _warm_sessions)
+
+A step is a blocking function taking a Throttle and returning how many
+items it warmed. After startup the steps run one at a time in the bulk
+pool, so the fs pool stays free for requests that arrive meanwhile, and
+file reads go through Throttle so filling the page cache doesn't starve
+live traffic of disk bandwidth. Progress per step is reported by
+GET /api/ready.
+"""
+
+import time
+
+from aiohttp import web
+
+from dashboard.config import WARMUP_MB_PER_S
+
+CHUNK = 256 * 1024
+
+
+class Throttle:
+    """Keeps warm-up reads under `bytes_per_sec` (0: unlimited)."""
+
+    def __init__(self, bytes_per_sec: int):
+        self.rate = bytes_per_sec
+        self.started = time.monotonic()
+        self.bytes = 0
+
+    def consume(self, n: int):
+        self.bytes += n
+        if self.rate > 0:
+            ahead = self.bytes / self.rate - (time.monotonic() - self.started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def read(self, path, tail: int | None = None) -> int:
+        """Read a file (or its last `tail` bytes) into the page cache; bytes read."""
+        total = 0
+        try:
+            with open(path, "rb") as f:
+                if tail is not None:
+                    f.seek(0, 2)
+                    f.seek(max(0, f.tell() - tail))
+                while chunk := f.read(CHUNK):
+                    total += len(chunk)
+                    self.consume(len(chunk))
+        except OSError:
+            pass
+        return total
+
+
+class Step:
+    __slots__ = ("name", "fn", "state", "items", "ms", "error")
+
+    def __init__(self, name: str, fn):
+        self.name = name
+        self.fn = fn
+        self.state = "pending"   # pending → running → done | failed; skipped when disabled
+        self.items: int | None = None
+        self.ms: float | None = None
+        self.error: str | None = None
+
+    def to_dict(self) -> dict:
+        out = {"state": self.state, "items": self.items, "ms": self.ms}
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class Warmup:
+    def __init__(self):
+        self.steps: list[Step] = []
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.throttle = Throttle(int(WARMUP_MB_PER_S * 1024 * 1024))
+
+    @property
+    def ready(self) -> bool:
+        """All steps finished; a failed step doesn't hold readiness back."""
+        return all(step.state in ("done", "failed", "skipped") for step in self.steps)
+
+    def skip(self):
+        for step in self.steps:
+            step.state = "skipped"
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "bytesRead": self.throttle.bytes,
+            "subsystems": {step.name: step.to_dict() for step in self.steps},
+        }
+
+
+warmup_key = web.AppKey("warmup", Warmup)
+
+
+def get(app: web.Application) -> Warmup:
+    if warmup_key not in app:
+        app[warmup_key] = Warmup()
+    return app[warmup_key]
+
+
+def add(app: web.Application, name: str, fn):
+    """Register `fn(throttle) -> int` to run as warm-up step `name`."""
+    get(app).steps.append(Step(name, fn))
@@ -0,0 +1,514 @@
+"""Cached, change-tracked view of the workspace directory tree.
+
+The memory, search and skills routes all need "which files are under
+workspace/ and how big are they". Walking the tree per request costs a
+readdir per directory and a stat per file. Instead the tree is walked once
+(following symlinks, like os.walk(followlinks=True)) and then kept current:
+
+- with inotify, every directory is watched; the next access drains the
+  event queue and re-lists only the directories reported as changed;
+- without it (non-Linux, or out of inotify watches), at most every
+  POLL_INTERVAL seconds directory mtimes are compared and the known files
+  re-stat'ed (in-place edits don't touch the directory mtime), and again
+  only changed directories are re-listed.
+
+With several worker processes (utils/cluster.py) one process owns the
+tree and publish()es a snapshot file after every change; the others
+share() it as mirrors: they neither scan nor watch, and reload the
+snapshot whenever its file changed (one stat per access). The snapshot
+carries the owner's stamp (a per-process origin plus its generation) and
+mirrors adopt it, so every worker reports the same version() for the same
+content and a tag built from it means the same thing on all of them.
+
+When something drives refresh() in the background (the change feed in
+utils/fs_events.py), record_changes() makes rescans also note what changed
+as (type, path) pairs for take_changes(), and drive() stops requests from
+polling themselves.
+
+Hidden directories (unless skip_hidden=False, as for media, whose listing
+always included them) and `skip_dirs` are not tracked; routes apply
+their own filters on top (see memory.SKIP_DIRS). Directories are tracked
+by their logical path relative to the root, so a symlinked directory such
+as memory/knowledge appears under the path it is reached by. A symlink
+pointing back at one of its ancestors is not descended into again.
+"""
+
+import errno
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from dashboard.config import MEDIA_DIR, SESSIONS_DIR, WORKSPACE_DIR
+from dashboard.utils import inotify
+from dashboard.utils.codec import dumps, loads
+from dashboard.utils.filecache import atomic_write
+from dashboard.utils.trace import span
+
+POLL_INTERVAL = 2.0
+MAX_CHANGES = 1000  # recorded changes kept until taken; beyond that one "rescan" stands for all
+# Never tracked: session logs are numerous and have their own page
+TREE_SKIP_DIRS = {"sessions", "__pycache__"}
+
+
+class FileInfo(NamedTuple):
+    size: int
+    mtime_ns: int
+
+
+class _Dir:
+    __slots__ = ("key", "mtime_ns", "dirs", "files", "wd")
+
+    def __init__(self, key: tuple[int, int], mtime_ns: int):
+        self.key = key          # (st_dev, st_ino) of the directory symlinks resolve to
+        self.mtime_ns = mtime_ns
+        self.dirs: list[str] = []
+        self.files: dict[str, FileInfo] = {}
+        self.wd: int | None = None
+
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+
+def _parent(rel: str) -> str:
+    return rel.rpartition("/")[0]
+
+
+class WorkspaceTree:
+    def __init__(self, root: Path, skip_dirs=TREE_SKIP_DIRS, poll_interval: float = POLL_INTERVAL,
+                 watch: bool = True, skip_hidden: bool = True):
+        self.root = root
+        self.skip_dirs = set(skip_dirs)
+        self.skip_hidden = skip_hidden
+        self.poll_interval = poll_interval
+        self.watch = watch
+        self.generation = 0     # bumped whenever the tree changes
+        self.origin = secrets.token_hex(4)   # whose generations these are (see share())
+        self.builds = 0
+        self.rescans = 0
+        self.events = 0
+        self._lock = threading.RLock()
+        self._dirs: dict[str, _Dir] = {}
+        self._dirty: set[str] = set()
+        self._inotify: inotify.Inotify | None = None
+        self._wds: dict[int, set[str]] = {}
+        self._built = False
+        self._last_check = 0.0
+        self._snapshot: Path | None = None
+        self._owner = True
+        self._published = -1
+        self._snapshot_version = None
+        self._changes: list[tuple[str, str]] | None = None     # None: not recording
+        self.driven = False
+
+    @property
+    def mode(self) -> str:
+        if not self._owner and self._snapshot_version is not None:
+            return "mirror"
+        return "inotify" if self._inotify is not None else "poll"
+
+    def _path(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else str(self.root)
+
+    def _skip(self, name: str) -> bool:
+        return (self.skip_hidden and name.startswith(".")) or name in self.skip_dirs
+
+    # -- scanning ---------------------------------------------------------
+
+    def _list(self, rel: str) -> _Dir | None:
+        """Read one directory (not recursive); None if it is gone."""
+        path = self._path(rel)
+        try:
+            st = os.stat(path)
+            node = _Dir((st.st_dev, st.st_ino), st.st_mtime_ns)
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not self._skip(entry.name):
+                                node.dirs.append(entry.name)
+                        elif entry.is_file():
+                            est = entry.stat()
+                            node.files[entry.name] = FileInfo(est.st_size, est.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        node.dirs.sort()
+        return node
+
+    def _ancestors(self, rel: str) -> tuple:
+        keys = []
+        while rel:
+            rel = _parent(rel)
+            node = self._dirs.get(rel)
+            if node is not None:
+                keys.append(node.key)
+        return tuple(keys)
+
+    def _add(self, rel: str, ancestors: tuple = ()):
+        """Scan `rel` and everything below it into the tree."""
+        node = self._list(rel)
+        if node is None or node.key in ancestors:
+            return
+        self._dirs[rel] = node
+        self._watch_dir(rel, node)
+        for name in node.dirs:
+            self._add(_join(rel, name), ancestors + (node.key,))
+
+    def _drop(self, rel: str):
+        """Forget `rel` and its subtree."""
+        prefix = rel + "/"
+        for r in [r for r in self._dirs if r == rel or not rel or r.startswith(prefix)]:
+            self._unwatch(r, self._dirs.pop(r))
+
+    def _note(self, kind: str, rel: str):
+        changes = self._changes
+        if changes is None or changes[-1:] == [("rescan", "")]:
+            return
+        if len(changes) >= MAX_CHANGES:
+            changes[:] = [("rescan", "")]
+        else:
+            changes.append((kind, rel))
+
+    def _note_files(self, rel: str, old: dict[str, FileInfo], new: dict[str, FileInfo]):
+        if self._changes is None:
+            return
+        for name in old.keys() - new.keys():
+            self._note("deleted", _join(rel, name))
+        for name, info in new.items():
+            if name not in old:
+                self._note("created", _join(rel, name))
+            elif old[name] != info:
+                self._note("modified", _join(rel, name))
+
+    def _rescan(self, rel: str):
+        old = self._dirs.get(rel)
+        if old is None:
+            return
+        self.rescans += 1
+        node = self._list(rel)
+        if node is None or node.key != old.key:
+            # Removed, or replaced by another directory (e.g. a retargeted symlink)
+            self._drop(rel)
+            if node is not None:
+                self._add(rel, self._ancestors(rel))
+            self._note("deleted" if node is None else "modified", rel)
+            self.generation += 1
+            return
+        node.wd = old.wd
+        self._dirs[rel] = node
+        if node.dirs != old.dirs or node.files != old.files:
+            self.generation += 1
+            self._note_files(rel, old.files, node.files)
+        old_dirs = set(old.dirs)
+        for name in old_dirs.difference(node.dirs):
+            self._drop(_join(rel, name))
+            self._note("deleted", _join(rel, name))
+        ancestors = self._ancestors(rel) + (node.key,)
+        for name in node.dirs:
+            child_rel = _join(rel, name)
+            if name not in old_dirs:
+                self._add(child_rel, ancestors)
+                self._note("created", child_rel)
+                continue
+            child = self._dirs.get(child_rel)
+            if child is None:
+                continue
+            try:
+                st = os.stat(self._path(child_rel))
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) != child.key:
+                self._drop(child_rel)
+                self._add(child_rel, ancestors)
+                self._note("modified", child_rel)
+                self.generation += 1
+
+    def _build(self):
+        self._stop_watching()
+        self._dirs.clear()
+        self._dirty.clear()
+        if self.watch:
+            try:
+                self._inotify = inotify.Inotify()
+            except OSError:
+                self._inotify = None
+        self._add("")
+        if self._built:
+            self._note("rescan", "")
+        self._built = True
+        self._last_check = time.monotonic()
+        self.builds += 1
+        self.generation += 1
+
+    # -- change tracking --------------------------------------------------
+
+    def _watch_dir(self, rel: str, node: _Dir):
+        if self._inotify is None:
+            return
+        try:
+            wd = self._inotify.add_watch(self._path(rel))
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                return  # removed meanwhile; the parent's event covers it
+            # Typically ENOSPC (fs.inotify.max_user_watches): poll instead
+            self._stop_watching()
+            return
+        node.wd = wd
+        self._wds.setdefault(wd, set()).add(rel)
+
+    def _unwatch(self, rel: str, node: _Dir):
+        if node.wd is None or self._inotify is None:
+            return
+        rels = self._wds.get(node.wd)
+        if rels is not None:
+            rels.discard(rel)
+            if not rels:
+                del self._wds[node.wd]
+                self._inotify.rm_watch(node.wd)
+
+    def _stop_watching(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._wds.clear()
+        for node in self._dirs.values():
+            node.wd = None
+
+    def _drain(self):
+        for wd, mask, _cookie, _name in self._inotify.read_events():
+            self.events += 1
+            if mask & inotify.IN_Q_OVERFLOW:
+                self._dirty.update(self._dirs)
+                continue
+            rels = self._wds.get(wd)
+            if not rels:
+                continue
+            if mask & (inotify.IN_IGNORED | inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                # The directory itself went away; its parent's listing tells what's left
+                self._dirty.update(_parent(r) for r in rels)
+            else:
+                self._dirty.update(rels)
+
+    def _poll(self):
+        for rel, node in list(self._dirs.items()):
+            path = self._path(rel)
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._dirty.add(_parent(rel))
+                continue
+            if st.st_mtime_ns != node.mtime_ns or (st.st_dev, st.st_ino) != node.key:
+                self._dirty.add(rel)
+                continue
+            # Edits in place don't change the directory mtime
+            for name, info in node.files.items():
+                try:
+                    fst = os.stat(os.path.join(path, name))
+                except OSError:
+                    self._dirty.add(rel)
+                    break
+                if (fst.st_size, fst.st_mtime_ns) != info:
+                    self._dirty.add(rel)
+                    break
+
+    def refresh(self, poll: bool | None = None):
+        """Bring the tree up to date (cheap when nothing changed).
+
+        Without inotify this polls at most every poll_interval; `poll`
+        defaults to False once the tree is driven() by a background caller.
+        """
+        if poll is None:
+            poll = not self.driven
+        with self._lock:
+            if not self._owner and self._load_snapshot():
+                return
+            now = time.monotonic()
+            if not self._built or "" not in self._dirs:
+                if not self._built or now - self._last_check >= self.poll_interval:
+                    with span("scan", f"{self.root.name}: full walk"):
+                        self._build()
+                return
+            if self._inotify is not None:
+                self._drain()
+            elif poll and now - self._last_check >= self.poll_interval:
+                self._last_check = now
+                with span("scan", f"{self.root.name}: poll {len(self._dirs)} dirs"):
+                    self._poll()
+            if self._dirty:
+                with span("scan", f"{self.root.name}: rescan {len(self._dirty)} dirs"):
+                    # Parents first: re-listing a parent may drop a dirty child
+                    for rel in sorted(self._dirty, key=lambda r: r.count("/") if r else -1):
+                        self._rescan(rel)
+                    self._dirty.clear()
+
+    def invalidate(self, rel_path: str = ""):
+        """Mark the directory holding `rel_path` (a file or directory) as changed.
+
+        Routes call this after writing, so the next listing reflects the
+        write even between polls.
+        """
+        with self._lock:
+            rel = rel_path.strip("/")
+            if rel in self._dirs:
+                self._dirty.add(rel)
+                rel = _parent(rel)
+            while rel and rel not in self._dirs:
+                rel = _parent(rel)
+            self._dirty.add(rel)
+
+    # -- change feed ------------------------------------------------------
+
+    def record_changes(self):
+        """Start noting changes for take_changes() (from the current state on)."""
+        with self._lock:
+            if self._changes is None:
+                self._changes = []
+
+    def take_changes(self) -> list[tuple[str, str]]:
+        """(created|modified|deleted|rescan, path) noted since the last call."""
+        with self._lock:
+            changes = self._changes or []
+            if self._changes is not None:
+                self._changes = []
+            return changes
+
+    def drive(self):
+        """Leave polling to the caller of refresh(poll=True); requests only drain inotify."""
+        self.driven = True
+
+    def fileno(self) -> int | None:
+        """The inotify descriptor to wait on, or None when polling."""
+        with self._lock:
+            return self._inotify.fileno() if self._inotify is not None else None
+
+    # -- sharing between worker processes ---------------------------------
+
+    def share(self, path: Path, owner: bool):
+        """Share the tree with other processes through the snapshot file `path`.
+
+        The owner keeps tracking changes and writes the snapshot in
+        publish(). Any other process becomes a mirror; until the first
+        snapshot appears it scans for itself, without watching.
+        """
+        with self._lock:
+            self._snapshot = path
+            self._owner = owner
+            # Called after fork: a worker (or a respawned owner) must not reuse the parent's origin
+            self.origin = secrets.token_hex(4)
+            if not owner:
+                self.watch = False
+                self._stop_watching()
+
+    def publish(self):
+        """Owner: refresh, and write the snapshot if the tree changed since the last one."""
+        if self._snapshot is None or not self._owner:
+            return
+        self.refresh()
+        with self._lock:
+            if self.generation == self._published:
+                return
+            dirs = {rel: [*node.key, node.mtime_ns, node.dirs, {name: [*info] for name, info in node.files.items()}]
+                    for rel, node in self._dirs.items()}
+            atomic_write(self._snapshot, dumps({"origin": self.origin, "generation": self.generation,
+                                                "dirs": dirs}))
+            self._published = self.generation
+
+    def _load_snapshot(self) -> bool:
+        """Mirror: reload the snapshot if its file changed; False while there is none."""
+        try:
+            st = os.stat(self._snapshot)
+        except OSError:
+            return False
+        version = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if version == self._snapshot_version:
+            return True
+        try:
+            with open(self._snapshot, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return self._snapshot_version is not None
+        with span("parse", self._snapshot.name):
+            try:
+                data = loads(raw)
+            except ValueError:
+                return self._snapshot_version is not None
+            dirs = {}
+            for rel, (dev, ino, mtime_ns, subdirs, files) in data["dirs"].items():
+                node = _Dir((dev, ino), mtime_ns)
+                node.dirs = subdirs
+                node.files = {name: FileInfo(*info) for name, info in files.items()}
+                dirs[rel] = node
+        self._dirs = dirs
+        self._dirty.clear()
+        self._built = True
+        self._snapshot_version = version
+        self.builds += 1
+        self.origin = data["origin"]
+        self.generation = data["generation"]
+        return True
+
+    # -- queries ----------------------------------------------------------
+
+    @property
+    def stamp(self) -> tuple[str, int]:
+        """(origin, generation): equal stamps mean equal trees, in any worker."""
+        return self.origin, self.generation
+
+    def version(self) -> tuple[str, int]:
+        """stamp after a refresh; it changes whenever anything in the tree does."""
+        self.refresh()
+        return self.stamp
+
+    def walk(self, rel: str = "", skip=None) -> list[tuple[str, list[str], dict[str, FileInfo]]]:
+        """Top-down (dir, subdirs, files) triples like os.walk, from the cache.
+
+        `skip(name)` prunes subdirectories. Paths are relative to the root,
+        subdirectories are sorted; the file dicts must not be modified.
+        """
+        self.refresh()
+        with self._lock:
+            out = []
+            stack = [rel.strip("/")]
+            while stack:
+                r = stack.pop()
+                node = self._dirs.get(r)
+                if node is None:
+                    continue
+                subdirs = [d for d in node.dirs if not (skip and skip(d))]
+                out.append((r, subdirs, node.files))
+                stack.extend(_join(r, d) for d in reversed(subdirs))
+            return out
+
+    def listdir(self, rel: str = "") -> tuple[list[str], dict[str, FileInfo]] | None:
+        """(subdirs, files) of one directory, or None if it isn't tracked."""
+        self.refresh()
+        with self._lock:
+            node = self._dirs.get(rel.strip("/"))
+            return (list(node.dirs), node.files) if node is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "dirs": len(self._dirs),
+                "files": sum(len(n.files) for n in self._dirs.values()),
+                "generation": self.generation,
+                "builds": self.builds,
+                "rescans": self.rescans,
+                "events": self.events,
+            }
+
+    def close(self):
+        with self._lock:
+            self._stop_watching()
+
+
+workspace_tree = WorkspaceTree(WORKSPACE_DIR)
+# Session logs and media have their own pages and are tracked separately
+sessions_tree = WorkspaceTree(SESSIONS_DIR, skip_dirs=())
+media_tree = WorkspaceTree(MEDIA_DIR, skip_dirs=(), skip_hidden=False)
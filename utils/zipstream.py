@@ -0,0 +1,105 @@
+"""Stream a zip archive into an HTTP response without building it in memory.
+
+zipfile is synchronous, so the archive is written in a BULK pool thread into a
+file-like object that hands each chunk to the event loop and waits until it
+has been sent. At most QUEUE_CHUNKS chunks are in flight; a slow client
+slows the writer down instead of growing a buffer. Entries are written
+with data descriptors (the output isn't seekable), which every unzip tool
+understands.
+"""
+
+import asyncio
+import shutil
+import zipfile
+from pathlib import Path
+
+from aiohttp import web
+
+from dashboard.utils.executor import BULK, run_blocking
+
+QUEUE_CHUNKS = 8
+COPY_BUFFER = 256 * 1024
+
+
+class _QueueWriter:
+    """Write-only, non-seekable file object feeding an asyncio.Queue from a thread."""
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._queue = queue
+        self._loop = loop
+        self._pos = 0
+        self.aborted = False
+
+    def write(self, data) -> int:
+        if self.aborted:
+            raise OSError("client went away")
+        data = bytes(data)
+        if data:
+            asyncio.run_coroutine_threadsafe(self._queue.put(data), self._loop).result()
+            self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+
+def _write_zip(writer: _QueueWriter, entries: list[tuple[str, Path]]):
+    with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for arcname, path in entries:
+            try:
+                src = open(path, "rb")
+            except OSError:
+                continue  # removed since it was listed
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with src, zf.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+
+async def stream_zip(request: web.Request, entries: list[tuple[str, Path]],
+                     filename: str) -> web.StreamResponse:
+    """Send `entries` ([(name in archive, file path)]) as a zip download."""
+    response = web.StreamResponse(headers={
+        "Content-Type": "application/zip",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
+    await response.prepare(request)
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(QUEUE_CHUNKS)
+    writer = _QueueWriter(queue, loop)
+    done = object()
+
+    def produce():
+        try:
+            _write_zip(writer, entries)
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(done), loop)
+
+    producer = asyncio.ensure_future(run_blocking(BULK, produce))
+    try:
+        while (chunk := await queue.get()) is not done:
+            await response.write(chunk)
+    except BaseException:
+        # Client disconnected: unblock and stop the writer thread
+        writer.aborted = True
+        while not queue.empty():
+            queue.get_nowait()
+        await asyncio.gather(producer, return_exceptions=True)
+        raise
+    try:
+        await producer
+    except Exception:
+        # The archive is incomplete: cut the connection rather than end the
+        # body cleanly, so the client sees a failed download, not a bad zip
+        if request.transport is not None:
+            request.transport.abort()
+        raise
+    await response.write_eof()
+    return response
@@ -0,0 +1,72 @@
+"""Long-lived nanobot agent worker for the dashboard chat pool.
+
+Loads config, provider and AgentLoop once (the per-message cost that
+`nanobot agent -m ...` pays every time), then serves chat requests over
+the line protocol in worker_protocol.py. Must run under an interpreter
+that can import nanobot — the pool picks the one from the `nanobot`
+entry script's shebang by default.
+"""
+
+import inspect
+
+from worker_protocol import serve
+
+
+def _accepted(func, candidates: dict) -> dict:
+    """Keep only the keyword arguments `func` accepts (AgentLoop's signature varies by version)."""
+    params = inspect.signature(func).parameters
+    if any(p.kind is p.VAR_KEYWORD for p in params.values()):
+        return candidates
+    return {k: v for k, v in candidates.items() if k in params}
+
+
+async def init():
+    from loguru import logger
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+    from nanobot.cli.commands import _make_provider
+    from nanobot.config.loader import get_data_dir, load_config
+
+    logger.disable("nanobot")
+    config = load_config()
+    defaults = config.agents.defaults
+    tools = config.tools
+
+    cron = None
+    try:
+        from nanobot.cron.service import CronService
+        cron = CronService(get_data_dir() / "cron" / "jobs.json")
+    except ImportError:
+        pass
+
+    candidates = {
+        "bus": MessageBus(),
+        "provider": _make_provider(config),
+        "workspace": config.workspace_path,
+        "model": defaults.model,
+        "temperature": getattr(defaults, "temperature", None),
+        "max_tokens": getattr(defaults, "max_tokens", None),
+        "max_iterations": getattr(defaults, "max_tool_iterations", None),
+        "memory_window": getattr(defaults, "memory_window", None),
+        "brave_api_key": getattr(getattr(getattr(tools, "web", None), "search", None), "api_key", None) or None,
+        "exec_config": getattr(tools, "exec", None),
+        "cron_service": cron,
+        "restrict_to_workspace": getattr(tools, "restrict_to_workspace", None),
+        "mcp_servers": getattr(tools, "mcp_servers", None),
+    }
+    candidates = {k: v for k, v in candidates.items() if v is not None}
+    return AgentLoop(**_accepted(AgentLoop, candidates))
+
+
+async def handle(agent, req: dict, send) -> str:
+    async def on_progress(content: str):
+        await send("progress", text=content)
+
+    kwargs = _accepted(agent.process_direct, {"on_progress": on_progress})
+    return await agent.process_direct(req["message"], req["session_id"], **kwargs)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(serve(init, handle))
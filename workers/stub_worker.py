@@ -0,0 +1,37 @@
+"""Stand-in chat worker for exercising the pool without a real model.
+
+Speaks the same protocol as agent_worker.py: emits one progress event,
+then echoes the message back word by word. Point the pool at it with
+
+    NANOBOT_DASHBOARD_CHAT_WORKER_CMD="python3 /path/to/workers/stub_worker.py"
+
+STUB_WORKER_DELAY (seconds, default 0.05) sets the pause between words;
+STUB_WORKER_STARTUP (seconds, default 0) simulates slow initialization.
+"""
+
+import asyncio
+import os
+
+from worker_protocol import serve
+
+DELAY = float(os.environ.get("STUB_WORKER_DELAY", "0.05"))
+STARTUP = float(os.environ.get("STUB_WORKER_STARTUP", "0"))
+
+
+async def init():
+    await asyncio.sleep(STARTUP)
+    return {"served": 0}
+
+
+async def handle(state, req: dict, send) -> str:
+    state["served"] += 1
+    await send("progress", text=f"stub worker {os.getpid()} thinking")
+    words = f"Echo ({req['session_id']}): {req['message']}".split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(DELAY)
+        await send("delta", text=word if i == 0 else " " + word)
+    return " ".join(words)
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(init, handle))
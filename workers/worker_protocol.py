@@ -0,0 +1,107 @@
+"""Line-delimited JSON protocol shared by the chat worker scripts.
+
+The dashboard (utils/agent_pool.py) talks to a worker over its stdin and
+stdout, one JSON object per line:
+
+    → {"type": "chat", "id": ..., "message": ..., "session_id": ...}
+    ← {"type": "progress", "id": ..., "text": ...}      (any number)
+    ← {"type": "delta", "id": ..., "text": ...}         (any number)
+    ← {"type": "done", "id": ..., "response": ...}  or  {"type": "error", "id": ..., "message": ...}
+    → {"type": "cancel", "id": ...}                      (abandon that chat, no reply)
+    → {"type": "ping", "id": ...}   ← {"type": "pong", "id": ...}
+    → {"type": "shutdown"}
+
+The worker announces itself with {"type": "ready", "pid": ...} once
+initialized, or {"type": "fatal", "message": ...} before exiting if it
+cannot start. Workers handle one chat at a time.
+
+This file runs under the worker's interpreter (usually nanobot's own
+virtualenv), so it must not import anything from the dashboard package.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+CANCEL_TIMEOUT = 5  # seconds for a cancelled chat to unwind before the worker gives up and exits
+
+# Protocol output goes to a private copy of the original stdout; fd 1 is
+# pointed at stderr so stray prints from library code can't corrupt it.
+_PROTO_FD = os.dup(1)
+os.dup2(2, 1)
+
+
+def emit(msg: dict):
+    data = (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+    while data:
+        data = data[os.write(_PROTO_FD, data):]
+
+
+async def _stdin_reader() -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    return reader
+
+
+async def serve(init, handle):
+    """Run the worker loop.
+
+    init() -> state            awaited once before announcing "ready"
+    handle(state, request, send) -> str
+        processes one chat request; `send(type, **fields)` emits events
+        tagged with the request id; the return value is the final response.
+    """
+    try:
+        state = await init()
+    except Exception as e:
+        emit({"type": "fatal", "message": f"{type(e).__name__}: {e}"})
+        sys.exit(2)
+
+    emit({"type": "ready", "pid": os.getpid()})
+    reader = await _stdin_reader()
+    current: asyncio.Task | None = None
+    current_id = None
+
+    async def run_chat(req: dict):
+        req_id = req.get("id")
+
+        async def send(kind: str, **fields):
+            emit({"type": kind, "id": req_id, **fields})
+
+        try:
+            response = await handle(state, req, send)
+            emit({"type": "done", "id": req_id, "response": response or ""})
+        except Exception as e:
+            emit({"type": "error", "id": req_id, "message": f"{type(e).__name__}: {e}"})
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        kind = msg.get("type")
+        if kind == "ping":
+            emit({"type": "pong", "id": msg.get("id")})
+        elif kind == "chat":
+            if current is not None and not current.done():
+                emit({"type": "error", "id": msg.get("id"), "message": "worker busy"})
+                continue
+            current = asyncio.create_task(run_chat(msg))
+            current_id = msg.get("id")
+        elif kind == "cancel":
+            if current is not None and not current.done() and msg.get("id") == current_id:
+                current.cancel()
+                # Finish unwinding before reading the next request, so it isn't refused as busy
+                await asyncio.wait({current}, timeout=CANCEL_TIMEOUT)
+                if not current.done():
+                    sys.exit(1)  # stuck; the pool will start a replacement
+        elif kind == "shutdown":
+            break
+
+    if current is not None and not current.done():
+        current.cancel()